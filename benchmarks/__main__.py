@@ -0,0 +1,133 @@
+import argparse
+import fnmatch
+import sys
+
+from benchmarks import runner
+from benchmarks.suite import get_benchmarks
+
+
+def _format_memory(size):
+    """
+    Returns a human readable memory size
+
+    :param size: int, bytes
+    :return: string
+    """
+    for unit in ("B", "KB", "MB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
+
+
+def _print_result(name, result):
+    print(f"{name:<32} {result['ops_per_sec']:>14,.1f} ops/sec {_format_memory(result['peak_memory']):>10} peak")
+
+
+def _print_changes(changes, max_regression):
+    """
+    Print the changes compared to a baseline
+
+    :param changes: dict, as returned by `runner.compare`
+    :param max_regression: float or None, percent
+    :return: string[], names of benchmarks that regressed beyond `max_regression`
+    """
+    regressions = []
+
+    print()
+    print(f"{'Compared to baseline':<32} {'ops/sec':>14} {'peak memory':>14}")
+    for name, change in changes.items():
+        regressed = max_regression is not None and -change["ops_per_sec"] * 100 > max_regression
+        if regressed:
+            regressions.append(name)
+        marker = "  REGRESSION" if regressed else ""
+        print(f"{name:<32} {change['ops_per_sec']:>+14.1%} {change['peak_memory']:>+14.1%}{marker}")
+
+    return regressions
+
+
+def _argument_parser():
+    """
+    Configure arguments for the benchmarks
+    """
+    parser = argparse.ArgumentParser(prog="python -m benchmarks")
+    parser.add_argument(
+        "-k",
+        "--filter",
+        default="*",
+        help="Only run benchmarks matching the glob, e.g. 'categorize*'",
+    )
+    parser.add_argument(
+        "--min-time",
+        type=float,
+        default=runner.DEFAULT_MIN_TIME,
+        help="Minimum seconds of a timed round",
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=runner.DEFAULT_REPEAT,
+        help="Number of timed rounds, the fastest is reported",
+    )
+    parser.add_argument(
+        "--save",
+        metavar="FILE",
+        default=None,
+        help="Store the results as baseline",
+    )
+    parser.add_argument(
+        "--compare",
+        metavar="FILE",
+        default=None,
+        help="Compare the results to a stored baseline",
+    )
+    parser.add_argument(
+        "--max-regression",
+        type=float,
+        metavar="PERCENT",
+        default=None,
+        help="Exit with status 1 if a benchmark is slower than the baseline by more than this",
+    )
+    parser.add_argument(
+        "--list",
+        action="store_true",
+        help="List the benchmarks without running them",
+    )
+    return parser
+
+
+def main():
+    parser = _argument_parser()
+    args = parser.parse_args()
+
+    benchmarks = [benchmark for benchmark in get_benchmarks() if fnmatch.fnmatch(benchmark.name, args.filter)]
+    if not benchmarks:
+        parser.error(f"No benchmark matches {args.filter!r}")
+
+    if args.list:
+        for benchmark in benchmarks:
+            print(benchmark.name)
+        return 0
+
+    baseline = None
+    if args.compare:
+        try:
+            baseline = runner.load_baseline(args.compare)
+        except (OSError, ValueError, KeyError) as e:
+            parser.error(f"Can not read baseline {args.compare}: {e}")
+
+    results = runner.run_benchmarks(benchmarks, min_time=args.min_time, repeat=args.repeat, report=_print_result)
+
+    if args.save:
+        runner.save_baseline(args.save, results)
+
+    if baseline is not None:
+        regressions = _print_changes(runner.compare(results, baseline), args.max_regression)
+        if regressions:
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
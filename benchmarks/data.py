@@ -0,0 +1,201 @@
+import json
+import random
+from datetime import datetime, timedelta
+
+from packaging.version import InvalidVersion, Version
+
+__all__ = [
+    "generate_releases",
+    "generate_package_data",
+    "generate_project_document",
+    "generate_requirements",
+]
+
+RELEASE_COUNTS = (10, 1000, 10000)
+REQUIREMENTS_LINES = (10000,)
+
+_PRE_RELEASE_TAGS = ("a", "b", "rc", ".dev")
+_NON_SEMANTIC_FORMS = ("nightly-{n}", "build.{n}-snapshot", "r{n}-final", "latest_{n}")
+
+_FIRST_UPLOAD = datetime(2010, 1, 1)
+
+
+def _generate_release(rng, n):
+    """
+    Returns a random release string
+
+    Roughly 70% are final releases with two or three components, 15% PEP 440 pre-releases, 5% post releases and 10%
+    strings that are neither PEP 440 nor semantic versions.
+
+    :param rng: random.Random
+    :param n: int, running number used to make non-semantic strings unique
+    :return: string
+    """
+    major, minor, patch = rng.randint(0, 30), rng.randint(0, 40), rng.randint(0, 60)
+    kind = rng.random()
+
+    if kind < 0.6:
+        return f"{major}.{minor}.{patch}"
+    if kind < 0.7:
+        return f"{major}.{minor}"
+    if kind < 0.85:
+        return f"{major}.{minor}.{patch}{rng.choice(_PRE_RELEASE_TAGS)}{rng.randint(0, 9)}"
+    if kind < 0.9:
+        return f"{major}.{minor}.{patch}.post{rng.randint(1, 3)}"
+    return rng.choice(_NON_SEMANTIC_FORMS).format(n=n)
+
+
+def _get_latest_version(releases):
+    """
+    Returns the latest final release, like the info version of the PyPI JSON API
+
+    :param releases: string[]
+    :return: string
+    """
+    latest = None
+
+    for release in releases:
+        try:
+            version = Version(release)
+        except InvalidVersion:
+            continue
+        if not version.is_prerelease and (latest is None or version > latest[0]):
+            latest = (version, release)
+
+    return latest[1] if latest else ""
+
+
+def generate_releases(count, seed=0):
+    """
+    Returns distinct release strings of mixed forms
+
+    :param count: int
+    :param seed: int, the same seed always returns the same releases
+    :return: string[]
+    """
+    rng = random.Random(seed)
+    releases = {}
+
+    while len(releases) < count:
+        releases.setdefault(_generate_release(rng, len(releases)), None)
+
+    return list(releases)
+
+
+def generate_package_data(release_count, seed=0):
+    """
+    Returns a project document in the shape of the PyPI JSON API
+
+    Like on PyPI, some releases have no files and therefore no upload time.
+
+    :param release_count: int
+    :param seed: int
+    :return: dict
+    """
+    rng = random.Random(seed)
+    releases = {}
+
+    for release in generate_releases(release_count, seed):
+        if rng.random() < 0.05:
+            releases[release] = []
+            continue
+
+        upload_time = _FIRST_UPLOAD + timedelta(seconds=rng.randint(0, 15 * 365 * 24 * 3600))
+        releases[release] = [
+            {"upload_time": upload_time.strftime("%Y-%m-%dT%H:%M:%S")} for _ in range(rng.randint(1, 3))
+        ]
+
+    return {
+        "info": {"version": _get_latest_version(releases), "license": "MIT"},
+        "releases": releases,
+    }
+
+
+def _generate_file(rng, release, upload_time, n):
+    """
+    Returns a distribution file entry of the PyPI JSON API
+
+    :param rng: random.Random
+    :param release: string
+    :param upload_time: string
+    :param n: int, running number of the file within the release
+    :return: dict
+    """
+    filename = f"package-{release}-py3-none-any-{n}.whl"
+    return {
+        "comment_text": "",
+        "digests": {"blake2b_256": f"{rng.getrandbits(256):064x}", "md5": f"{rng.getrandbits(128):032x}"},
+        "downloads": -1,
+        "filename": filename,
+        "has_sig": False,
+        "md5_digest": f"{rng.getrandbits(128):032x}",
+        "packagetype": "bdist_wheel",
+        "python_version": "py3",
+        "requires_python": ">=3.8",
+        "size": rng.randint(10_000, 10_000_000),
+        "upload_time": upload_time,
+        "upload_time_iso_8601": f"{upload_time}.000000Z",
+        "url": f"https://files.pythonhosted.org/packages/{rng.getrandbits(64):016x}/{filename}",
+        "yanked": False,
+        "yanked_reason": None,
+    }
+
+
+def generate_project_document(release_count, seed=0):
+    """
+    Returns the serialized document of a project with complete file entries and a long description, like on PyPI
+
+    :param release_count: int
+    :param seed: int
+    :return: bytes
+    """
+    rng = random.Random(seed)
+    package_data = generate_package_data(release_count, seed)
+
+    releases = {
+        release: [_generate_file(rng, release, file["upload_time"], n) for n, file in enumerate(files)]
+        for release, files in package_data["releases"].items()
+    }
+    latest = package_data["info"]["version"]
+    document = {
+        "info": {**package_data["info"], "description": "A long description. " * 500, "summary": "A package"},
+        "last_serial": seed,
+        "releases": releases,
+        "urls": releases[latest],
+        "vulnerabilities": [],
+    }
+
+    return json.dumps(document).encode("utf-8")
+
+
+def generate_requirements(line_count, seed=0):
+    """
+    Returns the lines of a requirements file
+
+    Most lines pin a version, the others are comments, blank lines, unpinned requirements, extras and options.
+
+    :param line_count: int
+    :param seed: int
+    :return: string[]
+    """
+    rng = random.Random(seed)
+    lines = []
+
+    for n in range(line_count):
+        kind = rng.random()
+        version = f"{rng.randint(0, 30)}.{rng.randint(0, 40)}.{rng.randint(0, 60)}"
+
+        if kind < 0.75:
+            lines.append(f"package-{n}=={version}\n")
+        elif kind < 0.8:
+            lines.append(f"package-{n}[extra]=={version}  # pinned for compatibility\n")
+        elif kind < 0.85:
+            lines.append(f"package-{n}>={version}\n")
+        elif kind < 0.9:
+            lines.append(f"# package-{n}=={version}\n")
+        elif kind < 0.95:
+            lines.append("\n")
+        else:
+            lines.append(f"--hash=sha256:{rng.getrandbits(256):064x}\n")
+
+    return lines
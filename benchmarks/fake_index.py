@@ -0,0 +1,397 @@
+import argparse
+import asyncio
+import json
+import math
+import random
+import sys
+import time
+import zlib
+from functools import lru_cache
+from http import HTTPStatus
+
+from benchmarks.data import generate_package_data
+
+__all__ = [
+    "LATENCY_DISTRIBUTIONS",
+    "FakeIndex",
+    "get_latency_distribution",
+    "percentile",
+]
+
+_MAX_HEADER_LINES = 100
+
+
+def _fixed(median, spread, rng):
+    return median
+
+
+def _uniform(median, spread, rng):
+    return max(0.0, rng.uniform(median * (1 - spread), median * (1 + spread)))
+
+
+def _lognormal(median, spread, rng):
+    # The median of a log-normal distribution is exp(mu), `spread` is the standard deviation of its logarithm
+    return rng.lognormvariate(math.log(median), spread) if median > 0 else 0.0
+
+
+LATENCY_DISTRIBUTIONS = {
+    "fixed": _fixed,
+    "uniform": _uniform,
+    "lognormal": _lognormal,
+}
+
+
+def get_latency_distribution(name="lognormal", median=0.05, spread=0.5, seed=0):
+    """
+    Returns a function drawing response latencies
+
+    :param name: string, one of `LATENCY_DISTRIBUTIONS`
+    :param median: float, seconds
+    :param spread: float, relative width of the uniform distribution or sigma of the log-normal distribution
+    :param seed: int
+    :return: callable returning seconds
+    """
+    try:
+        distribution = LATENCY_DISTRIBUTIONS[name]
+    except KeyError:
+        raise ValueError(f"Unknown latency distribution {name!r}!")
+
+    rng = random.Random(seed)
+    return lambda: distribution(median, spread, rng)
+
+
+def percentile(values, fraction):
+    """
+    Returns a percentile of values, using the nearest rank
+
+    :param values: float[]
+    :param fraction: float, e.g. 0.99
+    :return: float or None if there are no values
+    """
+    if not values:
+        return None
+
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(fraction * len(ordered)) - 1))]
+
+
+class FakeIndex:
+    """
+    Local stand-in of the PyPI JSON API serving synthetic documents
+
+    Every project exists, its releases are generated from its name, so repeated runs see the same documents. Responses
+    are delayed by a latency drawn from a distribution, a share of them fails with a server error and requests beyond
+    a rate limit are throttled with `429`. Connections are kept alive like by PyPI.
+
+    GET|HEAD /pypi/<name>/json
+    GET|HEAD /pypi/<name>/<version>/json
+    GET /_stats                     counters of requests and connections, see `get_stats`
+    POST /_reset                    reset the counters
+    """
+
+    def __init__(self, releases=50, latency=None, error_rate=0.0, rate_limit=None, seed=0):
+        """
+        :param releases: int, number of releases of every project
+        :param latency: callable returning seconds, see `get_latency_distribution`, no latency if not given
+        :param error_rate: float, share of requests answered with `503`
+        :param rate_limit: float, requests per second served before throttling with `429`, unlimited if not given
+        :param seed: int
+        """
+        self.releases = releases
+        self.latency = latency
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit
+
+        self._rng = random.Random(seed)
+        self._tokens = rate_limit
+        self._tokens_updated = time.monotonic()
+        self._server = None
+        self._handlers = set()
+        self._document = lru_cache(maxsize=None)(self._build_document)
+
+        self.open_connections = 0
+        self.in_flight = 0
+        self.reset_stats()
+
+    def reset_stats(self):
+        """
+        Reset the counters of requests and connections, connections that are still open are kept
+        """
+        self.requests = 0
+        self.status_codes = {}
+        self.latencies = []
+        self.connections = 0
+        self.peak_connections = self.open_connections
+        self.peak_in_flight = self.in_flight
+
+    def get_stats(self):
+        """
+        Returns the counters of requests and connections
+
+        :return: dict
+        """
+        return {
+            "requests": self.requests,
+            "status_codes": dict(sorted(self.status_codes.items())),
+            "p50_latency": percentile(self.latencies, 0.5),
+            "p99_latency": percentile(self.latencies, 0.99),
+            "connections": self.connections,
+            "peak_connections": self.peak_connections,
+            "peak_in_flight": self.peak_in_flight,
+        }
+
+    async def start(self, host="127.0.0.1", port=0):
+        """
+        Start listening for requests
+
+        :param host: string
+        :param port: int, 0 to pick a free port
+        :return: string, base url of the JSON API
+        """
+        self._server = await asyncio.start_server(self._handle, host, port)
+        return f"http://{host}:{self._server.sockets[0].getsockname()[1]}/pypi"
+
+    async def aclose(self):
+        """
+        Stop listening for requests
+        """
+        if self._server is None:
+            return
+
+        self._server.close()
+        for handler in self._handlers:
+            handler.cancel()
+        await asyncio.gather(*self._handlers, return_exceptions=True)
+        await self._server.wait_closed()
+        self._server = None
+
+    def _build_document(self, package_name, version):
+        """
+        Returns the serialized document of a project or release
+
+        :param package_name: string
+        :param version: string or None
+        :return: bytes
+        """
+        seed = zlib.crc32(package_name.encode())
+
+        if version is not None:
+            document = {"info": {"version": version, "license": "MIT"}}
+        else:
+            document = generate_package_data(self.releases, seed=seed)
+            document["last_serial"] = seed
+
+        return json.dumps(document).encode("utf-8")
+
+    def _throttled(self):
+        """
+        Checks if a request exceeds the rate limit, using a token bucket holding one second of requests
+
+        :return: bool
+        """
+        if self.rate_limit is None:
+            return False
+
+        now = time.monotonic()
+        self._tokens = min(self.rate_limit, self._tokens + (now - self._tokens_updated) * self.rate_limit)
+        self._tokens_updated = now
+
+        if self._tokens < 1:
+            return True
+
+        self._tokens -= 1
+        return False
+
+    def _respond(self, method, target):
+        """
+        Returns the response to a request
+
+        :param method: string
+        :param target: string
+        :return: tuple (HTTPStatus, dict of headers, bytes)
+        """
+        parts = target.split("?")[0].strip("/").split("/")
+
+        if method not in ("GET", "HEAD"):
+            return HTTPStatus.METHOD_NOT_ALLOWED, {}, b""
+        if len(parts) not in (3, 4) or parts[0] != "pypi" or parts[-1] != "json":
+            return HTTPStatus.NOT_FOUND, {}, b""
+        if self._throttled():
+            return HTTPStatus.TOO_MANY_REQUESTS, {"Retry-After": "1"}, b""
+        if self.error_rate and self._rng.random() < self.error_rate:
+            return HTTPStatus.SERVICE_UNAVAILABLE, {}, b""
+
+        body = self._document(parts[1], parts[2] if len(parts) == 4 else None)
+        headers = {"Content-Type": "application/json", "X-PyPI-Last-Serial": str(zlib.crc32(parts[1].encode()))}
+        return HTTPStatus.OK, headers, body
+
+    def _control(self, method, target):
+        """
+        Returns the response to a request of the load test, it is neither delayed nor counted
+
+        :param method: string
+        :param target: string
+        :return: tuple (HTTPStatus, dict of headers, bytes)
+        """
+        if target == "/_stats" and method == "GET":
+            return HTTPStatus.OK, {"Content-Type": "application/json"}, json.dumps(self.get_stats()).encode()
+        if target == "/_reset" and method == "POST":
+            self.reset_stats()
+            return HTTPStatus.NO_CONTENT, {}, b""
+
+        return HTTPStatus.NOT_FOUND, {}, b""
+
+    async def _read_request(self, reader):
+        """
+        Read the request line and headers of a request
+
+        :param reader: asyncio.StreamReader
+        :return: tuple (method, target, keep alive) or None once the connection is closed
+        """
+        request_line = (await reader.readline()).decode("latin-1").split()
+        if len(request_line) != 3:
+            return None
+
+        keep_alive = request_line[2] == "HTTP/1.1"
+        for _ in range(_MAX_HEADER_LINES):
+            line = (await reader.readline()).decode("latin-1").strip()
+            if not line:
+                break
+            name, _, value = line.partition(":")
+            if name.strip().lower() == "connection":
+                keep_alive = value.strip().lower() == "keep-alive"
+
+        return request_line[0], request_line[1], keep_alive
+
+    async def _write(self, writer, method, keep_alive, status, headers, body):
+        """
+        Write a response
+
+        :param writer: asyncio.StreamWriter
+        :param method: string, method of the request
+        :param keep_alive: bool
+        :param status: HTTPStatus
+        :param headers: dict
+        :param body: bytes
+        """
+        head = [f"HTTP/1.1 {status.value} {status.phrase}", f"Content-Length: {len(body)}"]
+        head += [f"{name}: {value}" for name, value in headers.items()]
+        if not keep_alive:
+            head.append("Connection: close")
+
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1"))
+        if method != "HEAD":
+            writer.write(body)
+        await writer.drain()
+
+    async def _handle(self, reader, writer):
+        """
+        Answer the requests of a connection until the client closes it
+
+        :param reader: asyncio.StreamReader
+        :param writer: asyncio.StreamWriter
+        """
+        self._handlers.add(asyncio.current_task())
+        self.connections += 1
+        self.open_connections += 1
+        self.peak_connections = max(self.peak_connections, self.open_connections)
+
+        try:
+            while True:
+                request = await self._read_request(reader)
+                if request is None:
+                    break
+
+                method, target, keep_alive = request
+
+                if target.startswith("/_"):
+                    await self._write(writer, method, keep_alive, *self._control(method, target))
+                    if not keep_alive:
+                        break
+                    continue
+
+                start = time.monotonic()
+                self.in_flight += 1
+                self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+
+                try:
+                    if self.latency is not None:
+                        await asyncio.sleep(self.latency())
+                    status, headers, body = self._respond(method, target)
+                finally:
+                    self.in_flight -= 1
+
+                await self._write(writer, method, keep_alive, status, headers, body)
+
+                self.requests += 1
+                self.status_codes[status.value] = self.status_codes.get(status.value, 0) + 1
+                self.latencies.append(time.monotonic() - start)
+
+                if not keep_alive:
+                    break
+        except (ConnectionError, ValueError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self._handlers.discard(asyncio.current_task())
+            self.open_connections -= 1
+            writer.close()
+
+
+def _argument_parser():
+    """
+    Configure arguments for the fake index
+    """
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.fake_index")
+    parser.add_argument("--host", default="127.0.0.1", help="Address to listen on")
+    parser.add_argument("--port", type=int, default=0, help="Port to listen on, a free port by default")
+    parser.add_argument("--releases", type=int, default=50, help="Number of releases of every project")
+    parser.add_argument(
+        "--latency",
+        choices=sorted(LATENCY_DISTRIBUTIONS),
+        default="lognormal",
+        help="Latency distribution",
+    )
+    parser.add_argument("--latency-median", type=float, default=50.0, help="Median latency in ms")
+    parser.add_argument(
+        "--latency-spread",
+        type=float,
+        default=0.5,
+        help="Relative width of the uniform or sigma of the log-normal distribution",
+    )
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests failing with 503")
+    parser.add_argument("--rate-limit", type=float, default=None, help="Requests per second before 429 responses")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the synthetic data and the latencies")
+    return parser
+
+
+async def _serve(args):
+    index = FakeIndex(
+        releases=args.releases,
+        latency=get_latency_distribution(args.latency, args.latency_median / 1000, args.latency_spread, args.seed),
+        error_rate=args.error_rate,
+        rate_limit=args.rate_limit,
+        seed=args.seed,
+    )
+
+    # The first line tells the load test where to find the index
+    print(await index.start(args.host, args.port), flush=True)
+
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await index.aclose()
+
+
+def main(argv=None):
+    args = _argument_parser().parse_args(argv)
+
+    try:
+        asyncio.run(_serve(args))
+    except KeyboardInterrupt:
+        pass
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,200 @@
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+from benchmarks.fake_index import percentile
+from updatable import client as updatable_client
+from updatable import console as updatable_console
+
+__all__ = [
+    "start_fake_index",
+    "run_load_test",
+]
+
+
+class _TimedSession(updatable_client.Session):
+    """
+    Session recording the latency of every request, from sending it until the response headers are received
+    """
+
+    latencies = None
+
+    def open(self):
+        if self._client is not None:
+            return
+
+        super().open()
+        self._client.event_hooks = {"request": [self._request_sent], "response": [self._response_received]}
+
+    async def _request_sent(self, request):
+        request.extensions["load_test_start"] = time.monotonic()
+
+    async def _response_received(self, response):
+        self.latencies.append(time.monotonic() - response.request.extensions["load_test_start"])
+
+
+def _write_requirements(path, packages, seed=0):
+    """
+    Write a requirements file pinning distinct synthetic projects
+
+    :param path: string
+    :param packages: int
+    :param seed: int
+    """
+    rng = random.Random(seed)
+
+    with open(path, "w") as f:
+        for n in range(packages):
+            f.write(f"package-{n}=={rng.randint(0, 30)}.{rng.randint(0, 40)}.{rng.randint(0, 60)}\n")
+
+
+@contextlib.contextmanager
+def start_fake_index(index_args=()):
+    """
+    Run a fake index in a separate process, so it does not compete with updatable for the event loop
+
+    :param index_args: string[], arguments of `python -m benchmarks.fake_index`
+    :return: context manager yielding the base url of the JSON API
+    """
+    process = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.fake_index", *index_args],
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+
+    try:
+        index_url = process.stdout.readline().strip()
+        if not index_url:
+            raise RuntimeError("The fake index did not start!")
+        yield index_url
+    finally:
+        process.terminate()
+        process.wait()
+
+
+async def run_load_test(index_url, packages=1000, console_args=(), seed=0):
+    """
+    Run the console pipeline against a fake index and measure it
+
+    The console output is discarded, the disk cache is disabled unless enabled by the console arguments.
+
+    :param index_url: string, base url of the JSON API of a `benchmarks.fake_index.FakeIndex`
+    :param packages: int, number of pinned packages
+    :param console_args: string[], additional arguments of the console
+    :param seed: int
+    :return: dict
+    """
+    latencies = []
+    control_url = index_url.rsplit("/pypi", 1)[0]
+    session_class = updatable_client.Session
+    argv = sys.argv
+
+    # The connection of the control requests is not kept open, so it is not counted by the index
+    async with httpx.AsyncClient(base_url=control_url, headers={"Connection": "close"}) as control:
+        (await control.post("/_reset")).raise_for_status()
+
+        with tempfile.TemporaryDirectory() as directory:
+            requirements = os.path.join(directory, "requirements.txt")
+            _write_requirements(requirements, packages, seed)
+
+            _TimedSession.latencies = latencies
+            updatable_client.Session = _TimedSession
+            sys.argv = ["updatable", "-f", requirements, "--index-url", index_url, "--cache", "no", *console_args]
+
+            start = time.monotonic()
+            try:
+                with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                    await updatable_console._updatable()
+            finally:
+                duration = time.monotonic() - start
+                updatable_client.Session = session_class
+                sys.argv = argv
+
+        index_stats = (await control.get("/_stats")).json()
+
+    return {
+        "packages": packages,
+        "duration": duration,
+        "packages_per_sec": packages / duration,
+        "requests_per_sec": len(latencies) / duration,
+        "client": {
+            "requests": len(latencies),
+            "p50_latency": percentile(latencies, 0.5),
+            "p99_latency": percentile(latencies, 0.99),
+        },
+        "index": index_stats,
+    }
+
+
+def _format_seconds(value):
+    return "-" if value is None else f"{value * 1000:.1f} ms"
+
+
+def _print_report(result):
+    index = result["index"]
+    status_codes = ", ".join(f"{status}: {count}" for status, count in index["status_codes"].items())
+
+    print(f"Packages:            {result['packages']} in {result['duration']:.2f} sec")
+    print(
+        f"Throughput:          {result['packages_per_sec']:.1f} packages/sec, {result['requests_per_sec']:.1f} req/sec"
+    )
+    print(f"Client latency:      p50 {_format_seconds(result['client']['p50_latency'])}, ", end="")
+    print(f"p99 {_format_seconds(result['client']['p99_latency'])}")
+    print(
+        f"Index latency:       p50 {_format_seconds(index['p50_latency'])}, p99 {_format_seconds(index['p99_latency'])}"
+    )
+    print(f"Responses:           {status_codes}")
+    print(f"Connections:         {index['connections']} opened, {index['peak_connections']} at most open")
+    print(f"In-flight requests:  {index['peak_in_flight']} at most")
+
+
+def _argument_parser():
+    """
+    Configure arguments for the load test
+    """
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.load",
+        description=(
+            "Runs updatable against a local fake index. Unknown arguments configure the fake index, see "
+            "python -m benchmarks.fake_index --help, arguments after -- are passed to updatable."
+        ),
+    )
+    parser.add_argument("--packages", type=int, default=1000, help="Number of pinned packages")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the pinned versions")
+    parser.add_argument("--json", metavar="FILE", default=None, help="Store the results as JSON")
+    return parser
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    console_args = []
+    if "--" in argv:
+        position = argv.index("--")
+        argv, console_args = argv[:position], argv[position + 1 :]
+
+    args, index_args = _argument_parser().parse_known_args(argv)
+
+    with start_fake_index(index_args) as index_url:
+        result = asyncio.run(run_load_test(index_url, args.packages, console_args, args.seed))
+
+    _print_report(result)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(result, f, indent=2)
+            f.write("\n")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,169 @@
+import gc
+import json
+import platform
+import time
+import tracemalloc
+
+__all__ = [
+    "Benchmark",
+    "measure",
+    "run_benchmarks",
+    "save_baseline",
+    "load_baseline",
+    "compare",
+]
+
+DEFAULT_MIN_TIME = 0.2
+DEFAULT_REPEAT = 5
+
+
+class Benchmark:
+    """
+    A named operation that is measured
+
+    `setup` is called once per benchmark and returns the arguments of `run`, so creating the input is not measured.
+    """
+
+    __slots__ = ("name", "setup", "run")
+
+    def __init__(self, name, setup, run):
+        """
+        :param name: string
+        :param setup: callable returning a tuple of arguments
+        :param run: callable, the measured operation
+        """
+        self.name = name
+        self.setup = setup
+        self.run = run
+
+
+def _time_loops(run, args, loops):
+    """
+    Returns the seconds taken by running the operation a number of times
+
+    :param run: callable
+    :param args: tuple
+    :param loops: int
+    :return: float
+    """
+    start = time.perf_counter()
+    for _ in range(loops):
+        run(*args)
+    return time.perf_counter() - start
+
+
+def measure(benchmark, min_time=DEFAULT_MIN_TIME, repeat=DEFAULT_REPEAT):
+    """
+    Measure the throughput and peak memory of a benchmark
+
+    The number of loops is raised until a round takes at least `min_time`, the fastest of `repeat` rounds is reported
+    since slower rounds only add noise of other processes. Peak memory is traced in a separate run, so tracing does
+    not slow down the timed rounds.
+
+    :param benchmark: Benchmark
+    :param min_time: float, minimum seconds of a timed round
+    :param repeat: int, number of timed rounds
+    :return: dict, {ops_per_sec, peak_memory}
+    """
+    args = benchmark.setup()
+
+    # Warm up, so imports and first time allocations are not measured
+    benchmark.run(*args)
+
+    loops = 1
+    while _time_loops(benchmark.run, args, loops) < min_time:
+        loops *= 2
+
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        best = min(_time_loops(benchmark.run, args, loops) for _ in range(repeat))
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+    tracemalloc.start()
+    try:
+        benchmark.run(*args)
+        _current, peak_memory = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "ops_per_sec": loops / best,
+        "peak_memory": peak_memory,
+    }
+
+
+def run_benchmarks(benchmarks, min_time=DEFAULT_MIN_TIME, repeat=DEFAULT_REPEAT, report=None):
+    """
+    Measure several benchmarks
+
+    :param benchmarks: Benchmark[]
+    :param min_time: float
+    :param repeat: int
+    :param report: callable called with the name and result of every benchmark once it is measured
+    :return: dict, {name: {ops_per_sec, peak_memory}}
+    """
+    results = {}
+
+    for benchmark in benchmarks:
+        results[benchmark.name] = measure(benchmark, min_time=min_time, repeat=repeat)
+        if report is not None:
+            report(benchmark.name, results[benchmark.name])
+
+    return results
+
+
+def save_baseline(path, results):
+    """
+    Store results as a baseline for later runs
+
+    :param path: string
+    :param results: dict, as returned by `run_benchmarks`
+    """
+    baseline = {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "machine": platform.machine(),
+        "benchmarks": results,
+    }
+
+    with open(path, "w") as f:
+        json.dump(baseline, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def load_baseline(path):
+    """
+    Returns the results of a baseline
+
+    :param path: string
+    :return: dict, {name: {ops_per_sec, peak_memory}}
+    """
+    with open(path) as f:
+        return json.load(f)["benchmarks"]
+
+
+def compare(results, baseline):
+    """
+    Returns the relative change of the results compared to a baseline
+
+    Benchmarks that are missing in one of them are skipped.
+
+    :param results: dict, {name: {ops_per_sec, peak_memory}}
+    :param baseline: dict, {name: {ops_per_sec, peak_memory}}
+    :return: dict, {name: {ops_per_sec, peak_memory}}, positive values are faster or larger
+    """
+    changes = {}
+
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+
+        changes[name] = {
+            key: (result[key] - baseline[name][key]) / baseline[name][key] if baseline[name][key] else 0.0
+            for key in ("ops_per_sec", "peak_memory")
+        }
+
+    return changes
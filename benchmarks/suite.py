@@ -0,0 +1,164 @@
+from benchmarks.data import (
+    RELEASE_COUNTS,
+    REQUIREMENTS_LINES,
+    generate_package_data,
+    generate_project_document,
+    generate_requirements,
+)
+from benchmarks.runner import Benchmark
+from updatable import decode as updatable_decode
+from updatable import utils as updatable_utils
+
+__all__ = [
+    "get_benchmarks",
+]
+
+# Version the generated projects are categorized against, releases are spread around it
+PACKAGE_VERSION = "10.20.30"
+
+# Versions of a project pinned across a fleet
+FLEET_VERSIONS = ("3.2.0", "10.20.30", "15.1.0", "20.0.0", "25.10.5", "28.30.1")
+
+
+def _clear_caches():
+    """
+    Clear the process wide caches, so every operation parses its releases again
+    """
+    updatable_utils.clear_parse_cache()
+    updatable_utils.get_update_boundaries.cache_clear()
+
+
+def _label(count):
+    """
+    Returns a short label of a count, e.g. 1k
+
+    :param count: int
+    :return: string
+    """
+    return f"{count // 1000}k" if count >= 1000 and count % 1000 == 0 else str(count)
+
+
+def _categorize_setup(count):
+    return lambda: (generate_package_data(count), updatable_utils.parse_release(PACKAGE_VERSION).semantic_version)
+
+
+def _categorize_cold(package_data, package_version):
+    _clear_caches()
+    updatable_utils.get_categorized_package_data(package_data, package_version)
+
+
+def _up_to_date_setup(count):
+    def setup():
+        package_data = generate_package_data(count)
+        return package_data, package_data["info"]["version"]
+
+    return setup
+
+
+def _up_to_date_cold(package_data, version):
+    _clear_caches()
+    updatable_utils.get_update_list(package_data, version)
+
+
+def _baselines_setup(count):
+    def setup():
+        versions = [updatable_utils.parse_release(version).semantic_version for version in FLEET_VERSIONS]
+        return generate_package_data(count), versions
+
+    return setup
+
+
+def _baselines_cold(package_data, package_versions):
+    _clear_caches()
+    updatable_utils.get_categorized_package_lists(package_data, package_versions)
+
+
+def _semantic_releases(count):
+    """
+    Returns the releases of a generated project that have a semantic version
+
+    :param count: int
+    :return: string[]
+    """
+    releases = generate_package_data(count)["releases"]
+    return [release for release in releases if updatable_utils.parse_release(release).semantic_version]
+
+
+def _sorted_versions_setup(count):
+    return lambda: ([{"version": release} for release in _semantic_releases(count)],)
+
+
+def _predicates_setup(count):
+    def setup():
+        versions = [updatable_utils.parse_release(release).semantic_version for release in _semantic_releases(count)]
+        return versions, updatable_utils.parse_release(PACKAGE_VERSION).semantic_version
+
+    return setup
+
+
+def _predicates(versions, package_version):
+    for version in versions:
+        updatable_utils.is_major_update(version, package_version)
+        updatable_utils.is_minor_update(version, package_version)
+        updatable_utils.is_patch_update(version, package_version)
+
+
+def _parse_releases(releases):
+    _clear_caches()
+    for release in releases:
+        updatable_utils.parse_release(release)
+
+
+def get_benchmarks():
+    """
+    Returns the benchmarks of the categorization and parsing hot paths
+
+    `categorize` runs with warm process wide parse caches, as for repeated lookups of a run or the service mode,
+    `categorize-cold` clears them before every operation, as for the first lookup of a project. `up-to-date-cold`
+    looks up the latest release of a project, `categorize-baselines-cold` categorizes a project for the versions pinned
+    across a fleet. `decode-<decoder>`
+    runs for every installed JSON decoder.
+
+    :return: Benchmark[]
+    """
+    benchmarks = []
+
+    for count in RELEASE_COUNTS:
+        label = _label(count)
+        benchmarks += [
+            Benchmark(
+                f"categorize[{label}]",
+                _categorize_setup(count),
+                updatable_utils.get_categorized_package_data,
+            ),
+            Benchmark(f"categorize-cold[{label}]", _categorize_setup(count), _categorize_cold),
+            Benchmark(f"up-to-date-cold[{label}]", _up_to_date_setup(count), _up_to_date_cold),
+            Benchmark(f"categorize-baselines-cold[{label}]", _baselines_setup(count), _baselines_cold),
+            Benchmark(f"sorted_versions[{label}]", _sorted_versions_setup(count), updatable_utils.sorted_versions),
+            Benchmark(f"is_update[{label}]", _predicates_setup(count), _predicates),
+            Benchmark(
+                f"parse_release-cold[{label}]",
+                lambda count=count: (list(generate_package_data(count)["releases"]),),
+                _parse_releases,
+            ),
+        ]
+        benchmarks += [
+            Benchmark(
+                f"decode-{decoder}[{label}]",
+                lambda count=count, decoder=decoder: (generate_project_document(count), decoder),
+                updatable_decode.decode_project,
+            )
+            for decoder in updatable_decode.JSON_DECODERS
+            if updatable_decode.is_decoder_available(decoder)
+        ]
+
+    for count in REQUIREMENTS_LINES:
+        benchmarks.append(
+            Benchmark(
+                f"parse_requirements_list[{_label(count)}]",
+                lambda count=count: (generate_requirements(count),),
+                updatable_utils.parse_requirements_list,
+            ),
+        )
+
+    return benchmarks
@@ -0,0 +1,120 @@
+#!/usr/bin/env python
+import asyncio
+import unittest
+
+import httpx
+
+from benchmarks import runner
+from benchmarks.data import generate_package_data, generate_releases, generate_requirements
+from benchmarks.fake_index import FakeIndex, get_latency_distribution, percentile
+from benchmarks.load import run_load_test
+from updatable import utils as updatable_utils
+
+
+class TestBenchmarks(unittest.TestCase):
+    def test_generate_releases(self):
+        """
+        Assures that the generated releases are distinct, reproducible and of mixed forms
+        """
+        releases = generate_releases(1000)
+
+        self.assertEqual(len(set(releases)), 1000)
+        self.assertListEqual(releases, generate_releases(1000))
+
+        parsed = [updatable_utils.parse_release(release) for release in releases]
+        self.assertTrue(any(release.version is None for release in parsed))
+        self.assertTrue(any(release.version and release.version.is_prerelease for release in parsed))
+
+    def test_generate_package_data(self):
+        package_data = generate_package_data(100)
+
+        self.assertEqual(len(package_data["releases"]), 100)
+        updates = updatable_utils.get_update_list(package_data, "1.0.0")
+        self.assertGreater(updates["newer_releases"], 0)
+
+    def test_generate_requirements(self):
+        requirements = generate_requirements(1000)
+
+        self.assertEqual(len(requirements), 1000)
+        self.assertGreater(len(updatable_utils.parse_requirements_list(requirements)), 700)
+
+    def test_measure_and_compare(self):
+        benchmark = runner.Benchmark("sum", lambda: (list(range(100)),), sum)
+        results = runner.run_benchmarks([benchmark], min_time=0.001, repeat=1)
+
+        self.assertGreater(results["sum"]["ops_per_sec"], 0)
+
+        baseline = {"sum": {"ops_per_sec": results["sum"]["ops_per_sec"] * 2, "peak_memory": 100}}
+        changes = runner.compare(results, baseline)
+        self.assertAlmostEqual(changes["sum"]["ops_per_sec"], -0.5)
+
+
+class TestFakeIndex(unittest.TestCase):
+    def request(self, index, *requests):
+        async def run():
+            index_url = await index.start()
+            try:
+                async with httpx.AsyncClient() as client:
+                    return [await client.request(method, f"{index_url}{path}") for method, path in requests]
+            finally:
+                await index.aclose()
+
+        return asyncio.run(run())
+
+    def test_documents(self):
+        project, release, head, missing = self.request(
+            FakeIndex(releases=20),
+            ("GET", "/package-1/json"),
+            ("GET", "/package-1/1.0.0/json"),
+            ("HEAD", "/package-1/json"),
+            ("GET", "/package-1"),
+        )
+
+        self.assertEqual(len(project.json()["releases"]), 20)
+        self.assertEqual(project.json()["last_serial"], int(project.headers["X-PyPI-Last-Serial"]))
+        self.assertDictEqual(release.json(), {"info": {"version": "1.0.0", "license": "MIT"}})
+        self.assertEqual(head.headers["X-PyPI-Last-Serial"], project.headers["X-PyPI-Last-Serial"])
+        self.assertEqual(head.content, b"")
+        self.assertEqual(missing.status_code, 404)
+
+    def test_errors_and_throttling(self):
+        responses = self.request(FakeIndex(error_rate=1.0), ("GET", "/package-1/json"))
+        self.assertEqual(responses[0].status_code, 503)
+
+        responses = self.request(FakeIndex(rate_limit=2), *[("GET", "/package-1/json")] * 4)
+        self.assertListEqual([resp.status_code for resp in responses], [200, 200, 429, 429])
+        self.assertEqual(responses[-1].headers["Retry-After"], "1")
+
+    def test_latency_distribution(self):
+        latency = get_latency_distribution("lognormal", 0.05, 0.5)
+        latencies = [latency() for _ in range(1000)]
+
+        self.assertAlmostEqual(percentile(latencies, 0.5), 0.05, delta=0.005)
+        self.assertEqual(get_latency_distribution("fixed", 0.05)(), 0.05)
+        with self.assertRaises(ValueError):
+            get_latency_distribution("invalid")
+
+    def test_load_test(self):
+        """
+        Assures that the console pipeline is run against the index and measured
+        """
+        index = FakeIndex(releases=10)
+
+        async def run():
+            index_url = await index.start()
+            try:
+                return await run_load_test(index_url, packages=20)
+            finally:
+                await index.aclose()
+
+        result = asyncio.run(run())
+
+        self.assertEqual(result["packages"], 20)
+        self.assertEqual(result["client"]["requests"], result["index"]["requests"])
+        self.assertEqual(result["index"]["status_codes"], {"200": result["index"]["requests"]})
+        self.assertGreaterEqual(result["index"]["requests"], 20)
+        self.assertGreater(result["index"]["connections"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
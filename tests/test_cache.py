@@ -0,0 +1,153 @@
+#!/usr/bin/env python
+import asyncio
+import json
+import os
+import tempfile
+import time
+import unittest
+
+import httpx
+import respx
+
+from updatable import utils as updatable_utils
+from updatable.cache import DiskCache
+from updatable.client import Session
+
+URL = "https://pypi.org/pypi/updatable/json"
+PROJECT = {"info": {"version": "1.0.0", "license": "MIT"}, "releases": {}, "last_serial": None}
+RELEASE = {"info": {"version": "1.0.0", "license": "MIT"}}
+
+
+class TestDiskCache(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.cache = DiskCache(self.directory.name, ttl=60)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_store_and_load(self):
+        self.assertIsNone(self.cache.load(URL))
+
+        self.cache.store(URL, b'{"test": "ok"}', {"ETag": '"abc"', "Content-Length": "14"})
+        entry = self.cache.load(URL)
+
+        self.assertEqual(entry.content, b'{"test": "ok"}')
+        self.assertEqual(entry.headers, {"etag": '"abc"'})
+        self.assertTrue(entry.is_fresh(60))
+        self.assertEqual(entry.validation_headers(), {"If-None-Match": '"abc"'})
+        self.assertEqual(entry.to_response().json(), {"test": "ok"})
+
+    def test_corrupted_entry(self):
+        """
+        Assures that a corrupted entry is treated as missing
+        """
+        self.cache.store(URL, b"{}", {})
+        with open(self.cache._path(URL), "wb") as f:
+            f.write(b"garbage")
+
+        self.assertIsNone(self.cache.load(URL))
+
+    def test_evict_least_recently_used(self):
+        """
+        Assures that the least recently used entries are removed once the cache is full
+        """
+        content = os.urandom(4096)
+        self.cache.max_size = 10000
+
+        self.cache.store("https://pypi.org/pypi/a/json", content, {})
+        os.utime(self.cache._path("https://pypi.org/pypi/a/json"), (time.time() - 20, time.time() - 20))
+        self.cache.store("https://pypi.org/pypi/b/json", content, {})
+        os.utime(self.cache._path("https://pypi.org/pypi/b/json"), (time.time() - 10, time.time() - 10))
+        self.cache.store("https://pypi.org/pypi/c/json", content, {})
+
+        self.assertIsNone(self.cache.load("https://pypi.org/pypi/a/json"))
+        self.assertIsNotNone(self.cache.load("https://pypi.org/pypi/b/json"))
+        self.assertIsNotNone(self.cache.load("https://pypi.org/pypi/c/json"))
+
+    def test_other_files_are_kept(self):
+        """
+        Assures that files stored next to the responses, e.g. snapshots, are neither counted, evicted nor cleared
+        """
+        snapshot = os.path.join(self.directory.name, "snapshots", "ab", "snapshot.json")
+        os.makedirs(os.path.dirname(snapshot))
+        with open(snapshot, "wb") as f:
+            f.write(os.urandom(20000))
+
+        self.cache.max_size = 10000
+        self.cache.store(URL, b"{}", {})
+        self.assertIsNotNone(self.cache.load(URL))
+
+        self.cache.clear()
+        self.assertIsNone(self.cache.load(URL))
+        self.assertTrue(os.path.exists(snapshot))
+
+    @respx.mock
+    def test_session_uses_fresh_entry(self):
+        """
+        Assures that a fresh entry is used without a request
+        """
+        route = respx.get(URL).respond(status_code=200, json=PROJECT)
+
+        async def run():
+            async with Session(cache=self.cache) as session:
+                first = await updatable_utils.get_pypi_package_data("updatable", session=session)
+                second = await updatable_utils.get_pypi_package_data("updatable", session=session)
+                return first, second
+
+        self.assertEqual(asyncio.run(run()), (PROJECT, PROJECT))
+        self.assertEqual(route.call_count, 1)
+
+    @respx.mock
+    def test_session_revalidates_stale_entry(self):
+        """
+        Assures that a stale entry is revalidated with a conditional request
+        """
+        self.cache.store(URL, json.dumps(PROJECT).encode(), {"ETag": '"abc"'})
+        self.cache.ttl = 0
+
+        def respond(request):
+            if request.headers.get("If-None-Match") == '"abc"':
+                return httpx.Response(304)
+            return httpx.Response(200, json={**PROJECT, "info": {"version": "1.1.0", "license": "MIT"}})
+
+        route = respx.get(URL).mock(side_effect=respond)
+
+        async def run():
+            async with Session(cache=self.cache) as session:
+                return await updatable_utils.get_pypi_package_data("updatable", session=session)
+
+        self.assertEqual(asyncio.run(run()), PROJECT)
+        self.assertEqual(route.call_count, 1)
+
+    @respx.mock
+    def test_session_does_not_revalidate_release(self):
+        """
+        Assures that the immutable document of a release is never revalidated
+        """
+        url = "https://pypi.org/pypi/updatable/1.0.0/json"
+        self.cache.store(url, json.dumps(RELEASE).encode(), {})
+        self.cache.ttl = 0
+        route = respx.get(url).respond(status_code=200, json={"info": {"version": "1.0.0", "license": "BSD"}})
+
+        async def run():
+            async with Session(cache=self.cache) as session:
+                return await updatable_utils.get_pypi_package_data("updatable", "1.0.0", session=session)
+
+        self.assertEqual(asyncio.run(run()), RELEASE)
+        self.assertEqual(route.call_count, 0)
+
+    @respx.mock
+    def test_session_does_not_cache_errors(self):
+        respx.get(URL).respond(status_code=404)
+
+        async def run():
+            async with Session(cache=self.cache) as session:
+                return await updatable_utils.get_pypi_package_data("updatable", session=session)
+
+        self.assertIsNone(asyncio.run(run()))
+        self.assertIsNone(self.cache.load(URL))
+
+
+if __name__ == "__main__":
+    unittest.main()
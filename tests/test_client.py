@@ -0,0 +1,155 @@
+#!/usr/bin/env python
+import asyncio
+import unittest
+from importlib.util import find_spec
+
+import httpx
+import respx
+
+from updatable import utils as updatable_utils
+from updatable.client import Session
+
+PROJECT = {"info": {"version": "1.0.0", "license": "MIT"}, "releases": {}, "last_serial": None}
+
+
+class TestSession(unittest.TestCase):
+    def test_client_is_reused(self):
+        """
+        Assures that all requests of a session share the same connection pool
+        """
+
+        async def run():
+            async with Session() as session:
+                first = session.client
+                second = session.client
+                self.assertIs(first, second)
+            self.assertIsNone(session._client)
+
+        asyncio.run(run())
+
+    def test_host_semaphore(self):
+        """
+        Assures that requests are limited per host
+        """
+        session = Session(max_connections_per_host=3)
+        semaphore = session._host_semaphore("https://pypi.org/pypi/updatable/json")
+
+        self.assertIs(semaphore, session._host_semaphore("https://pypi.org/pypi/httpx/json"))
+        self.assertIsNot(semaphore, session._host_semaphore("https://mirror.example.com/pypi/httpx/json"))
+        self.assertEqual(semaphore._value, 3)
+
+    @respx.mock
+    def test_accept_encoding(self):
+        """
+        Assures that compressed responses are negotiated
+        """
+        route = respx.get("https://pypi.org/pypi/updatable/json").respond(status_code=200, json={})
+
+        async def run():
+            async with Session() as session:
+                await updatable_utils.get_pypi_package_data("updatable", session=session)
+
+        asyncio.run(run())
+        self.assertIn("gzip", route.calls.last.request.headers["Accept-Encoding"])
+
+        async def run_uncompressed():
+            async with Session(compression=False) as session:
+                await updatable_utils.get_pypi_package_data("updatable", session=session)
+
+        asyncio.run(run_uncompressed())
+        self.assertNotIn("br", route.calls.last.request.headers["Accept-Encoding"])
+
+    @respx.mock
+    def test_coalesce_concurrent_lookups(self):
+        """
+        Assures that concurrent lookups of the same project share one request, whatever the spelling of its name
+        """
+
+        async def respond(request):
+            await asyncio.sleep(0.01)
+            return httpx.Response(200, json=PROJECT)
+
+        route = respx.get("https://pypi.org/pypi/package-one/json").mock(side_effect=respond)
+
+        async def run():
+            async with Session() as session:
+                return await asyncio.gather(
+                    updatable_utils.get_pypi_package_data("package-one", session=session),
+                    updatable_utils.get_pypi_package_data("Package_One", session=session),
+                    updatable_utils.get_pypi_package_data("PACKAGE.ONE", session=session),
+                )
+
+        results = asyncio.run(run())
+        self.assertEqual(route.call_count, 1)
+        self.assertListEqual(results, [PROJECT] * 3)
+        self.assertIs(results[0], results[1])
+
+    def test_coalesce_survives_cancelled_caller(self):
+        """
+        Assures that a cancelled caller does not cancel the lookup of the others
+        """
+        calls = []
+
+        async def lookup():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return "result"
+
+        async def run():
+            session = Session()
+            first = asyncio.create_task(session.coalesce("key", lookup))
+            second = asyncio.create_task(session.coalesce("key", lookup))
+            await asyncio.sleep(0)
+            first.cancel()
+            result = await second
+            return result, session._in_flight
+
+        result, in_flight = asyncio.run(run())
+        self.assertEqual(result, "result")
+        self.assertEqual(len(calls), 1)
+        self.assertDictEqual(in_flight, {})
+
+    @respx.mock
+    def test_coalesce_cancels_abandoned_lookup(self):
+        """
+        Assures that the request of a lookup is cancelled once all of its callers are cancelled
+        """
+        cancelled = []
+
+        async def respond(request):
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.append(request.url.path)
+                raise
+            return httpx.Response(200, json=PROJECT)
+
+        respx.get("https://pypi.org/pypi/package-one/json").mock(side_effect=respond)
+
+        async def run():
+            async with Session() as session:
+                lookup = asyncio.create_task(updatable_utils.get_pypi_package_data("package-one", session=session))
+                await asyncio.sleep(0.01)
+                lookup.cancel()
+                await asyncio.gather(lookup, return_exceptions=True)
+
+                # Give the cancelled request a chance to unwind
+                await asyncio.sleep(0)
+                return session._in_flight, session._waiters
+
+        in_flight, waiters = asyncio.run(run())
+        self.assertListEqual(cancelled, ["/pypi/package-one/json"])
+        self.assertDictEqual(in_flight, {})
+        self.assertDictEqual(waiters, {})
+
+    @unittest.skipIf(find_spec("h2"), "h2 is installed")
+    def test_http2_without_h2(self):
+        """
+        Assures a RuntimeError is raised if HTTP/2 is requested without the h2 package
+        """
+        with self.assertRaises(RuntimeError):
+            Session(http2=True).open()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,137 @@
+#!/usr/bin/env python
+import asyncio
+import unittest
+
+import respx
+
+from updatable import utils as updatable_utils
+from updatable.client import Session
+from updatable.concurrency import AdaptiveLimiter
+
+
+class TestAdaptiveLimiter(unittest.TestCase):
+    def test_invalid_bounds(self):
+        with self.assertRaises(ValueError):
+            AdaptiveLimiter(min_limit=0)
+
+        with self.assertRaises(ValueError):
+            AdaptiveLimiter(min_limit=10, max_limit=5)
+
+    def test_initial_limit(self):
+        self.assertEqual(AdaptiveLimiter(min_limit=2, max_limit=10).limit, 6)
+        self.assertEqual(AdaptiveLimiter(min_limit=2, max_limit=10, initial_limit=50).limit, 10)
+
+    def test_additive_increase(self):
+        """
+        Assures that the limit grows on fast responses without exceeding the upper bound
+        """
+        limiter = AdaptiveLimiter(min_limit=1, max_limit=8, initial_limit=4)
+
+        limiter.record(0.1, 200)
+        self.assertAlmostEqual(limiter.limit, 4.25)
+
+        for _ in range(100):
+            limiter.record(0.1, 200)
+        self.assertEqual(limiter.limit, 8)
+
+    def test_multiplicative_decrease(self):
+        """
+        Assures that the limit shrinks on rate limiting and server errors without passing the lower bound
+        """
+        limiter = AdaptiveLimiter(min_limit=2, max_limit=16, initial_limit=16)
+
+        limiter.record(0.0, 429)
+        self.assertEqual(limiter.limit, 8)
+
+        limiter.record(0.0, 503)
+        self.assertEqual(limiter.limit, 4)
+
+        limiter.record_error()
+        limiter.record_error()
+        self.assertEqual(limiter.limit, 2)
+
+    def test_decrease_once_per_round_trip(self):
+        """
+        Assures that a burst of failures from the same round-trip only shrinks the limit once
+        """
+        limiter = AdaptiveLimiter(min_limit=1, max_limit=16, initial_limit=16)
+        limiter.record(60, 200)
+
+        limiter.record(0, 429)
+        limiter.record(0, 429)
+        self.assertEqual(limiter.limit, 8)
+
+    def test_large_download(self):
+        """
+        Assures that a slow response of a large document is not mistaken for an overload
+        """
+        limiter = AdaptiveLimiter(min_limit=1, max_limit=16, initial_limit=8, smoothing=1)
+        limiter.record(0.05, 200)
+        limit = limiter.limit
+
+        limiter.record(2.0, 200)
+        self.assertGreater(limiter.limit, limit)
+
+    def test_acquire_waits_for_free_slot(self):
+        """
+        Assures that no more requests than the limit are in flight
+        """
+
+        async def run():
+            limiter = AdaptiveLimiter(min_limit=1, max_limit=2, initial_limit=2)
+            peak = 0
+
+            async def request():
+                nonlocal peak
+                async with limiter:
+                    peak = max(peak, limiter.in_flight)
+                    await asyncio.sleep(0.01)
+
+            await asyncio.gather(*[request() for _ in range(10)])
+            return limiter, peak
+
+        limiter, peak = asyncio.run(run())
+        self.assertEqual(peak, 2)
+        self.assertEqual(limiter.in_flight, 0)
+
+    def test_cancelled_waiter(self):
+        """
+        Assures that a cancelled waiting request does not leak a slot
+        """
+
+        async def run():
+            limiter = AdaptiveLimiter(min_limit=1, max_limit=1)
+            await limiter.acquire()
+
+            waiting = asyncio.create_task(limiter.acquire())
+            await asyncio.sleep(0)
+            waiting.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await waiting
+
+            limiter.release()
+            return limiter
+
+        limiter = asyncio.run(run())
+        self.assertEqual(limiter.in_flight, 0)
+
+    @respx.mock
+    def test_session_feedback(self):
+        """
+        Assures that the session reports responses to the limiter
+        """
+        respx.get("https://pypi.org/pypi/updatable/json").respond(status_code=429)
+        limiter = AdaptiveLimiter(min_limit=1, max_limit=8, initial_limit=8)
+
+        async def run():
+            async with Session(limiter=limiter) as session:
+                return await updatable_utils.get_pypi_package_data("updatable", session=session)
+
+        with self.assertRaises(RuntimeError):
+            asyncio.run(run())
+        self.assertEqual(limiter.limit, 4)
+        self.assertEqual(limiter.in_flight, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
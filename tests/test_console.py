@@ -7,7 +7,15 @@ from io import StringIO
 from unittest.mock import patch
 
 from tests.utils import TEST_REQUIREMENTS_PATH, get_environment_requirements_list_monkey
-from updatable.console import _argument_parser, _list_package_updates, _list_updates, _str_to_bool, _updatable
+from updatable.console import (
+    _argument_parser,
+    _get_package_updates,
+    _list_updates,
+    _print_package_updates,
+    _str_to_bool,
+    _updatable,
+)
+from updatable.index import IndexRequestError
 
 
 class Capture(list):
@@ -197,28 +205,47 @@ class TestListPackageUpdates(unittest.TestCase):
                 "current_release_license": "MIT",
             }
 
+    async def _mock_get_package_update_list_delayed(self, *args, **kwargs):
+        # Earlier packages take longer, so they complete in reverse order
+        await asyncio.sleep({"package1": 0.03, "package2": 0.02, "package3": 0.01}.get(args[0], 0))
+        return await self._mock_get_package_update_list(*args, **kwargs)
+
     def _mock_argument_parser(*args, **kwargs):
-        class MockResult:
-            file = get_environment_requirements_list_monkey()
-            pre_releases = False
+        class ArgumentParserMock:
+            def parse_args(*args, **kwargs):
+                result = _argument_parser().parse_args([])
+                result.file = get_environment_requirements_list_monkey()
+                return result
+
+        return ArgumentParserMock()
 
+    def _mock_argument_parser_sorted(*args, **kwargs):
         class ArgumentParserMock:
             def parse_args(*args, **kwargs):
-                return MockResult()
+                result = _argument_parser().parse_args(["--sorted"])
+                result.file = get_environment_requirements_list_monkey()
+                return result
 
         return ArgumentParserMock()
 
+    def _list_package_updates(self, package_name, version, show_pre_releases):
+        async def run():
+            updates = await _get_package_updates(package_name, version, show_pre_releases)
+            _print_package_updates(package_name, version, updates, show_pre_releases)
+
+        asyncio.run(run())
+
     def test_with_no_available_updates(self):
         with patch(
             "updatable.utils.get_package_update_list",
             side_effect=self._mock_get_package_update_list,
         ):
             with Capture() as output:
-                asyncio.run(_list_package_updates("package1", "1.0.0", False))
+                self._list_package_updates("package1", "1.0.0", False)
             self.assertListEqual(output, [])
 
             with Capture() as output:
-                asyncio.run(_list_package_updates("package1", "1.0.0", True))
+                self._list_package_updates("package1", "1.0.0", True)
             self.assertListEqual(output, [])
 
     def test_with_updates_and_no_prereleases(self):
@@ -227,7 +254,7 @@ class TestListPackageUpdates(unittest.TestCase):
             side_effect=self._mock_get_package_update_list,
         ):
             with Capture() as output:
-                asyncio.run(_list_package_updates("package2", "1.0.0", False))
+                self._list_package_updates("package2", "1.0.0", False)
             self.assertListEqual(
                 output,
                 [
@@ -245,7 +272,7 @@ class TestListPackageUpdates(unittest.TestCase):
             )
 
             with Capture() as output:
-                asyncio.run(_list_package_updates("package2", "1.0.0", True))
+                self._list_package_updates("package2", "1.0.0", True)
             self.assertListEqual(
                 output,
                 [
@@ -268,7 +295,7 @@ class TestListPackageUpdates(unittest.TestCase):
             side_effect=self._mock_get_package_update_list,
         ):
             with Capture() as output:
-                asyncio.run(_list_package_updates("package3", "1.0.0", False))
+                self._list_package_updates("package3", "1.0.0", False)
             self.assertListEqual(
                 output,
                 [
@@ -282,7 +309,7 @@ class TestListPackageUpdates(unittest.TestCase):
             )
 
             with Capture() as output:
-                asyncio.run(_list_package_updates("package3", "1.0.0", True))
+                self._list_package_updates("package3", "1.0.0", True)
             self.assertListEqual(
                 output,
                 [
@@ -301,7 +328,7 @@ class TestListPackageUpdates(unittest.TestCase):
             side_effect=self._mock_get_package_update_list,
         ):
             with Capture() as output:
-                asyncio.run(_list_package_updates("package4", "1.0.0", False))
+                self._list_package_updates("package4", "1.0.0", False)
             self.assertListEqual(
                 output,
                 [
@@ -315,7 +342,7 @@ class TestListPackageUpdates(unittest.TestCase):
             )
 
             with Capture() as output:
-                asyncio.run(_list_package_updates("package4", "1.0.0", True))
+                self._list_package_updates("package4", "1.0.0", True)
             self.assertListEqual(
                 output,
                 [
@@ -336,11 +363,11 @@ class TestListPackageUpdates(unittest.TestCase):
             side_effect=self._mock_get_package_update_list,
         ):
             with Capture() as output:
-                asyncio.run(_list_package_updates("package5", "1.0.0", False))
+                self._list_package_updates("package5", "1.0.0", False)
             self.assertListEqual(output, [])
 
             with Capture() as output:
-                asyncio.run(_list_package_updates("package5", "1.0.0", True))
+                self._list_package_updates("package5", "1.0.0", True)
             self.assertListEqual(
                 output,
                 [
@@ -357,11 +384,11 @@ class TestListPackageUpdates(unittest.TestCase):
             side_effect=self._mock_get_package_update_list,
         ):
             with Capture() as output:
-                asyncio.run(_list_package_updates("package6", "1.0.0", False))
+                self._list_package_updates("package6", "1.0.0", False)
             self.assertListEqual(output, [])
 
             with Capture() as output:
-                asyncio.run(_list_package_updates("package6", "1.0.0", True))
+                self._list_package_updates("package6", "1.0.0", True)
             self.assertListEqual(
                 output,
                 [
@@ -378,11 +405,11 @@ class TestListPackageUpdates(unittest.TestCase):
             side_effect=self._mock_get_package_update_list,
         ):
             with Capture() as output:
-                asyncio.run(_list_package_updates("package7", "1.0.0", False))
+                self._list_package_updates("package7", "1.0.0", False)
             self.assertListEqual(output, [])
 
             with Capture() as output:
-                asyncio.run(_list_package_updates("package7", "1.0.0", True))
+                self._list_package_updates("package7", "1.0.0", True)
             self.assertListEqual(output, [])
 
     def test_updatable_call(self):
@@ -422,6 +449,172 @@ class TestListPackageUpdates(unittest.TestCase):
                     ],
                 )
 
+    def test_updatable_call_resolves_displayed_updates(self):
+        """
+        Test that the current release document is only requested for packages whose updates are displayed
+        """
+        resolved = []
+
+        async def get_package_update_list_lazy(*args, **kwargs):
+            updates = dict(await self._mock_get_package_update_list(*args, **kwargs))
+            updates["current_release_license"] = None
+            return updates
+
+        async def resolve_current_release(updates, package_name, version, session=None):
+            resolved.append(package_name)
+            updates["current_release_license"] = "MIT"
+            return updates
+
+        with patch("updatable.console._argument_parser", side_effect=self._mock_argument_parser):
+            with patch("updatable.utils.get_package_update_list", side_effect=get_package_update_list_lazy):
+                with patch("updatable.utils.resolve_current_release", side_effect=resolve_current_release):
+                    with Capture() as output:
+                        asyncio.run(_updatable())
+
+        self.assertListEqual(sorted(resolved), ["package2", "package3", "package4"])
+        self.assertIn("package2 (1.0) - License: MIT", output)
+
+    def test_updatable_call_streams_results(self):
+        with patch("updatable.console._argument_parser", side_effect=self._mock_argument_parser):
+            with patch(
+                "updatable.utils.get_package_update_list",
+                side_effect=self._mock_get_package_update_list_delayed,
+            ):
+                with Capture() as output:
+                    asyncio.run(_updatable())
+
+                headlines = [line for line in output if not line.startswith(" ") and line != "___"]
+                self.assertListEqual(
+                    headlines,
+                    [
+                        "package4 (2.4) - License: MIT",
+                        "package3 (2) - License: MIT",
+                        "package2 (1.0) - License: MIT",
+                    ],
+                )
+
+    def test_updatable_call_deadline(self):
+        """
+        Test that packages that did not finish before the deadline are printed as timed out and fail the run at the end
+        """
+
+        async def get_package_update_list_stalled(*args, **kwargs):
+            if args[0] == "package2":
+                await asyncio.sleep(10)
+            return await self._mock_get_package_update_list(*args, **kwargs)
+
+        def argument_parser(*args, **kwargs):
+            class ArgumentParserMock:
+                def parse_args(*args, **kwargs):
+                    result = _argument_parser().parse_args(["--deadline", "0.1"])
+                    result.file = get_environment_requirements_list_monkey()
+                    return result
+
+            return ArgumentParserMock()
+
+        with patch("updatable.console._argument_parser", side_effect=argument_parser):
+            with patch("updatable.utils.get_package_update_list", side_effect=get_package_update_list_stalled):
+                with Capture() as output:
+                    self.assertEqual(asyncio.run(_updatable()), 3)
+
+        self.assertListEqual(output[-2:], ["package2 (1.0) - Timed out", "___"])
+        self.assertIn("package3 (2) - License: MIT", output)
+
+    def test_updatable_call_failed_lookup(self):
+        """
+        Test that a package whose requests to the index failed is printed as failed and fails the run at the end
+        """
+
+        async def get_package_update_list_failing(*args, **kwargs):
+            if args[0] == "package2":
+                raise IndexRequestError("Index error 503: https://pypi.org/pypi/package2/json")
+            return await self._mock_get_package_update_list(*args, **kwargs)
+
+        with patch("updatable.console._argument_parser", side_effect=self._mock_argument_parser):
+            with patch("updatable.utils.get_package_update_list", side_effect=get_package_update_list_failing):
+                with Capture() as output:
+                    self.assertEqual(asyncio.run(_updatable()), 3)
+
+        self.assertIn("package2 (1.0) - Failed: Index error 503: https://pypi.org/pypi/package2/json", output)
+        self.assertIn("package3 (2) - License: MIT", output)
+
+    def test_updatable_call_fail_on(self):
+        """
+        Test that the gate mode only prints the first qualifying package and returns the exit code
+        """
+
+        def argument_parser(fail_on):
+            class ArgumentParserMock:
+                def parse_args(*args, **kwargs):
+                    result = _argument_parser().parse_args(["--fail-on", fail_on, "--cache", "no"])
+                    result.file = get_environment_requirements_list_monkey()
+                    return result
+
+            return lambda *args, **kwargs: ArgumentParserMock()
+
+        for fail_on, exit_code in (("major", 1), ("any", 1)):
+            with patch("updatable.console._argument_parser", side_effect=argument_parser(fail_on)):
+                with patch("updatable.utils.get_package_update_list", side_effect=self._mock_get_package_update_list):
+                    with Capture() as output:
+                        self.assertEqual(asyncio.run(_updatable()), exit_code)
+
+            self.assertEqual(output.count("___"), 1)
+
+        async def get_package_update_list_current(*args, **kwargs):
+            return await self._mock_get_package_update_list("package1")
+
+        with patch("updatable.console._argument_parser", side_effect=argument_parser("major")):
+            with patch("updatable.utils.get_package_update_list", side_effect=get_package_update_list_current):
+                with Capture() as output:
+                    self.assertEqual(asyncio.run(_updatable()), 0)
+
+        self.assertListEqual(output, [])
+
+    def test_updatable_call_print_failure_cancels_lookups(self):
+        """
+        Test that the pending lookups are cancelled as soon as printing a result fails, e.g. on a closed pipe
+        """
+        cancelled = []
+
+        async def get_package_update_list_stalled(*args, **kwargs):
+            if args[0] != "package1":
+                try:
+                    await asyncio.sleep(10)
+                except asyncio.CancelledError:
+                    cancelled.append(args[0])
+                    raise
+            return await self._mock_get_package_update_list("package2")
+
+        async def run():
+            try:
+                await _updatable()
+            except BrokenPipeError:
+                return sorted(cancelled)
+
+        with patch("updatable.console._argument_parser", side_effect=self._mock_argument_parser_sorted):
+            with patch("updatable.utils.get_package_update_list", side_effect=get_package_update_list_stalled):
+                with patch("updatable.console._print_package_updates", side_effect=BrokenPipeError):
+                    self.assertListEqual(asyncio.run(run()), ["package2", "package3", "package4", "package5"])
+
+    def test_updatable_call_sorted(self):
+        with patch("updatable.console._argument_parser", side_effect=self._mock_argument_parser_sorted):
+            with patch(
+                "updatable.utils.get_package_update_list",
+                side_effect=self._mock_get_package_update_list_delayed,
+            ):
+                with Capture() as output:
+                    asyncio.run(_updatable())
+
+                headlines = [line for line in output if not line.startswith(" ") and line != "___"]
+                self.assertListEqual(
+                    headlines,
+                    [
+                        "package2 (1.0) - License: MIT",
+                        "package3 (2) - License: MIT",
+                        "package4 (2.4) - License: MIT",
+                    ],
+                )
+
 
 class TestArgumentParser(unittest.TestCase):
     def setUp(self):
@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+import json
+import os
+import unittest
+from unittest.mock import patch
+
+from updatable import decode as updatable_decode
+from updatable.decode import JSON_DECODERS, decode_project, decode_release, is_decoder_available
+
+PATH = os.path.dirname(os.path.realpath(__file__))
+
+FILE = {
+    "filename": "package-1.0.0-py3-none-any.whl",
+    "upload_time": "2020-01-01T10:00:00",
+    "digests": {"sha256": "0" * 64},
+    "url": "https://files.example.com/package-1.0.0-py3-none-any.whl",
+}
+
+
+def _read_fixture(name):
+    with open(os.path.join(PATH, "fixtures", name), "rb") as f:
+        return f.read()
+
+
+class TestDecode(unittest.TestCase):
+    def _decoders(self):
+        return [name for name in JSON_DECODERS if is_decoder_available(name)]
+
+    def test_decode_project(self):
+        content = json.dumps(
+            {
+                "info": {"version": "1.1.0", "license": "MIT", "description": "A long description"},
+                "releases": {
+                    "1.0.0": [FILE, {**FILE, "upload_time": "2020-01-02T10:00:00"}],
+                    "1.1.0": [],
+                },
+                "urls": [FILE],
+                "last_serial": 1234,
+            },
+        ).encode()
+
+        for decoder in self._decoders():
+            with self.subTest(decoder=decoder):
+                self.assertDictEqual(
+                    decode_project(content, decoder),
+                    {
+                        "info": {"version": "1.1.0", "license": "MIT"},
+                        "releases": {"1.0.0": [{"upload_time": "2020-01-01T10:00:00"}], "1.1.0": []},
+                        "last_serial": 1234,
+                    },
+                )
+
+    def test_decode_project_fixtures(self):
+        """
+        Assures that all decoders agree on real documents
+        """
+        for fixture in ["pypi-package1.json", "pypi-package3.json", "pypi-package6.json"]:
+            content = _read_fixture(fixture)
+            expected = decode_project(content, "json")
+
+            self.assertEqual(len(expected["releases"]), len(json.loads(content)["releases"]))
+            for decoder in self._decoders():
+                with self.subTest(fixture=fixture, decoder=decoder):
+                    self.assertDictEqual(decode_project(content, decoder), expected)
+
+    def test_decode_release(self):
+        content = _read_fixture("pypi-package3-1.0.0.json")
+        info = json.loads(content)["info"]
+
+        for decoder in self._decoders():
+            with self.subTest(decoder=decoder):
+                self.assertDictEqual(
+                    decode_release(content, decoder),
+                    {"info": {"version": info["version"], "license": info["license"]}},
+                )
+
+    def test_unknown_decoder(self):
+        with self.assertRaises(ValueError):
+            decode_project(b"{}", "unknown")
+
+    def test_unavailable_decoder(self):
+        with patch.object(updatable_decode, "find_spec", return_value=None):
+            self.assertFalse(is_decoder_available("orjson"))
+            self.assertTrue(is_decoder_available("json"))
+            self.assertEqual(updatable_decode.get_default_decoder(), "json")
+
+            with self.assertRaises(RuntimeError):
+                decode_project(b"{}", "stream")
+
+
+if __name__ == "__main__":
+    unittest.main()
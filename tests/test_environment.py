@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+import json
+import os
+import sys
+import tempfile
+import unittest
+from subprocess import check_output
+from unittest.mock import patch
+
+from updatable.environment import scan_environment
+
+
+class TestScanEnvironment(unittest.TestCase):
+    def setUp(self):
+        self.site_packages = tempfile.TemporaryDirectory()
+        self.cache_directory = tempfile.TemporaryDirectory()
+
+        self.install("package1", "1.0.0")
+        self.install("Package2", "2.1")
+        self.install("pip", "24.0")
+        self.install("editable-package", "0.1", direct_url={"url": "file:///src", "dir_info": {"editable": True}})
+        self.install("local-package", "0.2", direct_url={"url": "file:///src/local", "dir_info": {}})
+        self.install(
+            "vcs-package",
+            "0.3",
+            direct_url={"url": "https://github.com/example/vcs-package", "vcs_info": {"vcs": "git", "commit_id": "1"}},
+        )
+        self.install("wheel-package", "0.4", direct_url={"url": "file:///wheel_package-0.4-py3-none-any.whl"})
+
+    def tearDown(self):
+        self.site_packages.cleanup()
+        self.cache_directory.cleanup()
+
+    def install(self, name, version, direct_url=None):
+        """
+        Create the metadata directory of a distribution
+
+        :param name: string
+        :param version: string
+        :param direct_url: dict
+        """
+        dist_info = os.path.join(self.site_packages.name, f"{name.replace('-', '_')}-{version}.dist-info")
+        os.makedirs(dist_info)
+
+        with open(os.path.join(dist_info, "METADATA"), "w") as f:
+            f.write(f"Metadata-Version: 2.1\nName: {name}\nVersion: {version}\n")
+
+        if direct_url:
+            with open(os.path.join(dist_info, "direct_url.json"), "w") as f:
+                json.dump(direct_url, f)
+
+    def scan(self):
+        return scan_environment([self.site_packages.name], cache_directory=self.cache_directory.name)
+
+    def test_scan_environment(self):
+        """
+        Assures that installed distributions are listed like `pip freeze` does
+        """
+        self.assertListEqual(self.scan(), ["package1==1.0.0", "Package2==2.1"])
+
+    def test_scan_environment_skips_direct_urls(self):
+        """
+        Assures that distributions installed from a url are skipped, `pip freeze` lists them as `name @ url`
+        """
+        requirements = scan_environment([self.site_packages.name], cache=False)
+
+        for name in ("editable-package", "local-package", "vcs-package", "wheel-package"):
+            self.assertFalse([requirement for requirement in requirements if requirement.startswith(name)])
+
+    def test_scan_environment_uses_cache(self):
+        """
+        Assures that a stored scan is used as long as the environment does not change
+        """
+        self.scan()
+
+        with patch("updatable.environment._scan_distributions") as mock:
+            self.assertListEqual(self.scan(), ["package1==1.0.0", "Package2==2.1"])
+            self.assertFalse(mock.called)
+
+    def test_scan_environment_invalidates_cache(self):
+        """
+        Assures that installing a distribution invalidates the stored scan
+        """
+        self.scan()
+        self.install("package3", "3.0.0")
+
+        # Make sure the modification time changes on file systems with a coarse resolution
+        stat = os.stat(self.site_packages.name)
+        os.utime(self.site_packages.name, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+        self.assertListEqual(self.scan(), ["package1==1.0.0", "Package2==2.1", "package3==3.0.0"])
+
+    def test_scan_environment_without_cache(self):
+        scan_environment([self.site_packages.name], cache=False, cache_directory=self.cache_directory.name)
+        self.assertListEqual(os.listdir(self.cache_directory.name), [])
+
+    def test_scan_current_environment(self):
+        """
+        Assures that the scan of the current environment matches `pip freeze`
+        """
+        freeze = check_output([sys.executable, "-m", "pip", "freeze"]).decode("utf-8").splitlines()
+        freeze = [requirement for requirement in freeze if "==" in requirement]
+
+        self.assertListEqual(sorted(scan_environment(cache=False)), sorted(freeze))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+import asyncio
+import unittest
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from unittest.mock import patch
+
+from updatable import executor as updatable_executor
+from updatable import utils as updatable_utils
+from updatable.client import Session
+from updatable.executor import create_executor
+
+PROJECT = {
+    "info": {"version": "1.299.0", "license": "MIT"},
+    "releases": {f"1.{minor}.0": [{"upload_time": "2020-01-01T10:00:00"}] for minor in range(300)},
+    "last_serial": None,
+}
+
+
+class TestCreateExecutor(unittest.TestCase):
+    def test_create_executor(self):
+        with create_executor("thread", workers=2) as executor:
+            self.assertIsInstance(executor, ThreadPoolExecutor)
+        self.assertIsNone(create_executor("none"))
+
+        with self.assertRaises(ValueError):
+            create_executor("unknown")
+        with self.assertRaises(ValueError):
+            create_executor("thread", workers=0)
+
+    def test_auto(self):
+        """
+        Assures that threads are only used if they run in parallel
+        """
+        with patch.object(updatable_executor, "is_free_threaded", return_value=False):
+            self.assertIsNone(create_executor("auto"))
+
+        with patch.object(updatable_executor, "is_free_threaded", return_value=True):
+            with create_executor("auto", workers=2) as executor:
+                self.assertIsInstance(executor, ThreadPoolExecutor)
+
+
+class TestRunInExecutor(unittest.TestCase):
+    def _get_update_lists(self, executor):
+        async def run():
+            async with Session(executor=executor) as session:
+                with patch.object(updatable_utils, "get_pypi_package_data", return_value=PROJECT):
+                    return await updatable_utils.get_package_update_lists(
+                        "package1",
+                        ["1.0.0", "1.299.0"],
+                        session=session,
+                        lazy=True,
+                    )
+
+        return asyncio.run(run())
+
+    def test_categorize_in_executor(self):
+        """
+        Assures that large projects are categorized in the executor with the same result
+        """
+        expected = self._get_update_lists(None)
+        self.assertEqual(len(expected["1.0.0"]["minor_updates"]), 299)
+
+        for executor_class in (ThreadPoolExecutor, ProcessPoolExecutor):
+            with self.subTest(executor=executor_class.__name__):
+                with executor_class(max_workers=1) as executor:
+                    with patch.object(executor, "submit", wraps=executor.submit) as submit:
+                        self.assertDictEqual(self._get_update_lists(executor), expected)
+                    self.assertEqual(submit.call_count, 1)
+
+    def test_small_project_on_event_loop(self):
+        executor = ThreadPoolExecutor(max_workers=1)
+        self.addCleanup(executor.shutdown)
+        small = {**PROJECT, "releases": dict(list(PROJECT["releases"].items())[:10])}
+
+        async def run():
+            async with Session(executor=executor) as session:
+                with patch.object(updatable_utils, "get_pypi_package_data", return_value=small):
+                    return await updatable_utils.get_package_update_list("package1", "1.0.0", session=session)
+
+        with patch.object(executor, "submit") as submit:
+            updates = asyncio.run(run())
+
+        submit.assert_not_called()
+        self.assertEqual(updates["newer_releases"], 9)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from tests.test_console import Capture
+from updatable import fleet as updatable_fleet
+from updatable.console import _updatable_fleet
+
+PATH = os.path.dirname(os.path.realpath(__file__))
+
+
+class TestFleet(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.requested = []
+
+        self.service_a = self.write_requirements("service-a", ["package1==1.0.0", "package2==1.0.0"])
+        self.service_b = self.write_requirements("service-b", ["Package1==1.0.0", "package2==1.3.0"])
+        self.service_c = self.write_requirements("service-c", ["package_1==1.0.1 # comment"])
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write_requirements(self, service, requirements):
+        os.makedirs(os.path.join(self.directory.name, service))
+        path = os.path.join(self.directory.name, service, "requirements.txt")
+
+        with open(path, "w") as f:
+            f.write("\n".join(requirements))
+
+        return path
+
+    async def get_pypi_package_data_monkey(self, package_name, version=None, session=None):
+        self.requested.append((package_name, version))
+        json_file = f"pypi-{package_name.replace('-', '')}.json"
+
+        with open(os.path.join(PATH, "fixtures", json_file)) as data_file:
+            return json.load(data_file)
+
+    def test_expand_sources(self):
+        sources = updatable_fleet.expand_sources(
+            [os.path.join(self.directory.name, "*", "requirements.txt"), self.service_a, "missing.txt"],
+        )
+        self.assertListEqual(sources, [self.service_a, self.service_b, self.service_c, "missing.txt"])
+
+    def test_get_source_packages_of_interpreter(self):
+        """
+        Assures that the environment of an interpreter is scanned
+        """
+        packages = updatable_fleet.get_source_packages(sys.executable, cache=False)
+        self.assertIn("semantic-version", [package["package"] for package in packages])
+
+    def test_get_pinned_versions(self):
+        fleet_packages = updatable_fleet.get_fleet_packages([self.service_a, self.service_b, self.service_c])
+
+        self.assertDictEqual(
+            updatable_fleet.get_pinned_versions(fleet_packages),
+            {
+                "package1": {"1.0.0": [self.service_a, self.service_b]},
+                "package-1": {"1.0.1": [self.service_c]},
+                "package2": {"1.0.0": [self.service_a], "1.3.0": [self.service_b]},
+            },
+        )
+
+    def test_get_fleet_updates(self):
+        """
+        Assures that every project is requested once for all sources
+        """
+        fleet_packages = updatable_fleet.get_fleet_packages([self.service_a, self.service_b])
+
+        with patch("updatable.utils.get_pypi_package_data", side_effect=self.get_pypi_package_data_monkey):
+            fleet_updates = asyncio.run(updatable_fleet.get_fleet_updates(fleet_packages, lazy=True))
+
+        self.assertListEqual(sorted(self.requested), [("package1", None), ("package2", None)])
+        self.assertEqual(fleet_updates[("package1", "1.0.0")]["newer_releases"], 2)
+        self.assertEqual(fleet_updates[("package2", "1.0.0")]["newer_releases"], 3)
+        self.assertEqual(fleet_updates[("package2", "1.3.0")]["newer_releases"], 0)
+
+    def test_console_fleet_report(self):
+        fleet_packages = updatable_fleet.get_fleet_packages([self.service_a, self.service_b, self.service_c])
+
+        with patch("updatable.utils.get_pypi_package_data", side_effect=self.get_pypi_package_data_monkey):
+            with Capture() as output:
+                asyncio.run(_updatable_fleet(fleet_packages))
+
+        self.assertEqual(output[0], f"== {self.service_a} ==")
+        self.assertIn(f"== {self.service_b} ==", output)
+        self.assertListEqual(
+            output[output.index("== Pinned versions ==") :],
+            [
+                "== Pinned versions ==",
+                "package-1 - Latest: 1.0.2",
+                f"  -- 1.0.1 (outdated): {self.service_c}",
+                "___",
+                "package1 - Latest: 1.0.2",
+                f"  -- 1.0.0 (outdated): {self.service_a}, {self.service_b}",
+                "___",
+                "package2 - Latest: 1.3.0",
+                f"  -- 1.0.0 (outdated): {self.service_a}",
+                f"  -- 1.3.0: {self.service_b}",
+                "___",
+            ],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,201 @@
+#!/usr/bin/env python
+import asyncio
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import respx
+
+from updatable.client import Session
+from updatable.concurrency import AdaptiveLimiter
+from updatable.gate import GateHistory, find_qualifying_update, get_update_level, is_qualifying_update
+from updatable.index import IndexRequestError
+
+PACKAGES = [
+    {"package": "package1", "version": "1.0.0"},
+    {"package": "package2", "version": "1.0.0"},
+    {"package": "Package_3", "version": "1.0.0"},
+]
+
+OUTDATED_PROJECT = {
+    "info": {"version": "2.0.0", "license": "MIT"},
+    "releases": {"1.0.0": [{"upload_time": "2020-01-01T10:00:00"}], "2.0.0": [{"upload_time": "2021-01-01T10:00:00"}]},
+    "last_serial": 1,
+}
+
+
+def _updates(major=(), minor=(), patch=(), pre=()):
+    return {
+        "current_release": None,
+        "current_release_license": None,
+        "latest_release": "",
+        "latest_release_license": "",
+        "newer_releases": len(major) + len(minor) + len(patch),
+        "pre_releases": len(pre),
+        "major_updates": [{"version": version, "upload_time": None} for version in major],
+        "minor_updates": [{"version": version, "upload_time": None} for version in minor],
+        "patch_updates": [{"version": version, "upload_time": None} for version in patch],
+        "pre_release_updates": [{"version": version, "upload_time": None} for version in pre],
+        "non_semantic_versions": [],
+    }
+
+
+class TestUpdateLevel(unittest.TestCase):
+    def test_get_update_level(self):
+        self.assertEqual(get_update_level(_updates(major=["2.0.0"], patch=["1.0.1"])), "major")
+        self.assertEqual(get_update_level(_updates(minor=["1.1.0"])), "minor")
+        self.assertEqual(get_update_level(_updates(patch=["1.0.1"])), "patch")
+        self.assertIsNone(get_update_level(_updates(pre=["2.0.0a1"])))
+        self.assertEqual(get_update_level(_updates(pre=["2.0.0a1"]), pre_releases=True), "any")
+        self.assertIsNone(get_update_level(_updates()))
+
+    def test_is_qualifying_update(self):
+        self.assertTrue(is_qualifying_update("major", "minor"))
+        self.assertTrue(is_qualifying_update("minor", "minor"))
+        self.assertFalse(is_qualifying_update("patch", "minor"))
+        self.assertTrue(is_qualifying_update("any", "any"))
+        self.assertFalse(is_qualifying_update(None, "any"))
+
+
+class TestGateHistory(unittest.TestCase):
+    def test_order_and_persist(self):
+        with tempfile.TemporaryDirectory() as directory:
+            history = GateHistory(directory)
+            self.assertListEqual(history.order(PACKAGES, "any"), PACKAGES)
+
+            history.record("package-3", "major")
+            history.record("package2", "patch")
+            history.record("package1", None)
+            history.save()
+
+            history = GateHistory(directory)
+            self.assertListEqual(history.order(PACKAGES, "major"), [PACKAGES[2], PACKAGES[0], PACKAGES[1]])
+            self.assertListEqual(history.order(PACKAGES, "patch"), [PACKAGES[1], PACKAGES[2], PACKAGES[0]])
+
+            history.record("Package_3", None)
+            self.assertDictEqual(history.levels, {"package2": "patch"})
+
+    def test_corrupted(self):
+        with tempfile.TemporaryDirectory() as directory:
+            history = GateHistory(directory)
+            with open(history.path, "w") as f:
+                f.write("{")
+
+            self.assertDictEqual(GateHistory(directory).levels, {})
+
+
+class TestFindQualifyingUpdate(unittest.TestCase):
+    def _find(self, get_package_update_list, fail_on, **kwargs):
+        async def run():
+            async with Session() as session:
+                return await find_qualifying_update(PACKAGES, fail_on, session=session, **kwargs)
+
+        with patch("updatable.utils.get_package_update_list", side_effect=get_package_update_list):
+            return asyncio.run(run())
+
+    def test_early_exit(self):
+        """
+        Assures that the remaining lookups are cancelled once a qualifying update is found
+        """
+        cancelled = []
+
+        async def get_package_update_list(package_name, version, **kwargs):
+            if package_name == "package2":
+                return _updates(major=["2.0.0"])
+
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.append(package_name)
+                raise
+
+        found, unfinished = self._find(get_package_update_list, "major")
+
+        self.assertEqual(found[0], PACKAGES[1])
+        self.assertListEqual(unfinished, [])
+        self.assertListEqual(sorted(cancelled), ["Package_3", "package1"])
+
+    @respx.mock
+    def test_early_exit_cancels_requests(self):
+        """
+        Assures that the requests of the remaining lookups are cancelled and release their slots on early exit
+        """
+        cancelled = []
+
+        async def slow(request):
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.append(request.url.path)
+                raise
+
+        respx.get("https://pypi.org/pypi/package2/json").respond(json=OUTDATED_PROJECT)
+        respx.get(url__regex=r"https://pypi\.org/pypi/(package1|package-3)/json").mock(side_effect=slow)
+        limiter = AdaptiveLimiter(min_limit=3, max_limit=3)
+
+        async def run():
+            async with Session(limiter=limiter) as session:
+                found, _unfinished = await find_qualifying_update(PACKAGES, "major", session=session)
+                return found, limiter.in_flight, dict(session._in_flight)
+
+        found, in_flight, lookups = asyncio.run(run())
+        self.assertEqual(found[0], PACKAGES[1])
+        self.assertListEqual(sorted(cancelled), ["/pypi/package-3/json", "/pypi/package1/json"])
+        self.assertEqual(in_flight, 0)
+        self.assertDictEqual(lookups, {})
+
+    def test_no_qualifying_update(self):
+        async def get_package_update_list(package_name, version, **kwargs):
+            if package_name == "package1":
+                return _updates(patch=["1.0.1"])
+            if package_name == "package2":
+                await asyncio.sleep(10)
+            return _updates(pre=["2.0.0a1"])
+
+        found, unfinished = self._find(get_package_update_list, "minor", deadline=0.1)
+        self.assertIsNone(found)
+        self.assertListEqual(unfinished, [(PACKAGES[1], None)])
+
+    def test_failed_lookup(self):
+        """
+        Assures that a failed lookup leaves the gate incomplete without failing the other lookups
+        """
+        error = IndexRequestError("Index error 503")
+
+        async def get_package_update_list(package_name, version, **kwargs):
+            if package_name == "package1":
+                raise error
+            return _updates(patch=["1.0.1"])
+
+        found, unfinished = self._find(get_package_update_list, "minor")
+        self.assertIsNone(found)
+        self.assertListEqual(unfinished, [(PACKAGES[0], error)])
+
+    def test_history(self):
+        """
+        Assures that previously outdated packages are looked up first and the levels seen are recorded
+        """
+        started = []
+
+        async def get_package_update_list(package_name, version, **kwargs):
+            started.append(package_name)
+            return _updates(minor=["1.1.0"]) if package_name == "Package_3" else _updates()
+
+        with tempfile.TemporaryDirectory() as directory:
+            history = GateHistory(directory)
+            history.record("package1", "major")
+            history.record("package-3", "minor")
+
+            found, _timed_out = self._find(get_package_update_list, "minor", history=history)
+
+        self.assertEqual(started[:2], ["package1", "Package_3"])
+        self.assertEqual(found[0], PACKAGES[2])
+        self.assertDictEqual(history.levels, {"package-3": "minor"})
+
+    def test_invalid_level(self):
+        with self.assertRaises(ValueError):
+            asyncio.run(find_qualifying_update(PACKAGES, "critical"))
+
+
+if __name__ == "__main__":
+    unittest.main()
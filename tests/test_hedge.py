@@ -0,0 +1,154 @@
+#!/usr/bin/env python
+import asyncio
+import unittest
+
+import httpx
+import respx
+
+from updatable import utils as updatable_utils
+from updatable.client import Session
+from updatable.hedge import HedgePolicy
+
+PROJECT = {
+    "info": {"version": "1.0.0", "license": "MIT"},
+    "releases": {"1.0.0": [{"upload_time": "2020-01-01T10:00:00"}]},
+    "last_serial": 1,
+}
+
+
+def _trained_policy(**kwargs):
+    """
+    Returns a policy that hedges requests slower than 10 milliseconds
+
+    :return: HedgePolicy
+    """
+    policy = HedgePolicy(max_ratio=1, min_samples=10, **kwargs)
+    for _ in range(10):
+        policy.record(0.01)
+
+    return policy
+
+
+async def _answer(result, delay=0.0, error=None):
+    await asyncio.sleep(delay)
+    if error is not None:
+        raise error
+    return result
+
+
+class TestHedgePolicy(unittest.TestCase):
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            HedgePolicy(percentile=100)
+        with self.assertRaises(ValueError):
+            HedgePolicy(max_ratio=1.5)
+
+    def test_get_url(self):
+        policy = HedgePolicy(mirror_url="https://mirror.example.com/pypi/")
+
+        self.assertEqual(
+            policy.get_url("https://pypi.org/pypi/updatable/json", "https://pypi.org/pypi"),
+            "https://mirror.example.com/pypi/updatable/json",
+        )
+        self.assertEqual(
+            policy.get_url("https://files.example.com/updatable.whl.metadata", "https://pypi.org/pypi"),
+            "https://files.example.com/updatable.whl.metadata",
+        )
+        self.assertEqual(
+            HedgePolicy().get_url("https://pypi.org/pypi/a/json", "https://pypi.org/pypi"),
+            "https://pypi.org/pypi/a/json",
+        )
+
+    def test_get_delay(self):
+        policy = HedgePolicy(percentile=90, min_samples=10)
+        for latency in range(9):
+            policy.record(latency)
+        self.assertIsNone(policy.get_delay())
+
+        policy.record(9)
+        self.assertEqual(policy.get_delay(), 9)
+
+        # Only recomputed every few requests
+        policy.record(100)
+        self.assertEqual(policy.get_delay(), 9)
+
+    def test_fast_request(self):
+        policy = _trained_policy()
+
+        result = asyncio.run(policy.run(lambda: _answer("primary"), lambda: _answer("secondary")))
+
+        self.assertEqual(result, "primary")
+        self.assertEqual(policy.hedges, 0)
+
+    def test_slow_request(self):
+        """
+        Assures that the hedge answers a slow request, which is cancelled
+        """
+        policy = _trained_policy()
+        primary = []
+
+        async def slow():
+            primary.append(asyncio.current_task())
+            return await _answer("primary", delay=1)
+
+        result = asyncio.run(policy.run(slow, lambda: _answer("secondary")))
+
+        self.assertEqual(result, "secondary")
+        self.assertEqual((policy.hedges, policy.wins), (1, 1))
+        self.assertTrue(primary[0].cancelled())
+
+    def test_cap(self):
+        policy = _trained_policy()
+        policy.max_ratio = 0
+
+        result = asyncio.run(policy.run(lambda: _answer("primary", delay=0.05), lambda: _answer("secondary")))
+
+        self.assertEqual(result, "primary")
+        self.assertEqual(policy.hedges, 0)
+
+    def test_failures(self):
+        policy = _trained_policy()
+
+        result = asyncio.run(
+            policy.run(
+                lambda: _answer("primary", delay=0.05, error=RuntimeError("primary")),
+                lambda: _answer("secondary", delay=0.1),
+            )
+        )
+        self.assertEqual(result, "secondary")
+
+        with self.assertRaisesRegex(RuntimeError, "primary"):
+            asyncio.run(
+                policy.run(
+                    lambda: _answer("primary", delay=0.05, error=RuntimeError("primary")),
+                    lambda: _answer("secondary", error=RuntimeError("secondary")),
+                )
+            )
+
+
+class TestSessionHedge(unittest.TestCase):
+    @respx.mock
+    def test_mirror(self):
+        """
+        Assures that slow index requests are hedged to the mirror
+        """
+
+        async def slow(request):
+            await asyncio.sleep(1)
+            return httpx.Response(200, json=PROJECT)
+
+        respx.get("https://pypi.org/pypi/updatable/json").mock(side_effect=slow)
+        mirror = respx.get("https://mirror.example.com/pypi/updatable/json").respond(json=PROJECT)
+        hedge = _trained_policy(mirror_url="https://mirror.example.com/pypi")
+
+        async def run():
+            async with Session(hedge=hedge) as session:
+                return await updatable_utils.get_pypi_package_data("updatable", session=session)
+
+        self.assertEqual(asyncio.run(run())["info"]["version"], "1.0.0")
+        self.assertEqual(mirror.call_count, 1)
+        self.assertEqual(hedge.wins, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,215 @@
+#!/usr/bin/env python
+import asyncio
+import unittest
+
+import httpx
+import respx
+
+from updatable import utils as updatable_utils
+from updatable.client import Session
+from updatable.index import JSONIndexBackend, SimpleIndexBackend, get_index_backend
+
+PROJECT = {"info": {"version": "1.0.0", "license": "MIT"}, "releases": {}, "last_serial": None}
+
+SIMPLE_PROJECT = {
+    "meta": {"api-version": "1.1"},
+    "name": "package-one",
+    "versions": ["1.0", "1.1.0", "2.0.0rc1"],
+    "files": [
+        {
+            "filename": "package_one-1.0-py3-none-any.whl",
+            "url": "https://files.example.com/package_one-1.0-py3-none-any.whl",
+            "upload-time": "2019-11-04T08:33:19.123456Z",
+            "core-metadata": {"sha256": "abc"},
+        },
+        {
+            "filename": "package-one-1.0.tar.gz",
+            "url": "../../files/package-one-1.0.tar.gz",
+            "upload-time": "2019-11-04T08:30:00Z",
+        },
+        {
+            "filename": "package_one-1.1.0.tar.gz",
+            "url": "https://files.example.com/package_one-1.1.0.tar.gz",
+            "upload-time": "2020-01-01T10:00:00Z",
+        },
+        {
+            "filename": "package_one-2.0.0rc1.tar.gz",
+            "url": "https://files.example.com/package_one-2.0.0rc1.tar.gz",
+            "upload-time": "2021-01-01T10:00:00Z",
+        },
+        {
+            "filename": "package_one-0.1.egg",
+            "url": "https://files.example.com/package_one-0.1.egg",
+        },
+    ],
+}
+
+
+def simple_response(json):
+    return httpx.Response(
+        200,
+        json=json,
+        headers={"Content-Type": "application/vnd.pypi.simple.v1+json", "X-PyPI-Last-Serial": "1234"},
+    )
+
+
+class TestGetIndexBackend(unittest.TestCase):
+    def test_get_index_backend(self):
+        backend = get_index_backend()
+        self.assertIsInstance(backend, JSONIndexBackend)
+        self.assertEqual(backend.index_url, "https://pypi.org/pypi")
+
+        backend = get_index_backend("simple", "https://mirror.example.com/root/pypi/+simple/")
+        self.assertIsInstance(backend, SimpleIndexBackend)
+        self.assertEqual(backend.index_url, "https://mirror.example.com/root/pypi/+simple")
+
+        with self.assertRaises(ValueError):
+            get_index_backend("invalid")
+
+    @respx.mock
+    def test_json_backend_with_index_url(self):
+        respx.get("https://mirror.example.com/pypi/updatable/json").respond(status_code=200, json=PROJECT)
+
+        async def run():
+            async with Session(index=JSONIndexBackend("https://mirror.example.com/pypi/")) as session:
+                return await updatable_utils.get_pypi_package_data("updatable", session=session)
+
+        self.assertDictEqual(asyncio.run(run()), PROJECT)
+
+
+class TestSimpleIndexBackend(unittest.TestCase):
+    def setUp(self):
+        self.backend = SimpleIndexBackend("https://mirror.example.com/simple")
+
+    def get_package_data(self, package_name, version=None):
+        async def run():
+            async with Session(index=self.backend) as session:
+                return await updatable_utils.get_pypi_package_data(package_name, version, session=session)
+
+        return asyncio.run(run())
+
+    @respx.mock
+    def test_get_project_data(self):
+        """
+        Assures that the simple project document is converted into the shape of the JSON API
+        """
+        route = respx.get("https://mirror.example.com/simple/package-one/").mock(
+            return_value=simple_response(SIMPLE_PROJECT),
+        )
+
+        data = self.get_package_data("Package_One")
+
+        self.assertEqual(route.calls.last.request.headers["Accept"], "application/vnd.pypi.simple.v1+json")
+        self.assertDictEqual(
+            data,
+            {
+                "info": {"version": "1.1.0", "license": None},
+                "releases": {
+                    "1.0": [{"upload_time": "2019-11-04T08:30:00"}, {"upload_time": "2019-11-04T08:33:19"}],
+                    "1.1.0": [{"upload_time": "2020-01-01T10:00:00"}],
+                    "2.0.0rc1": [{"upload_time": "2021-01-01T10:00:00"}],
+                },
+                "last_serial": 1234,
+            },
+        )
+
+    @respx.mock
+    def test_get_release_data(self):
+        """
+        Assures that the license of a release is read from the core metadata
+        """
+        respx.get("https://mirror.example.com/simple/package-one/").mock(return_value=simple_response(SIMPLE_PROJECT))
+        respx.get("https://files.example.com/package_one-1.0-py3-none-any.whl.metadata").respond(
+            status_code=200,
+            text="Metadata-Version: 2.1\nName: package-one\nVersion: 1.0\nLicense: MIT\n",
+        )
+
+        self.assertDictEqual(
+            self.get_package_data("package-one", "1.0.0"),
+            {"info": {"version": "1.0", "license": "MIT"}},
+        )
+        self.assertDictEqual(
+            self.get_package_data("package-one", "1.1.0"),
+            {"info": {"version": "1.1.0", "license": ""}},
+        )
+        self.assertIsNone(self.get_package_data("package-one", "3.0.0"))
+
+    @respx.mock
+    def test_package_update_list(self):
+        respx.get("https://mirror.example.com/simple/package-one/").mock(return_value=simple_response(SIMPLE_PROJECT))
+
+        async def run():
+            async with Session(index=self.backend) as session:
+                return await updatable_utils.get_package_update_list("package-one", "1.0", session=session, lazy=True)
+
+        updates = asyncio.run(run())
+        self.assertEqual(updates["latest_release"], "1.1.0")
+        self.assertEqual([release["version"] for release in updates["minor_updates"]], ["1.1.0"])
+        self.assertEqual([release["version"] for release in updates["pre_release_updates"]], ["2.0.0rc1"])
+
+    @respx.mock
+    def test_package_update_list_latest_release_license(self):
+        """
+        Assures that the license of an up to date package is read from the core metadata of its release
+        """
+        simple_project = {
+            **SIMPLE_PROJECT,
+            "files": [
+                {
+                    "filename": "package_one-1.1.0-py3-none-any.whl",
+                    "url": "https://files.example.com/package_one-1.1.0-py3-none-any.whl",
+                    "upload-time": "2020-01-01T10:00:00Z",
+                    "core-metadata": True,
+                },
+            ],
+        }
+        respx.get("https://mirror.example.com/simple/package-one/").mock(return_value=simple_response(simple_project))
+        respx.get("https://files.example.com/package_one-1.1.0-py3-none-any.whl.metadata").respond(
+            status_code=200,
+            text="Metadata-Version: 2.1\nName: package-one\nVersion: 1.1.0\nLicense: Apache\n",
+        )
+
+        async def run():
+            async with Session(index=self.backend) as session:
+                return await updatable_utils.get_package_update_list("package-one", "1.1.0", session=session)
+
+        updates = asyncio.run(run())
+        self.assertEqual(updates["newer_releases"], 0)
+        self.assertEqual(updates["current_release"], "1.1.0")
+        self.assertEqual(updates["current_release_license"], "Apache")
+
+    @respx.mock
+    def test_get_project_serial(self):
+        route = respx.head("https://mirror.example.com/simple/package-one/").respond(
+            status_code=200,
+            headers={"X-PyPI-Last-Serial": "1234"},
+        )
+
+        async def run():
+            async with Session(index=self.backend) as session:
+                return await self.backend.get_project_serial(session, "Package_One")
+
+        self.assertEqual(asyncio.run(run()), 1234)
+        self.assertEqual(route.calls.last.request.headers["Accept"], "application/vnd.pypi.simple.v1+json")
+
+    @respx.mock
+    def test_project_not_found(self):
+        respx.get("https://mirror.example.com/simple/package-one/").respond(status_code=404)
+        self.assertIsNone(self.get_package_data("package-one"))
+
+    @respx.mock
+    def test_unsupported_index(self):
+        """
+        Assures a RuntimeError is raised if the index only serves the HTML simple API
+        """
+        respx.get("https://mirror.example.com/simple/package-one/").respond(
+            status_code=200,
+            html="<html></html>",
+        )
+
+        with self.assertRaises(RuntimeError):
+            self.get_package_data("package-one")
+
+
+if __name__ == "__main__":
+    unittest.main()
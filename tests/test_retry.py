@@ -0,0 +1,223 @@
+#!/usr/bin/env python
+import asyncio
+import time
+import unittest
+from email.utils import formatdate
+
+import httpx
+import respx
+
+from updatable import utils as updatable_utils
+from updatable.client import Session
+from updatable.index import IndexRequestError
+from updatable.retry import CircuitBreaker, CircuitOpenError, RetryPolicy, parse_retry_after
+
+URL = "https://pypi.org/pypi/updatable/json"
+PROJECT = {
+    "info": {"version": "1.0.0", "license": "MIT"},
+    "releases": {"1.0.0": [{"upload_time": "2020-01-01T10:00:00"}]},
+    "last_serial": 1,
+}
+
+
+class TestParseRetryAfter(unittest.TestCase):
+    def test_parse_retry_after(self):
+        self.assertEqual(parse_retry_after("3"), 3.0)
+        self.assertEqual(parse_retry_after("-3"), 0.0)
+        self.assertIsNone(parse_retry_after(None))
+        self.assertIsNone(parse_retry_after("soon"))
+
+        self.assertAlmostEqual(parse_retry_after(formatdate(time.time() + 60, usegmt=True)), 60, delta=2)
+        self.assertEqual(parse_retry_after(formatdate(time.time() - 60, usegmt=True)), 0.0)
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    def test_open_and_close(self):
+        async def run():
+            breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.01)
+            self.assertFalse(await breaker.wait())
+
+            breaker.record_failure()
+            self.assertFalse(breaker.is_open)
+            breaker.record_failure()
+            self.assertTrue(breaker.is_open)
+
+            # Only one request probes, the others wait for its result
+            probe = await breaker.wait()
+            self.assertTrue(probe)
+            waiting = asyncio.ensure_future(breaker.wait())
+            await asyncio.sleep(0.02)
+            self.assertFalse(waiting.done())
+
+            breaker.record_success(probe)
+            self.assertFalse(await waiting)
+            self.assertFalse(breaker.is_open)
+
+        asyncio.run(run())
+
+    def test_failed_probe(self):
+        async def run():
+            breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.01, max_reset_timeout=0.03)
+            breaker.record_failure(retry_after=0.02)
+            self.assertAlmostEqual(breaker.open_until - time.monotonic(), 0.02, delta=0.01)
+
+            probe = await breaker.wait()
+            breaker.record_failure(probe=probe)
+            self.assertTrue(breaker.is_open)
+            self.assertEqual(breaker._open_timeout, 0.02)
+
+            breaker.abandon_probe()
+            self.assertTrue(await breaker.wait())
+
+        asyncio.run(run())
+
+    def test_max_wait(self):
+        """
+        Assures that a request fails at once if the breaker stays open longer than it may wait
+        """
+
+        async def run():
+            breaker = CircuitBreaker(failure_threshold=1, reset_timeout=1)
+            self.assertFalse(await breaker.wait(0))
+
+            breaker.record_failure()
+            started = time.monotonic()
+            with self.assertRaises(CircuitOpenError):
+                await breaker.wait(0.5)
+            self.assertLess(time.monotonic() - started, 0.1)
+
+            breaker.open_until = time.monotonic() + 0.02
+            self.assertTrue(await breaker.wait(0.5))
+
+        asyncio.run(run())
+
+
+class TestRetryPolicy(unittest.TestCase):
+    def test_is_retryable(self):
+        self.assertTrue(RetryPolicy.is_retryable(httpx.Response(503)))
+        self.assertTrue(RetryPolicy.is_retryable(httpx.Response(429)))
+        self.assertFalse(RetryPolicy.is_retryable(httpx.Response(404)))
+        self.assertTrue(RetryPolicy.is_retryable(error=httpx.ConnectError("")))
+        self.assertFalse(RetryPolicy.is_retryable(error=httpx.ReadTimeout("")))
+
+    def test_delay(self):
+        policy = RetryPolicy(max_retries=3, base_delay=1, max_delay=3, max_retry_after=10, seed=0)
+
+        for attempt in range(1, 4):
+            self.assertLessEqual(policy.get_delay(attempt), min(3, 2 ** (attempt - 1)))
+        self.assertIsNone(policy.get_delay(4))
+
+        self.assertEqual(policy.get_delay(1, retry_after=5), 5)
+        self.assertIsNone(policy.get_delay(1, retry_after=11))
+
+        # The host is paused for longer than the retry would wait
+        retries = policy.retries
+        self.assertIsNone(policy.get_delay(1, retry_after=5, paused=6))
+        self.assertEqual(policy.retries, retries)
+
+    def test_budget(self):
+        policy = RetryPolicy(budget_ratio=0.5, min_budget=2)
+
+        self.assertIsNotNone(policy.get_delay(1))
+        self.assertIsNotNone(policy.get_delay(1))
+        self.assertIsNone(policy.get_delay(1))
+
+        policy.record_request()
+        policy.record_request()
+        self.assertIsNotNone(policy.get_delay(1))
+        self.assertEqual(policy.retries, 3)
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            RetryPolicy(max_retries=-1)
+        with self.assertRaises(ValueError):
+            RetryPolicy(failure_threshold=0)
+
+
+class TestSessionRetry(unittest.TestCase):
+    def _get_project(self, retry):
+        async def run():
+            async with Session(retry=retry) as session:
+                return await updatable_utils.get_pypi_package_data("updatable", session=session)
+
+        return asyncio.run(run())
+
+    @respx.mock
+    def test_retry(self):
+        """
+        Assures that transient failures are retried, honouring Retry-After
+        """
+        route = respx.get(URL).mock(
+            side_effect=[
+                httpx.Response(503, headers={"Retry-After": "0"}),
+                httpx.ConnectError("Connection refused"),
+                httpx.Response(200, json=PROJECT),
+            ]
+        )
+        retry = RetryPolicy(base_delay=0.01, seed=0)
+
+        self.assertEqual(self._get_project(retry)["info"]["version"], "1.0.0")
+        self.assertEqual(route.call_count, 3)
+        self.assertEqual(retry.retries, 2)
+
+    @respx.mock
+    def test_retries_exhausted(self):
+        route = respx.get(URL).respond(status_code=429, headers={"Retry-After": "0"})
+
+        with self.assertRaises(RuntimeError):
+            self._get_project(RetryPolicy(max_retries=2))
+        self.assertEqual(route.call_count, 3)
+
+    @respx.mock
+    def test_not_retried(self):
+        route = respx.get(URL).respond(status_code=404)
+
+        self.assertIsNone(self._get_project(RetryPolicy()))
+        self.assertEqual(route.call_count, 1)
+
+    @respx.mock
+    def test_circuit_breaker(self):
+        """
+        Assures that a failing host is paused instead of receiving the retries of every request
+        """
+        route = respx.get(URL).respond(status_code=503, headers={"Retry-After": "0.05"})
+        retry = RetryPolicy(max_retries=1, failure_threshold=1, reset_timeout=0.01)
+
+        async def run():
+            async with Session(retry=retry) as session:
+                started = time.monotonic()
+                with self.assertRaises(RuntimeError):
+                    await updatable_utils.get_pypi_package_data("updatable", session=session)
+                return time.monotonic() - started
+
+        self.assertGreaterEqual(asyncio.run(run()), 0.05)
+        self.assertEqual(route.call_count, 2)
+        self.assertTrue(retry.get_breaker("pypi.org").is_open)
+
+    @respx.mock
+    def test_unreachable_host(self):
+        """
+        Assures that requests to an unreachable host fail instead of waiting for its circuit breaker to close
+        """
+        respx.route(host="pypi.org").mock(side_effect=httpx.ConnectError("Connection refused"))
+        retry = RetryPolicy(seed=0)
+
+        async def run():
+            async with Session(retry=retry) as session:
+                started = time.monotonic()
+                results = await asyncio.gather(
+                    *(updatable_utils.get_pypi_package_data(name, session=session) for name in ("a", "b", "c")),
+                    return_exceptions=True,
+                )
+                return time.monotonic() - started, results
+
+        elapsed, results = asyncio.run(run())
+        for result in results:
+            self.assertIsInstance(result, IndexRequestError)
+        self.assertTrue(retry.get_breaker("pypi.org").is_open)
+        # Within the first backoff periods, long before the breaker closes
+        self.assertLess(elapsed, retry.base_delay * 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
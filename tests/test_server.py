@@ -0,0 +1,172 @@
+#!/usr/bin/env python
+import asyncio
+import json
+import os
+import unittest
+from unittest.mock import patch
+
+import httpx
+import respx
+
+from updatable.client import Session
+from updatable.server import UpdateServer, UpdateService
+
+PATH = os.path.dirname(os.path.realpath(__file__))
+
+PACKAGES = [
+    {"package": "package1", "version": "1.0.0"},
+    {"package": "Package2", "version": "1.3.0"},
+]
+
+
+async def get_pypi_package_data_monkey(package_name, version=None, session=None):
+    json_file = os.path.join(PATH, "fixtures", f"pypi-{package_name.lower()}{'-' + version if version else ''}.json")
+
+    if not os.path.exists(json_file):
+        return None
+
+    with open(json_file) as data_file:
+        return json.load(data_file)
+
+
+class TestServer(unittest.TestCase):
+    def setUp(self):
+        patcher = patch("updatable.utils.get_pypi_package_data", side_effect=get_pypi_package_data_monkey)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.loads = 0
+
+    def load_packages(self):
+        self.loads += 1
+        return PACKAGES
+
+    async def serve(self, refresh=True):
+        service = UpdateService(self.load_packages, Session())
+        if refresh:
+            await service.refresh()
+
+        server = UpdateServer(service)
+        await server.start("127.0.0.1", 0)
+
+        return service, server, httpx.AsyncClient(base_url=f"http://127.0.0.1:{server.port}")
+
+    def test_queries(self):
+        """
+        Assures that the results of the last refresh are served
+        """
+
+        async def run():
+            service, server, client = await self.serve()
+            async with client:
+                health = (await client.get("/health")).json()
+                packages = (await client.get("/packages")).json()
+                outdated = (await client.get("/packages", params={"outdated": "1"})).json()
+                package = await client.get("/packages/PACKAGE1")
+                missing = await client.get("/packages/missing")
+                not_found = await client.get("/missing")
+                not_allowed = await client.post("/packages")
+            await server.aclose()
+            return health, packages, outdated, package, missing, not_found, not_allowed
+
+        health, packages, outdated, package, missing, not_found, not_allowed = asyncio.run(run())
+
+        self.assertTrue(health["ready"])
+        self.assertEqual(health["packages"], 2)
+        self.assertIsNone(health["last_error"])
+
+        self.assertListEqual([result["package"] for result in packages], ["package1", "Package2"])
+        self.assertListEqual([result["package"] for result in outdated], ["package1"])
+
+        self.assertEqual(package.status_code, 200)
+        self.assertEqual(package.json()["updates"]["latest_release"], "1.0.2")
+        self.assertEqual(package.json()["updates"]["patch_updates"][0]["upload_time"], "2013-10-22T23:34:21")
+
+        self.assertEqual(missing.status_code, 404)
+        self.assertEqual(not_found.status_code, 404)
+        self.assertEqual(not_allowed.status_code, 405)
+
+    def test_not_ready(self):
+        """
+        Assures that packages are not served before the first refresh finished
+        """
+
+        async def run():
+            _service, server, client = await self.serve(refresh=False)
+            async with client:
+                health = (await client.get("/health")).json()
+                packages = await client.get("/packages")
+            await server.aclose()
+            return health, packages
+
+        health, packages = asyncio.run(run())
+        self.assertFalse(health["ready"])
+        self.assertEqual(packages.status_code, 503)
+
+    def test_failed_refresh_keeps_results(self):
+        async def run():
+            service = UpdateService(self.load_packages, Session())
+            await service.refresh()
+            results = service.results
+
+            service.load_packages = lambda: [{"package": "package1", "version": "invalid!"}]
+            await service.refresh()
+            return service, results
+
+        service, results = asyncio.run(run())
+        self.assertIs(service.results, results)
+        self.assertIsNotNone(service.last_error)
+
+    def test_background_refresh(self):
+        """
+        Assures that the packages are read again and looked up on schedule
+        """
+
+        async def run():
+            service = UpdateService(self.load_packages, Session(), refresh_interval=0.01)
+            task = asyncio.create_task(service.run())
+            await asyncio.sleep(0.1)
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+            return service
+
+        service = asyncio.run(run())
+        self.assertGreater(self.loads, 1)
+        self.assertTrue(service.is_ready)
+
+
+class TestServiceErrors(unittest.TestCase):
+    @respx.mock
+    def test_transport_error(self):
+        """
+        Assures that a connection reset by the index fails the refresh, not the service
+        """
+        respx.get(url__regex=r"https://pypi\.org/.*").mock(side_effect=httpx.ReadError("Connection reset by peer"))
+        loads = []
+
+        def load_packages():
+            loads.append(1)
+            return PACKAGES
+
+        async def run():
+            async with Session() as session:
+                service = UpdateService(load_packages, session, refresh_interval=0.01)
+                task = asyncio.create_task(service.run())
+                await asyncio.sleep(0.1)
+                running = not task.done()
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+                return running, service
+
+        running, service = asyncio.run(run())
+        self.assertTrue(running)
+        self.assertGreater(len(loads), 1)
+
+        # The failure is reported per package
+        package = service.get_package("package1")
+        self.assertIsNone(package["updates"])
+        self.assertEqual(package["error"], "Connection error!")
+
+
+if __name__ == "__main__":
+    unittest.main()
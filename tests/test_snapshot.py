@@ -0,0 +1,122 @@
+#!/usr/bin/env python
+import asyncio
+import json
+import os
+import tempfile
+import unittest
+from datetime import datetime
+
+import respx
+
+from updatable import utils as updatable_utils
+from updatable.client import Session
+from updatable.snapshot import SnapshotStore
+
+PATH = os.path.dirname(os.path.realpath(__file__))
+INDEX_URL = "https://pypi.org/pypi"
+
+
+class TestSnapshotStore(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.snapshots = SnapshotStore(self.directory.name)
+
+        with open(os.path.join(PATH, "fixtures", "pypi-package2.json")) as data_file:
+            self.package_data = json.load(data_file)
+        self.package_data["last_serial"] = 100
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def lookup(self, version="1.0.0"):
+        async def run():
+            async with Session(snapshots=self.snapshots) as session:
+                return await updatable_utils.get_package_update_lists("package2", [version], session=session, lazy=True)
+
+        return asyncio.run(run())[version]
+
+    def test_store_and_load(self):
+        updates = updatable_utils.get_update_list(self.package_data, "1.0.0")
+        self.assertIsNone(self.snapshots.load(INDEX_URL, "package2"))
+
+        self.snapshots.store(INDEX_URL, "package2", 100, {"1.0.0": updates})
+        snapshot = self.snapshots.load(INDEX_URL, "package2")
+
+        self.assertEqual(snapshot.serial, 100)
+        self.assertDictEqual(snapshot.update_lists, {"1.0.0": updates})
+        self.assertIsInstance(snapshot.update_lists["1.0.0"]["minor_updates"][0]["upload_time"], datetime)
+        self.assertTrue(snapshot.covers(["1.0.0"]))
+        self.assertFalse(snapshot.covers(["1.0.0", "1.1.0"]))
+        self.assertIsNone(self.snapshots.load("https://mirror.example.com/pypi", "package2"))
+
+    def test_corrupted_snapshot(self):
+        """
+        Assures that a corrupted snapshot is treated as missing
+        """
+        self.snapshots.store(INDEX_URL, "package2", 100, {})
+        with open(self.snapshots._path(INDEX_URL, "package2"), "w") as f:
+            f.write('{"version": 1}')
+
+        self.assertIsNone(self.snapshots.load(INDEX_URL, "package2"))
+
+    @respx.mock
+    def test_unchanged_project(self):
+        """
+        Assures that a project is served from the snapshot as long as its serial did not move
+        """
+        project_route = respx.get("https://pypi.org/pypi/package2/json").respond(200, json=self.package_data)
+        serial_route = respx.head("https://pypi.org/pypi/package2/json").respond(
+            200,
+            headers={"X-PyPI-Last-Serial": "100"},
+        )
+
+        first = self.lookup()
+        self.assertEqual(project_route.call_count, 1)
+        self.assertEqual(serial_route.call_count, 0)
+
+        second = self.lookup()
+        self.assertEqual(project_route.call_count, 1)
+        self.assertEqual(serial_route.call_count, 1)
+        self.assertDictEqual(first, second)
+
+    @respx.mock
+    def test_changed_project(self):
+        """
+        Assures that a project is processed again once its serial moved
+        """
+        project_route = respx.get("https://pypi.org/pypi/package2/json").respond(200, json=self.package_data)
+        respx.head("https://pypi.org/pypi/package2/json").respond(200, headers={"X-PyPI-Last-Serial": "101"})
+
+        self.lookup()
+        self.lookup()
+        self.assertEqual(project_route.call_count, 2)
+
+    @respx.mock
+    def test_new_version(self):
+        """
+        Assures that a version missing from the snapshot is added to it
+        """
+        project_route = respx.get("https://pypi.org/pypi/package2/json").respond(200, json=self.package_data)
+        respx.head("https://pypi.org/pypi/package2/json").respond(200, headers={"X-PyPI-Last-Serial": "100"})
+
+        self.lookup("1.0.0")
+        self.lookup("1.3.0")
+        self.assertEqual(project_route.call_count, 2)
+
+        snapshot = self.snapshots.load(INDEX_URL, "package2")
+        self.assertListEqual(sorted(snapshot.update_lists), ["1.0.0", "1.3.0"])
+
+    @respx.mock
+    def test_index_without_serials(self):
+        """
+        Assures that no snapshot is stored if the index does not provide serials
+        """
+        del self.package_data["last_serial"]
+        respx.get("https://pypi.org/pypi/package2/json").respond(200, json=self.package_data)
+
+        self.lookup()
+        self.assertIsNone(self.snapshots.load(INDEX_URL, "package2"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+import asyncio
+import unittest
+
+import respx
+
+from tests.test_console import Capture
+from updatable import tracing
+from updatable import utils as updatable_utils
+from updatable.client import Session
+from updatable.console import _print_stats
+
+PROJECT = {
+    "info": {"version": "1.1.0", "license": "MIT"},
+    "releases": {
+        "1.0.0": [{"upload_time": "2019-11-04T08:33:19"}],
+        "1.1.0": [{"upload_time": "2020-01-01T10:00:00"}],
+    },
+}
+
+
+class TestTracing(unittest.TestCase):
+    def setUp(self):
+        self.events = []
+        tracing.add_tracer(self.events.append)
+        self.addCleanup(tracing.remove_tracer, self.events.append)
+
+    def test_trace_phase(self):
+        with tracing.trace_phase("custom", "package1") as span:
+            span.size = 42
+
+        self.assertEqual(len(self.events), 1)
+        self.assertEqual(self.events[0].phase, "custom")
+        self.assertEqual(self.events[0].package, "package1")
+        self.assertEqual(self.events[0].size, 42)
+        self.assertGreaterEqual(self.events[0].duration, 0)
+
+    def test_not_tracing(self):
+        """
+        Assures that nothing is measured without tracers
+        """
+        tracing.remove_tracer(self.events.append)
+
+        self.assertFalse(tracing.is_tracing())
+        self.assertIs(tracing.trace_phase("custom"), tracing.trace_phase("other"))
+        self.assertIsNone(tracing.get_connection_trace())
+
+        with tracing.trace_phase("custom") as span:
+            span.size = 42
+
+        self.assertListEqual(self.events, [])
+
+    @respx.mock
+    def test_lookup_phases(self):
+        """
+        Assures that all phases of a lookup are traced
+        """
+        respx.get("https://pypi.org/pypi/package1/json").respond(200, json=PROJECT)
+        respx.get("https://pypi.org/pypi/package1/1.0.0/json").respond(200, json={"info": PROJECT["info"]})
+        stats = tracing.StatsCollector()
+        tracing.add_tracer(stats)
+        self.addCleanup(tracing.remove_tracer, stats)
+
+        async def run():
+            async with Session() as session:
+                return await updatable_utils.get_package_update_list("package1", "1.0.0", session=session)
+
+        asyncio.run(run())
+
+        phases = stats.get_phase_totals()
+        self.assertListEqual(list(phases), ["lookup", "fetch", "request", "decode", "categorize"])
+        self.assertEqual(phases["fetch"][0], 2)
+        self.assertEqual(phases["categorize"][0], 1)
+        self.assertGreater(stats.bytes_received, 0)
+        self.assertListEqual([package for package, _duration in stats.get_slowest_packages()], ["package1"])
+
+        with Capture() as output:
+            _print_stats(stats)
+
+        self.assertEqual(output[0], "== Stats ==")
+        self.assertTrue(any(line.startswith("  -- package1 in ") for line in output))
+
+
+if __name__ == "__main__":
+    unittest.main()
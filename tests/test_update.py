@@ -8,13 +8,17 @@ from unittest.mock import patch
 
 import httpx
 import respx
+import semantic_version
 
 from updatable import utils as updatable_utils
+from updatable.index import IndexRequestError
 
 PATH = os.path.dirname(os.path.realpath(__file__))
+PROJECT = {"info": {"version": "1.0.0", "license": "MIT"}, "releases": {}, "last_serial": None}
+RELEASE = {"info": {"version": "1.0.0", "license": "MIT"}}
 
 
-async def get_pypi_package_data_monkey(package_name, version=None):
+async def get_pypi_package_data_monkey(package_name, version=None, session=None):
     json_file = f"pypi-{package_name}.json"
 
     with open(os.path.join(PATH, "fixtures", json_file)) as data_file:
@@ -288,11 +292,424 @@ class TestUpdate(unittest.TestCase):
         self.assertEqual(len(updates["patch_updates"]), 0)
         self.assertEqual(len(updates["non_semantic_versions"]), 3)
 
+    def test_iter_package_updates(self):
+        """
+        Test that the updates of all packages are yielded together with their package
+        """
+        packages = [{"package": "package1", "version": "1.0.0"}, {"package": "package3", "version": "1.0.0"}]
+
+        async def collect():
+            return [result async for result in updatable_utils.iter_package_updates(packages)]
+
+        results = asyncio.run(collect())
+        self.assertEqual(len(results), 2)
+        newer_releases = {package["package"]: updates["newer_releases"] for package, updates in results}
+        self.assertDictEqual(newer_releases, {"package1": 2, "package3": 2})
+
+    def test_iter_package_updates_cancels_pending_lookups(self):
+        """
+        Test that pending lookups are cancelled when the iteration is stopped early
+        """
+        cancelled = []
+
+        async def get_package_update_list_monkey(package_name, version, session=None, lazy=False):
+            try:
+                await asyncio.sleep(0 if package_name == "fast" else 10)
+            except asyncio.CancelledError:
+                cancelled.append(package_name)
+                raise
+            return {}
+
+        packages = [{"package": "slow", "version": "1.0.0"}, {"package": "fast", "version": "1.0.0"}]
+
+        async def first():
+            results = updatable_utils.iter_package_updates(packages)
+            async for package, _updates in results:
+                await results.aclose()
+                return package["package"]
+
+        with patch("updatable.utils.get_package_update_list", side_effect=get_package_update_list_monkey):
+            self.assertEqual(asyncio.run(first()), "fast")
+        self.assertListEqual(cancelled, ["slow"])
+
+    def test_iter_package_updates_deadline(self):
+        """
+        Test that lookups still running at the deadline are cancelled and reported as timed out
+        """
+        cancelled = []
+
+        async def get_package_update_list_monkey(package_name, version, session=None, lazy=False):
+            try:
+                await asyncio.sleep(0 if package_name == "fast" else 10)
+            except asyncio.CancelledError:
+                cancelled.append(package_name)
+                raise
+            return {"newer_releases": 0}
+
+        packages = [{"package": "slow", "version": "1.0.0"}, {"package": "fast", "version": "1.0.0"}]
+
+        async def collect():
+            results = updatable_utils.iter_package_updates(packages, deadline=0.05)
+            return [(package["package"], updates) async for package, updates in results]
+
+        with patch("updatable.utils.get_package_update_list", side_effect=get_package_update_list_monkey):
+            results = asyncio.run(collect())
+
+        self.assertListEqual(results, [("fast", {"newer_releases": 0}), ("slow", None)])
+        self.assertListEqual(cancelled, ["slow"])
+
+    @respx.mock
+    def test_iter_package_updates_request_timeout(self):
+        """
+        Test that a package whose request timed out is reported as timed out without failing the others
+        """
+        respx.get("https://pypi.org/pypi/stalled/json").mock(side_effect=httpx.ReadTimeout)
+        respx.get("https://pypi.org/pypi/available/json").respond(status_code=200, json=PROJECT)
+        packages = [{"package": "stalled", "version": "1.0.0"}, {"package": "available", "version": "1.0.0"}]
+
+        async def collect():
+            results = updatable_utils.iter_package_updates(packages)
+            return {package["package"]: updates async for package, updates in results}
+
+        with patch.object(updatable_utils, "get_pypi_package_data", self.get_pypi_package_data_orig):
+            results = asyncio.run(collect())
+        self.assertIsNone(results["stalled"])
+        self.assertEqual(results["available"]["newer_releases"], 0)
+
+    @respx.mock
+    def test_iter_package_updates_index_error(self):
+        """
+        Test that a package whose requests to the index failed is reported without failing the others
+        """
+        respx.get("https://pypi.org/pypi/unavailable/json").respond(status_code=503)
+        respx.get("https://pypi.org/pypi/available/json").respond(status_code=200, json=PROJECT)
+        packages = [{"package": "unavailable", "version": "1.0.0"}, {"package": "available", "version": "1.0.0"}]
+
+        async def collect():
+            results = updatable_utils.iter_package_updates(packages)
+            return {package["package"]: updates async for package, updates in results}
+
+        with patch.object(updatable_utils, "get_pypi_package_data", self.get_pypi_package_data_orig):
+            results = asyncio.run(collect())
+        self.assertIsInstance(results["unavailable"], IndexRequestError)
+        self.assertEqual(results["available"]["newer_releases"], 0)
+
+    def test_iter_package_updates_failure_cancels_lookups(self):
+        """
+        Test that the other lookups are cancelled before the error of a lookup is raised
+        """
+        cancelled = []
+
+        async def get_package_update_list_monkey(package_name, version, session=None, lazy=False):
+            if package_name == "broken":
+                raise RuntimeError("Connection error!")
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.append(package_name)
+                raise
+
+        packages = [{"package": "slow", "version": "1.0.0"}, {"package": "broken", "version": "1.0.0"}]
+
+        async def collect():
+            try:
+                return [result async for result in updatable_utils.iter_package_updates(packages)]
+            except RuntimeError:
+                return list(cancelled)
+
+        with patch("updatable.utils.get_package_update_list", side_effect=get_package_update_list_monkey):
+            self.assertListEqual(asyncio.run(collect()), ["slow"])
+
+
+class TestUpdateBoundaries(unittest.TestCase):
+    """
+    Tests the classification of releases compared to a package version
+    """
+
+    def assert_classification(self, package, expected):
+        boundaries = updatable_utils.get_update_boundaries(semantic_version.Version(package))
+
+        for release, update_type in expected.items():
+            release_version = semantic_version.Version(release)
+            self.assertEqual(boundaries.classify(release_version), update_type, release)
+            self.assertEqual(
+                updatable_utils.is_major_update(release_version, semantic_version.Version(package)),
+                update_type == updatable_utils.MAJOR_UPDATE,
+                release,
+            )
+            self.assertEqual(
+                updatable_utils.is_minor_update(release_version, semantic_version.Version(package)),
+                update_type == updatable_utils.MINOR_UPDATE,
+                release,
+            )
+            self.assertEqual(
+                updatable_utils.is_patch_update(release_version, semantic_version.Version(package)),
+                update_type == updatable_utils.PATCH_UPDATE,
+                release,
+            )
+
+    def test_classify(self):
+        self.assert_classification(
+            "1.0.0",
+            {
+                "0.9.0": None,
+                "1.0.0": None,
+                "1.0.1": updatable_utils.PATCH_UPDATE,
+                "1.0.1+build": updatable_utils.PATCH_UPDATE,
+                "1.1.0": updatable_utils.MINOR_UPDATE,
+                "1.9.9": updatable_utils.MINOR_UPDATE,
+                "2.0.0": updatable_utils.MAJOR_UPDATE,
+                "3.0.0-rc1": updatable_utils.MAJOR_UPDATE,
+            },
+        )
+
+    def test_classify_pre_releases_of_boundaries(self):
+        """
+        Test that pre-releases of the next version are not part of the lower update type
+        """
+        self.assert_classification(
+            "1.0.0",
+            {
+                "1.0.1-rc1": None,
+                "1.1.0-rc1": None,
+                "2.0.0-rc1": None,
+            },
+        )
+
+
+class TestParseRelease(unittest.TestCase):
+    """
+    Tests the release parse cache
+    """
+
+    def setUp(self):
+        updatable_utils.clear_parse_cache()
+
+    def test_parse_release(self):
+        parsed = updatable_utils.parse_release("1.2")
+        self.assertEqual(str(parsed.version), "1.2")
+        self.assertEqual(parsed.semantic_version, semantic_version.Version("1.2.0"))
+
+        parsed = updatable_utils.parse_release("1.0.0rc1")
+        self.assertTrue(parsed.version.is_prerelease)
+
+        parsed = updatable_utils.parse_release("not-a-version")
+        self.assertIsNone(parsed.version)
+        self.assertIsNone(parsed.semantic_version)
+
+    def test_parse_cache_statistics(self):
+        """
+        Test that a release string is only parsed once
+        """
+        first = updatable_utils.parse_release("2.0.0")
+        second = updatable_utils.parse_release("2.0.0")
+        updatable_utils.parse_release("not-a-version")
+        updatable_utils.parse_release("not-a-version")
+
+        self.assertIs(first, second)
+        cache_info = updatable_utils.get_parse_cache_info()
+        self.assertEqual(cache_info.hits, 2)
+        self.assertEqual(cache_info.misses, 2)
+
+    def test_sorted_versions_uses_cache(self):
+        updatable_utils.sorted_versions([{"version": "1.0.0"}, {"version": "2.0.0"}])
+        updatable_utils.sorted_versions([{"version": "1.0.0"}, {"version": "2.0.0"}])
+        self.assertEqual(updatable_utils.get_parse_cache_info().hits, 2)
+
+    def test_sorted_versions_with_non_semantic_version(self):
+        with self.assertRaises(ValueError):
+            updatable_utils.sorted_versions([{"version": "1.0.0"}, {"version": "not-a-version"}])
+
+
+class TestRelease(unittest.TestCase):
+    """
+    Tests the release records of update lists
+    """
+
+    def test_dict_compatible(self):
+        release = updatable_utils.Release("1.0.0", "2020-01-01T10:00:00")
+        upload_time = datetime.datetime(2020, 1, 1, 10, 0, 0)
+
+        self.assertEqual(release, {"version": "1.0.0", "upload_time": upload_time})
+        self.assertEqual({"version": "1.0.0", "upload_time": upload_time}, release)
+        self.assertEqual(release["version"], "1.0.0")
+        self.assertEqual(dict(release), {"version": "1.0.0", "upload_time": upload_time})
+        self.assertEqual({**release, "upload_time": None}, {"version": "1.0.0", "upload_time": None})
+        self.assertIsNone(release.get("license"))
+        with self.assertRaises(KeyError):
+            release["license"]
+
+    def test_lazy_upload_time(self):
+        """
+        Test that the upload time is parsed once, when it is read
+        """
+        release = updatable_utils.Release("1.0.0", "2020-01-01T10:00:00")
+        self.assertEqual(release._upload_time, "2020-01-01T10:00:00")
+
+        self.assertEqual(release.upload_time, datetime.datetime(2020, 1, 1, 10, 0, 0))
+        self.assertIs(release.upload_time, release["upload_time"])
+        self.assertIsNone(updatable_utils.Release("1.0.0").upload_time)
+
+    def test_categorized_releases(self):
+        package_data = {
+            "releases": {
+                "0.9.0": [{"upload_time": "not a timestamp"}],
+                "1.0.1": [{"upload_time": "2020-01-01T10:00:00"}],
+                "1.1.0": [],
+            },
+        }
+        categorized = updatable_utils.get_categorized_package_data(package_data, semantic_version.Version("1.0.0"))
+
+        self.assertIsInstance(categorized["patch_updates"][0], updatable_utils.Release)
+        self.assertEqual(categorized["patch_updates"][0]["upload_time"], datetime.datetime(2020, 1, 1, 10, 0, 0))
+        self.assertListEqual(categorized["minor_updates"], [{"version": "1.1.0", "upload_time": None}])
+
+
+class TestCategorizedPackageLists(unittest.TestCase):
+    """
+    Tests the categorization of one project document against several versions
+    """
+
+    package_data = {
+        "releases": {
+            "1.0.0": [{"upload_time": "2020-01-01T10:00:00"}],
+            "1.0.1": [{"upload_time": "2020-02-01T10:00:00"}],
+            "1.1.0": [],
+            "1.1.0rc1": [],
+            "2.0.0": [{"upload_time": "2020-03-01T10:00:00"}],
+            "2.0.0-1": [],
+            "2.1.0": [],
+            "3.0.0a1": [],
+            "nightly": [],
+        },
+    }
+
+    def test_same_result(self):
+        versions = [semantic_version.Version(version) for version in ("0.9.0", "1.0.0", "1.1.0", "1.9.9", "2.1.0")]
+
+        categorized = updatable_utils.get_categorized_package_lists(self.package_data, versions)
+
+        self.assertListEqual(list(categorized), versions)
+        for version in versions:
+            self.assertDictEqual(
+                categorized[version],
+                updatable_utils.get_categorized_package_data(self.package_data, version),
+                version,
+            )
+
+    def test_parsed_once(self):
+        """
+        Assures that releases are parsed once and listed releases share their records
+        """
+        updatable_utils.clear_parse_cache()
+        versions = [semantic_version.Version("1.0.0"), semantic_version.Version("1.0.1")]
+
+        categorized = updatable_utils.get_categorized_package_lists(self.package_data, versions)
+
+        self.assertEqual(updatable_utils.get_parse_cache_info().misses, len(self.package_data["releases"]))
+        self.assertIs(categorized[versions[0]]["major_updates"][0], categorized[versions[1]]["major_updates"][0])
+        self.assertIsNot(
+            categorized[versions[0]]["pre_release_updates"],
+            categorized[versions[1]]["pre_release_updates"],
+        )
+
+    def test_get_update_lists(self):
+        package_data = {"info": {"version": "2.1.0", "license": "MIT"}, **self.package_data}
+
+        with patch.object(updatable_utils, "SortedReleases", wraps=updatable_utils.SortedReleases) as sorted_releases:
+            update_lists = updatable_utils.get_update_lists(package_data, ["1.0.0", "2.0", "2.1.0"])
+
+        # The latest version takes the fast path, the others share the sorted releases
+        sorted_releases.assert_called_once()
+        self.assertDictEqual(update_lists["1.0.0"], updatable_utils.get_update_list(package_data, "1.0.0"))
+        self.assertEqual(update_lists["2.0"]["newer_releases"], 1)
+        self.assertEqual(update_lists["2.1.0"]["current_release"], "2.1.0")
+
+
+class TestUpToDate(unittest.TestCase):
+    """
+    Tests the update information of packages that are up to date
+    """
+
+    RELEASES = [
+        "0.9",
+        "1.0",
+        "1.0.0.post1",
+        "1.1.0rc1",
+        "1.1.0",
+        "1.1.1.dev0",
+        "2.0.0b2",
+        "2.0.0a1",
+        "nightly-7",
+        "0.01",
+        "1.1.0.1",
+    ]
+
+    def _get_update_list(self, releases, latest, version, fast_path=True):
+        package_data = {
+            "info": {"version": latest, "license": "MIT"},
+            "releases": {release: [{"upload_time": "2020-01-01T10:00:00"}] for release in releases},
+        }
+
+        if fast_path:
+            return updatable_utils.get_update_list(package_data, version)
+
+        with patch.object(updatable_utils, "_is_up_to_date", return_value=False):
+            return updatable_utils.get_update_list(package_data, version)
+
+    def test_same_result(self):
+        """
+        Assures that the fast path returns the same update information as the categorization
+        """
+        for version in ("1.1.0.1", "1.1.1", "1.2", "1.1.0.1.post2", "2.0.0"):
+            with self.subTest(version=version):
+                updates = self._get_update_list(self.RELEASES, "1.1.0.1", version)
+
+                self.assertDictEqual(updates, self._get_update_list(self.RELEASES, "1.1.0.1", version, fast_path=False))
+                self.assertEqual(updates["newer_releases"], 0)
+                self.assertEqual(updates["pre_releases"], 4)
+
+    def test_skips_categorization(self):
+        with patch.object(updatable_utils, "get_categorized_package_data") as categorize:
+            updates = self._get_update_list(self.RELEASES, "1.1.0.1", "1.1.0.1")
+
+        categorize.assert_not_called()
+        self.assertEqual(updates["current_release"], "1.1.0.1")
+        self.assertListEqual([release["version"] for release in updates["non_semantic_versions"]], ["nightly-7"])
+
+    def test_stale_latest_release(self):
+        """
+        Assures that newer final releases are found even if the latest release of the document is outdated
+        """
+        for releases in (["1.0.0", "1.0.1"], ["1.0.0", "1.0.0.post1"], ["1.0.0rc1", "1.0.0"]):
+            with self.subTest(releases=releases):
+                updates = self._get_update_list(releases, releases[0], releases[0])
+                self.assertDictEqual(
+                    updates, self._get_update_list(releases, releases[0], releases[0], fast_path=False)
+                )
+
+        updates = self._get_update_list(["1.0.0", "1.0.1"], "1.0.0", "1.0.0")
+        self.assertEqual(updates["newer_releases"], 1)
+
+    def test_semantic_version_boundaries(self):
+        """
+        Assures that final releases are compared like in the categorization, not in PEP 440 order
+        """
+        for releases, latest, version, newer_releases in (
+            (["3.1.0"], "3.1.0", "3.1.0-1", 1),
+            (["3.1.0", "3.2.0"], "3.2.0", "3.1.0-1", 2),
+            (["1.0", "1.3", "2.0.0.post1"], "2.0.0.post1", "1!1.2", 3),
+        ):
+            with self.subTest(version=version, releases=releases):
+                updates = self._get_update_list(releases, latest, version)
+                self.assertDictEqual(updates, self._get_update_list(releases, latest, version, fast_path=False))
+                self.assertEqual(updates["newer_releases"], newer_releases)
+
 
 class TestGetPackageData(unittest.TestCase):
     def setUp(self) -> None:
-        respx.get("https://pypi.org/pypi/updatable/json").respond(status_code=200, json={"test1": "ok"})
-        respx.get("https://pypi.org/pypi/updatable/1.0.0/json").respond(status_code=200, json={"test2": "ok"})
+        respx.get("https://pypi.org/pypi/updatable/json").respond(status_code=200, json=PROJECT)
+        respx.get("https://pypi.org/pypi/updatable/1.0.0/json").respond(status_code=200, json=RELEASE)
         respx.get("https://pypi.org/pypi/updatable/2.0.0/json").respond(status_code=404, json={"message": "Not Found"})
         respx.get("https://pypi.org/pypi/updatable/2.5.0/json").mock(side_effect=httpx.ConnectError)
 
@@ -302,7 +719,7 @@ class TestGetPackageData(unittest.TestCase):
         Assures that fetched pypi data is parsed correctly if no version is given
         """
         response = asyncio.run(updatable_utils.get_pypi_package_data("updatable"))
-        self.assertDictEqual(response, {"test1": "ok"})
+        self.assertDictEqual(response, PROJECT)
 
     @respx.mock
     def test_get_pypi_package_data_existing_version(self):
@@ -310,7 +727,7 @@ class TestGetPackageData(unittest.TestCase):
         Assures that fetched pypi data is parsed correctly if a valid version is given
         """
         response = asyncio.run(updatable_utils.get_pypi_package_data("updatable", "1.0.0"))
-        self.assertDictEqual(response, {"test2": "ok"})
+        self.assertDictEqual(response, RELEASE)
 
     @respx.mock
     def test_get_pypi_package_data_with_non_existing_version(self):
@@ -330,16 +747,15 @@ class TestGetPackageData(unittest.TestCase):
 
 
 class TestGetEnvironmentList(unittest.TestCase):
-    def _mocked_subprocess_check_output(*args, **kwargs):
-        """
-        This method is used to mock the check_output function from subprocess,
-        which captures the output on the pip freeze command in `get_environment_requirements_list`
+    def _mocked_scan_environment(*args, **kwargs):
         """
-        return b"""
-        package1==1.0.0
-        package2==1.2.1
-        package3==2.5.3
+        This method is used to mock the environment scan used by `get_environment_requirements_list`
         """
+        return [
+            "package1==1.0.0",
+            "package2==1.2.1",
+            "package3==2.5.3",
+        ]
 
     def test_get_mocked_environment_requirements_list(self):
         """
@@ -347,8 +763,8 @@ class TestGetEnvironmentList(unittest.TestCase):
         """
 
         with patch(
-            "updatable.utils.check_output",
-            side_effect=self._mocked_subprocess_check_output,
+            "updatable.utils.scan_environment",
+            side_effect=self._mocked_scan_environment,
         ) as mock:
             package_list = updatable_utils.get_environment_requirements_list()
             self.assertTrue(mock.called)
@@ -365,7 +781,7 @@ class TestGetEnvironmentList(unittest.TestCase):
         """
         Assures that list of requirenments can be loaded from the cureent environemnt correctly
         """
-        package_list = updatable_utils.get_environment_requirements_list()
+        package_list = updatable_utils.get_environment_requirements_list(cache=False)
         self.assertTrue(len(package_list) > 0)
 
 
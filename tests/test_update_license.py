@@ -9,8 +9,12 @@ from updatable import utils as updatable_utils
 PATH = os.path.dirname(os.path.realpath(__file__))
 
 
-async def get_pypi_package_data_monkey(package_name, version=None):
+requested_versions = []
+
+
+async def get_pypi_package_data_monkey(package_name, version=None, session=None):
     if version:
+        requested_versions.append(version)
         json_file = f"pypi-{package_name}-{version}.json"
     else:
         json_file = f"pypi-{package_name}.json"
@@ -27,6 +31,7 @@ class TestUpdateLicense(unittest.TestCase):
     def setUp(self):
         self.get_pypi_package_data_orig = updatable_utils.get_pypi_package_data
         updatable_utils.get_pypi_package_data = get_pypi_package_data_monkey
+        requested_versions.clear()
 
     def tearDown(self):
         updatable_utils.get_pypi_package_data = self.get_pypi_package_data_orig
@@ -53,6 +58,34 @@ class TestUpdateLicense(unittest.TestCase):
         self.assertEqual(updates["current_release_license"], "MIT")
         self.assertEqual(updates["latest_release_license"], "MIT")
 
+    def test_update_license_up_to_date(self):
+        """
+        Test that the current release document is not requested if the package is up to date
+        """
+        updates = asyncio.run(updatable_utils.get_package_update_list("package3", "3.0.0"))
+        self.assertEqual(updates["current_release"], "3.0.0")
+        self.assertEqual(updates["current_release_license"], "MIT")
+        self.assertListEqual(requested_versions, [])
+
+    def test_update_license_lazy(self):
+        """
+        Test that the current release document is only requested when it is resolved
+        """
+        updates = asyncio.run(updatable_utils.get_package_update_list("package3", "1.0.0", lazy=True))
+        self.assertIsNone(updates["current_release"])
+        self.assertIsNone(updates["current_release_license"])
+        self.assertEqual(updates["latest_release_license"], "MIT")
+        self.assertListEqual(requested_versions, [])
+
+        asyncio.run(updatable_utils.resolve_current_release(updates, "package3", "1.0.0"))
+        self.assertEqual(updates["current_release"], "1.0.0")
+        self.assertEqual(updates["current_release_license"], "GPL-2.0")
+        self.assertListEqual(requested_versions, ["1.0.0"])
+
+        # Already resolved
+        asyncio.run(updatable_utils.resolve_current_release(updates, "package3", "1.0.0"))
+        self.assertListEqual(requested_versions, ["1.0.0"])
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -1,25 +1,55 @@
+from updatable.client import Session
 from updatable.utils import (
+    Release,
+    SortedReleases,
+    UpdateBoundaries,
+    as_completed_until,
+    clear_parse_cache,
     get_categorized_package_data,
+    get_categorized_package_lists,
     get_environment_requirements_list,
     get_package_update_list,
+    get_package_update_lists,
+    get_parse_cache_info,
     get_parsed_environment_package_list,
     get_pypi_package_data,
+    get_update_boundaries,
+    get_update_list,
+    get_update_lists,
     is_major_update,
     is_minor_update,
     is_patch_update,
+    iter_package_updates,
+    parse_release,
     parse_requirements_list,
+    resolve_current_release,
     sorted_versions,
 )
 
 __all__ = [
+    "Release",
+    "UpdateBoundaries",
+    "get_update_boundaries",
+    "parse_release",
+    "get_parse_cache_info",
+    "clear_parse_cache",
     "is_major_update",
     "is_minor_update",
     "is_patch_update",
     "sorted_versions",
+    "SortedReleases",
     "get_categorized_package_data",
+    "get_categorized_package_lists",
     "get_parsed_environment_package_list",
     "get_environment_requirements_list",
     "parse_requirements_list",
     "get_pypi_package_data",
+    "get_update_list",
+    "get_update_lists",
     "get_package_update_list",
+    "get_package_update_lists",
+    "resolve_current_release",
+    "as_completed_until",
+    "iter_package_updates",
+    "Session",
 ]
@@ -0,0 +1,300 @@
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+import time
+import zlib
+from email.utils import formatdate
+
+import httpx
+
+__all__ = [
+    "CacheEntry",
+    "DiskCache",
+    "default_cache_directory",
+    "write_atomic",
+]
+
+DEFAULT_TTL = 300
+DEFAULT_MAX_SIZE = 256 * 1024 * 1024
+
+# Directory of the cache directory holding the responses, the other directories and files are not evicted or cleared
+HTTP_CACHE_DIRECTORY = "http"
+
+# Response headers that describe the transfer rather than the document are not stored
+_SKIPPED_HEADERS = {"connection", "content-encoding", "content-length", "keep-alive", "transfer-encoding"}
+
+
+def default_cache_directory():
+    """
+    Returns the default cache directory, following the XDG base directory specification
+
+    :return: string
+    """
+    cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(cache_home, "updatable")
+
+
+def write_atomic(path, data):
+    """
+    Write a file by moving a completely written temporary file in place
+
+    Concurrent readers either see the previous or the new content, never a partially written file.
+
+    :param path: string
+    :param data: bytes
+    :return: bool, whether the file was written
+    """
+    directory = os.path.dirname(path)
+    tmp_path = None
+
+    try:
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except OSError:
+        if tmp_path is not None:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+        return False
+
+    return True
+
+
+class CacheEntry:
+    """
+    Cached response of a single url
+    """
+
+    __slots__ = ("url", "content", "headers", "stored_at", "path")
+
+    def __init__(self, url, content, headers, stored_at, path=None):
+        """
+        :param url: string
+        :param content: bytes, the decoded response body
+        :param headers: dict, stored response headers
+        :param stored_at: float, unix time of the last download or revalidation
+        :param path: string, file holding the entry
+        """
+        self.url = url
+        self.content = content
+        self.headers = headers
+        self.stored_at = stored_at
+        self.path = path
+
+    def is_fresh(self, ttl):
+        """
+        Checks if the entry can be used without revalidation
+
+        :param ttl: float, seconds
+        :return: bool
+        """
+        return time.time() - self.stored_at < ttl
+
+    def validation_headers(self):
+        """
+        Returns the headers of a conditional request for the entry
+
+        :return: dict
+        """
+        headers = {}
+
+        if "etag" in self.headers:
+            headers["If-None-Match"] = self.headers["etag"]
+        if "last-modified" in self.headers:
+            headers["If-Modified-Since"] = self.headers["last-modified"]
+        elif not headers:
+            headers["If-Modified-Since"] = formatdate(self.stored_at, usegmt=True)
+
+        return headers
+
+    def to_response(self):
+        """
+        Returns the entry as response
+
+        :return: httpx.Response
+        """
+        return httpx.Response(
+            200,
+            headers=self.headers,
+            content=self.content,
+            request=httpx.Request("GET", self.url),
+        )
+
+
+class DiskCache:
+    """
+    Persistent cache for index responses
+
+    Entries are stored gzip compressed, one file per url. Files are written to a temporary file and moved in place,
+    so several processes can share one cache directory without reading partially written entries. Reading an entry
+    refreshes its modification time, which is used to evict the least recently used entries once the cache grows
+    beyond `max_size`.
+
+    The entries are kept in the `http` directory of the cache directory, the snapshots, environment scans and gate
+    history stored next to them do not count towards `max_size` and are neither evicted nor cleared.
+    """
+
+    def __init__(self, directory=None, ttl=DEFAULT_TTL, max_size=DEFAULT_MAX_SIZE):
+        """
+        :param directory: string, cache directory, defaults to `default_cache_directory()`
+        :param ttl: float, seconds an entry is used without revalidation
+        :param max_size: int, maximum size of the entries in bytes
+        """
+        self.directory = os.path.join(directory or default_cache_directory(), HTTP_CACHE_DIRECTORY)
+        self.ttl = ttl
+        self.max_size = max_size
+
+        self._size = None
+
+    def _path(self, url):
+        """
+        Returns the file of the entry for an url
+
+        :param url: string
+        :return: string
+        """
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, key[:2], f"{key}.gz")
+
+    def load(self, url):
+        """
+        Returns the cached entry for an url
+
+        :param url: string
+        :return: CacheEntry or None
+        """
+        path = self._path(url)
+
+        try:
+            with open(path, "rb") as f:
+                data = gzip.decompress(f.read())
+            meta, content = data.split(b"\n", 1)
+            meta = json.loads(meta)
+        except FileNotFoundError:
+            return None
+        except (OSError, EOFError, ValueError, zlib.error):
+            # Corrupted entry, it is replaced by the next download
+            return None
+
+        if meta.get("url") != url:
+            return None
+
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+        return CacheEntry(url, content, meta["headers"], meta["stored_at"], path)
+
+    def store(self, url, content, headers):
+        """
+        Store the response of an url
+
+        :param url: string
+        :param content: bytes
+        :param headers: httpx.Headers or dict
+        :return: CacheEntry
+        """
+        headers = {key.lower(): value for key, value in headers.items() if key.lower() not in _SKIPPED_HEADERS}
+        entry = CacheEntry(url, content, headers, time.time(), self._path(url))
+        self._write(entry)
+        return entry
+
+    def revalidated(self, entry):
+        """
+        Mark an entry as fresh after the index confirmed it did not change
+
+        :param entry: CacheEntry
+        """
+        entry.stored_at = time.time()
+        self._write(entry)
+
+    def _write(self, entry):
+        """
+        Atomically write an entry to disk
+
+        :param entry: CacheEntry
+        """
+        meta = json.dumps({"url": entry.url, "headers": entry.headers, "stored_at": entry.stored_at})
+        data = gzip.compress(meta.encode("utf-8") + b"\n" + entry.content, compresslevel=6)
+
+        # The cache is an optimization only, a read-only or full disk must not fail the lookup
+        if not write_atomic(entry.path, data):
+            return
+
+        if self._size is None:
+            self._size = self._scan_size()
+        else:
+            self._size += len(data)
+
+        if self._size > self.max_size:
+            self.evict()
+
+    def _entries(self):
+        """
+        Returns all entry files as (mtime, size, path) tuples
+
+        :return: tuple[]
+        """
+        entries = []
+
+        for root, _dirs, files in os.walk(self.directory):
+            for name in files:
+                # Skip files that are still being written by another process
+                if name.startswith(".tmp-"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+        return entries
+
+    def _scan_size(self):
+        """
+        Returns the size of all entries in bytes
+
+        :return: int
+        """
+        return sum(size for _mtime, size, _path in self._entries())
+
+    def evict(self):
+        """
+        Remove the least recently used entries until the cache is below 90% of its maximum size
+        """
+        entries = sorted(self._entries())
+        size = sum(size for _mtime, size, _path in entries)
+        target = self.max_size * 0.9
+
+        for _mtime, entry_size, path in entries:
+            if size <= target:
+                break
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            except OSError:
+                continue
+            size -= entry_size
+
+        self._size = size
+
+    def clear(self):
+        """
+        Remove all entries
+        """
+        for _mtime, _size, path in self._entries():
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+
+        self._size = 0
@@ -0,0 +1,384 @@
+import asyncio
+import time
+from importlib.util import find_spec
+from urllib.parse import urlsplit
+
+import httpx
+
+from updatable.index import JSONIndexBackend
+from updatable.retry import parse_retry_after
+from updatable.tracing import PHASE_REQUEST, get_connection_trace, trace_phase
+
+__all__ = [
+    "Session",
+]
+
+DEFAULT_MAX_CONNECTIONS = 20
+DEFAULT_MAX_KEEPALIVE_CONNECTIONS = 20
+DEFAULT_MAX_CONNECTIONS_PER_HOST = 20
+DEFAULT_KEEPALIVE_EXPIRY = 30.0
+DEFAULT_TIMEOUT = 30.0
+
+
+def _accepted_encodings():
+    """
+    Returns the content encodings that can be decoded in the current environment
+
+    :return: string[]
+    """
+    encodings = ["gzip", "deflate"]
+
+    # httpx decodes brotli responses when one of the brotli bindings is installed
+    if find_spec("brotli") or find_spec("brotlicffi"):
+        encodings.append("br")
+
+    return encodings
+
+
+class Session:
+    """
+    HTTP session shared by all package lookups of a run
+
+    Wraps a single `httpx.AsyncClient`, so connections are kept alive and reused between
+    requests instead of paying a TCP and TLS handshake for every lookup.
+    """
+
+    def __init__(
+        self,
+        max_connections=DEFAULT_MAX_CONNECTIONS,
+        max_keepalive_connections=DEFAULT_MAX_KEEPALIVE_CONNECTIONS,
+        max_connections_per_host=DEFAULT_MAX_CONNECTIONS_PER_HOST,
+        keepalive_expiry=DEFAULT_KEEPALIVE_EXPIRY,
+        timeout=DEFAULT_TIMEOUT,
+        http2=False,
+        compression=True,
+        limiter=None,
+        retry=None,
+        hedge=None,
+        cache=None,
+        index=None,
+        snapshots=None,
+        executor=None,
+    ):
+        """
+        :param max_connections: int, maximum number of open connections in the pool
+        :param max_keepalive_connections: int, maximum number of idle connections kept alive
+        :param max_connections_per_host: int, maximum number of concurrent requests to a single host
+        :param keepalive_expiry: float, seconds an idle connection is kept alive
+        :param timeout: float, seconds to wait for a connection to open and for each read or write of a request, `None`
+            to wait forever. Waiting for a free connection of the pool is not limited.
+        :param http2: bool, negotiate HTTP/2 (requires the `h2` package)
+        :param compression: bool, advertise all content encodings that can be decoded
+        :param limiter: updatable.concurrency.AdaptiveLimiter, adapts the number of in-flight requests
+        :param retry: updatable.retry.RetryPolicy, retries transient failures and pauses failing hosts
+        :param hedge: updatable.hedge.HedgePolicy, sends a second request for slow index requests
+        :param cache: updatable.cache.DiskCache, persistent cache for successful responses
+        :param index: updatable.index.IndexBackend, the package index to query, defaults to the PyPI JSON API
+        :param snapshots: updatable.snapshot.SnapshotStore, skip projects that did not change since a previous run
+        :param executor: concurrent.futures.Executor, runs CPU-bound work off the event loop, see
+            `updatable.executor.create_executor`. It is not shut down by the session.
+        """
+        self.max_connections = max_connections
+        self.max_keepalive_connections = max_keepalive_connections
+        self.max_connections_per_host = max_connections_per_host
+        self.keepalive_expiry = keepalive_expiry
+        self.timeout = timeout
+        self.http2 = http2
+        self.compression = compression
+        self.limiter = limiter
+        self.retry = retry
+        self.hedge = hedge
+        self.cache = cache
+        self.index = index if index is not None else JSONIndexBackend()
+        self.snapshots = snapshots
+        self.executor = executor
+
+        self._client = None
+        self._host_semaphores = {}
+        self._in_flight = {}
+        self._waiters = {}
+
+    async def __aenter__(self):
+        self.open()
+        return self
+
+    async def __aexit__(self, *args):
+        await self.aclose()
+
+    @property
+    def client(self):
+        """
+        Returns the underlying client, opening it on first use
+
+        :return: httpx.AsyncClient
+        """
+        self.open()
+        return self._client
+
+    def open(self):
+        """
+        Create the underlying connection pool
+        """
+        if self._client is not None:
+            return
+
+        headers = {}
+        if self.compression:
+            headers["Accept-Encoding"] = ", ".join(_accepted_encodings())
+
+        try:
+            self._client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_keepalive_connections,
+                    keepalive_expiry=self.keepalive_expiry,
+                ),
+                http2=self.http2,
+                headers=headers,
+                follow_redirects=True,
+                timeout=httpx.Timeout(self.timeout, pool=None),
+            )
+        except ImportError:
+            raise RuntimeError("HTTP/2 support requires the `h2` package!")
+
+    async def aclose(self):
+        """
+        Close all pooled connections
+        """
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def _host_semaphore(self, url):
+        """
+        Returns the semaphore limiting concurrent requests to the host of the url
+
+        :param url: string
+        :return: asyncio.Semaphore
+        """
+        host = urlsplit(url).netloc
+
+        if host not in self._host_semaphores:
+            self._host_semaphores[host] = asyncio.Semaphore(self.max_connections_per_host)
+
+        return self._host_semaphores[host]
+
+    async def get(self, url, immutable=False, **kwargs):
+        """
+        Send a GET request, answered from the cache if possible
+
+        Stale cache entries are revalidated with a conditional request, so an unchanged document is not downloaded
+        again. Entries of immutable documents are never revalidated.
+
+        :param url: string
+        :param immutable: bool, the document at the url never changes
+        :return: httpx.Response
+        """
+        if self.cache is None:
+            return await self._send(url, **kwargs)
+
+        entry = await asyncio.to_thread(self.cache.load, url)
+        if entry is not None and (immutable or entry.is_fresh(self.cache.ttl)):
+            return entry.to_response()
+
+        headers = dict(kwargs.pop("headers", None) or {})
+        if entry is not None:
+            headers.update(entry.validation_headers())
+
+        resp = await self._send(url, headers=headers, **kwargs)
+
+        if resp.status_code == 304 and entry is not None:
+            await asyncio.to_thread(self.cache.revalidated, entry)
+            return entry.to_response()
+
+        if resp.status_code == 200:
+            await asyncio.to_thread(self.cache.store, url, resp.content, resp.headers)
+
+        return resp
+
+    async def head(self, url, **kwargs):
+        """
+        Send a HEAD request, it is never cached
+
+        :param url: string
+        :return: httpx.Response
+        """
+        return await self._send(url, method="HEAD", **kwargs)
+
+    async def _send(self, url, method="GET", **kwargs):
+        """
+        Send a request, retrying transient failures according to the retry policy
+
+        A response with an error status is returned once the request is not retried anymore, a transport error is
+        raised. A request that would wait longer for the circuit breaker of its host than its retry delay allows gives
+        up instead.
+
+        :param url: string
+        :param method: string
+        :return: httpx.Response
+        """
+        if self.retry is None:
+            return await self._send_once(url, method, **kwargs)
+
+        self.retry.record_request()
+        breaker = self.retry.get_breaker(urlsplit(url).netloc)
+        attempt = 0
+
+        while True:
+            probe = await breaker.wait(self.retry.get_breaker_wait(attempt)) if breaker is not None else False
+            attempt += 1
+            resp = error = None
+
+            try:
+                resp = await self._send_once(url, method, **kwargs)
+            except httpx.TransportError as e:
+                error = e
+            except asyncio.CancelledError:
+                if probe:
+                    breaker.abandon_probe()
+                raise
+
+            if not self.retry.is_retryable(resp, error):
+                if error is not None:
+                    if probe:
+                        breaker.abandon_probe()
+                    raise error
+                if breaker is not None:
+                    breaker.record_success(probe)
+                return resp
+
+            retry_after = parse_retry_after(resp.headers.get("Retry-After")) if resp is not None else None
+            if breaker is not None:
+                breaker.record_failure(retry_after, probe)
+
+            paused = breaker.open_until - time.monotonic() if breaker is not None and breaker.is_open else 0.0
+            delay = self.retry.get_delay(attempt, retry_after, paused)
+            if delay is None:
+                if error is not None:
+                    raise error
+                return resp
+
+            await asyncio.sleep(delay)
+
+    async def _send_once(self, url, method="GET", **kwargs):
+        """
+        Send a request over a pooled connection
+
+        :param url: string
+        :param method: string
+        :return: httpx.Response
+        """
+        if self.limiter is None:
+            async with self._host_semaphore(url):
+                return await self._request(method, url, **kwargs)
+
+        async with self.limiter, self._host_semaphore(url):
+            start = time.monotonic()
+            try:
+                resp = await self._request(method, url, **kwargs)
+            except httpx.TransportError:
+                self.limiter.record_error()
+                raise
+
+            self.limiter.record(time.monotonic() - start, resp.status_code)
+            return resp
+
+    async def _request(self, method, url, **kwargs):
+        """
+        Exchange a request with the index, hedged according to the hedge policy
+
+        The hedge is sent to the mirror of the policy, it does not wait for the limiter and the host semaphore that
+        the request already holds.
+
+        :param method: string
+        :param url: string
+        :return: httpx.Response
+        """
+        hedge = self.hedge
+        if hedge is None:
+            return await self._request_once(method, url, **kwargs)
+
+        return await hedge.run(
+            lambda: self._request_once(method, url, **kwargs),
+            lambda: self._request_once(method, hedge.get_url(url, self.index.index_url), **kwargs),
+        )
+
+    async def _request_once(self, method, url, **kwargs):
+        """
+        Exchange a request with the index, traced as request phase
+
+        :param method: string
+        :param url: string
+        :return: httpx.Response
+        """
+        connection_trace = get_connection_trace()
+        if connection_trace is not None:
+            kwargs["extensions"] = {**kwargs.get("extensions", {}), "trace": connection_trace}
+
+        with trace_phase(PHASE_REQUEST) as span:
+            resp = await self.client.request(method, url, **kwargs)
+            span.size = resp.num_bytes_downloaded
+
+        return resp
+
+    async def run_in_executor(self, func, *args):
+        """
+        Run a CPU-bound function in the executor of the session, or directly if there is none
+
+        :param func: callable, has to be picklable for a process pool
+        :return: result of the function
+        """
+        if self.executor is None:
+            return func(*args)
+
+        return await asyncio.get_running_loop().run_in_executor(self.executor, func, *args)
+
+    async def coalesce(self, key, factory):
+        """
+        Run a lookup only once for all concurrent callers with the same key
+
+        The first caller starts the lookup, callers arriving while it is in flight wait for the same result. A caller
+        that is cancelled does not cancel the lookup for the others, the lookup is only cancelled once all of its
+        callers are, so it does not keep requests running that nobody waits for. The last caller is cancelled once the
+        lookup is.
+
+        :param key: hashable
+        :param factory: callable returning the awaitable lookup
+        :return: result of the lookup
+        """
+        task = self._in_flight.get(key)
+
+        if task is None:
+            task = asyncio.ensure_future(factory())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done: self._lookup_done(key, done))
+
+        self._waiters[task] = self._waiters.get(task, 0) + 1
+        try:
+            return await asyncio.shield(task)
+        finally:
+            self._waiters[task] -= 1
+            if not self._waiters[task]:
+                del self._waiters[task]
+                if not task.done():
+                    # The last caller is gone, later callers start a new lookup instead of joining a cancelled one
+                    if self._in_flight.get(key) is task:
+                        del self._in_flight[key]
+                    task.cancel()
+
+                    # Its requests release their limiter and host slots before the cancellation of the caller completes
+                    await asyncio.gather(task, return_exceptions=True)
+
+    def _lookup_done(self, key, task):
+        """
+        Remove a finished lookup from the in-flight table
+
+        :param key: hashable
+        :param task: asyncio.Task
+        """
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+
+        # Mark the exception as retrieved in case all callers were cancelled
+        if not task.cancelled():
+            task.exception()
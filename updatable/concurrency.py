@@ -0,0 +1,148 @@
+import asyncio
+import time
+from collections import deque
+
+__all__ = [
+    "AdaptiveLimiter",
+]
+
+DEFAULT_MIN_CONCURRENCY = 1
+DEFAULT_MAX_CONCURRENCY = 20
+
+
+def _is_overload_status(status_code):
+    """
+    Checks if the status code signals an overloaded or rate limiting server
+
+    :param status_code: int
+    :return: bool
+    """
+    return status_code == 429 or status_code >= 500
+
+
+class AdaptiveLimiter:
+    """
+    Limits the number of in-flight requests using additive increase / multiplicative decrease (AIMD)
+
+    Every successful response grows the limit by roughly one slot per round-trip. A 429 or 5xx response
+    or a transport error shrinks the limit by `backoff_ratio`, at most once per round-trip so that a
+    burst of failures from the same window does not collapse the limit to the minimum.
+
+    Latency alone is not an overload signal: project documents differ in size by orders of magnitude,
+    so a single large download would otherwise shrink the limit of an index that is not overloaded.
+    """
+
+    def __init__(
+        self,
+        min_limit=DEFAULT_MIN_CONCURRENCY,
+        max_limit=DEFAULT_MAX_CONCURRENCY,
+        initial_limit=None,
+        backoff_ratio=0.5,
+        smoothing=0.2,
+    ):
+        """
+        :param min_limit: int, lower bound of in-flight requests
+        :param max_limit: int, upper bound of in-flight requests
+        :param initial_limit: int, starting limit, defaults to the middle of both bounds
+        :param backoff_ratio: float, factor applied to the limit on overload
+        :param smoothing: float, weight of a new sample in the smoothed latency
+        """
+        if min_limit < 1 or max_limit < min_limit:
+            raise ValueError("Concurrency bounds must satisfy 1 <= min_limit <= max_limit!")
+
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff_ratio = backoff_ratio
+        self.smoothing = smoothing
+
+        if initial_limit is None:
+            initial_limit = (min_limit + max_limit) // 2
+        self.limit = float(min(max(initial_limit, min_limit), max_limit))
+
+        self.in_flight = 0
+        self._waiters = deque()
+        self._latency = None
+        self._last_decrease = None
+
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, *args):
+        self.release()
+
+    async def acquire(self):
+        """
+        Wait until a request slot is available
+        """
+        if not self._waiters and self.in_flight < int(self.limit):
+            self.in_flight += 1
+            return
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was granted just before the cancellation, hand it over
+                self.release()
+            else:
+                self._waiters.remove(waiter)
+            raise
+
+    def release(self):
+        """
+        Return a request slot
+        """
+        self.in_flight -= 1
+        self._wake_waiters()
+
+    def _wake_waiters(self):
+        """
+        Grant free slots to waiting requests
+        """
+        while self._waiters and self.in_flight < int(self.limit):
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(None)
+
+    def record(self, latency, status_code):
+        """
+        Adjust the limit based on a finished request
+
+        :param latency: float, seconds
+        :param status_code: int
+        """
+        if _is_overload_status(status_code):
+            self._decrease()
+            return
+
+        # The smoothed latency is the round-trip that decreases are spaced by
+        if self._latency is None:
+            self._latency = latency
+        else:
+            self._latency += self.smoothing * (latency - self._latency)
+
+        self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+        self._wake_waiters()
+
+    def record_error(self):
+        """
+        Adjust the limit after a request failed on the transport level
+        """
+        self._decrease()
+
+    def _decrease(self):
+        """
+        Shrink the limit, at most once per smoothed round-trip
+        """
+        now = time.monotonic()
+        round_trip = self._latency or 0
+
+        if self._last_decrease is not None and now - self._last_decrease < round_trip:
+            return
+
+        self._last_decrease = now
+        self.limit = max(self.min_limit, self.limit * self.backoff_ratio)
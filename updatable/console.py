@@ -1,7 +1,25 @@
 import argparse
 import asyncio
 import datetime
+import os
+import sys
+from contextlib import aclosing
 
+from packaging.utils import canonicalize_name
+
+from updatable import cache as updatable_cache
+from updatable import client as updatable_client
+from updatable import concurrency as updatable_concurrency
+from updatable import decode as updatable_decode
+from updatable import executor as updatable_executor
+from updatable import fleet as updatable_fleet
+from updatable import gate as updatable_gate
+from updatable import hedge as updatable_hedge
+from updatable import index as updatable_index
+from updatable import retry as updatable_retry
+from updatable import server as updatable_server
+from updatable import snapshot as updatable_snapshot
+from updatable import tracing as updatable_tracing
 from updatable import utils as updatable_utils
 
 
@@ -21,16 +39,101 @@ def _str_to_bool(value):
         raise argparse.ArgumentTypeError("Boolean value expected!")
 
 
-async def _list_package_updates(package_name, version, show_pre_releases=False):
+async def _get_package_updates(package_name, version, show_pre_releases=False, session=None):
+    """
+    Function used to look up the updates of a package displayed in console
+
+    The license of the current release is only needed if updates are displayed, its release document is not
+    requested otherwise.
+
+    :param package_name: string
+    :param version: string
+    :param show_pre_releases: bool
+    :param session: updatable.client.Session
+    :return: dict
+    """
+    updates = await updatable_utils.get_package_update_list(package_name, version, session=session, lazy=True)
+
+    if _has_displayed_updates(updates, show_pre_releases):
+        await updatable_utils.resolve_current_release(updates, package_name, version, session=session)
+
+    return updates
+
+
+async def _iter_package_updates(packages, show_pre_releases=False, session=None, deadline=None):
+    """
+    Yields the updates of packages displayed in console as soon as they are available
+
+    :param packages: dict[]
+    :param show_pre_releases: bool
+    :param session: updatable.client.Session
+    :param deadline: float, seconds until unfinished lookups are reported as timed out
+    :return: async iterator of (package, updates or None or IndexRequestError)
+    """
+    lookups = [
+        _get_package_updates(package["package"], package["version"], show_pre_releases, session) for package in packages
+    ]
+
+    # Closed explicitly, so the pending lookups are cancelled as soon as the iteration is stopped
+    async with aclosing(updatable_utils.as_completed_until(lookups, deadline)) as results:
+        async for position, updates in results:
+            yield packages[position], updates
+
+
+def _is_failed(updates):
+    """
+    Checks if the lookup of a package failed, see `updatable.utils.iter_package_updates`
+
+    :param updates: dict, None or updatable.index.IndexRequestError
+    :return: bool
+    """
+    return isinstance(updates, updatable_index.IndexRequestError)
+
+
+def _has_displayed_updates(updates, show_pre_releases=False):
+    """
+    Checks if the updates of a package are displayed in console
+
+    :param updates: dict
+    :param show_pre_releases: bool
+    :return: bool
+    """
+    return bool(updates["newer_releases"] or (show_pre_releases and updates["pre_releases"]))
+
+
+def _print_package_updates(package_name, version, updates, show_pre_releases=False):
+    """
+    Function used to print the updates of a package in console
+
+    :param package_name: string
+    :param version: string
+    :param updates: dict
+    :param show_pre_releases: bool
     """
-    Function used to list all package updates in console
+    with updatable_tracing.trace_phase(updatable_tracing.PHASE_RENDER, package_name):
+        _render_package_updates(package_name, version, updates, show_pre_releases)
+
+
+def _render_package_updates(package_name, version, updates, show_pre_releases=False):
+    """
+    Function used to render the updates of a package in console
 
     :param package_name: string
     :param version: string
-    :param show_pre_releases bool
+    :param updates: dict, None if the lookup timed out or the IndexRequestError if it failed
+    :param show_pre_releases: bool
     """
-    updates = await updatable_utils.get_package_update_list(package_name, version)
-    has_displayed_updates = updates["newer_releases"] or (show_pre_releases and updates["pre_releases"])
+    if updates is None:
+        print(f"{package_name} ({version}) - Timed out")
+        print("___")
+        return
+
+    if _is_failed(updates):
+        print(f"{package_name} ({version}) - Failed: {updates}")
+        print("___")
+        return
+
+    has_displayed_updates = _has_displayed_updates(updates, show_pre_releases)
     current_release_license = updates["current_release_license"]
 
     if has_displayed_updates:
@@ -84,6 +187,13 @@ def _argument_parser():
         default=None,
         help="Requirements file",
     )
+    parser.add_argument(
+        "--fleet",
+        nargs="+",
+        default=None,
+        metavar="SOURCE",
+        help="Requirements files, globs or interpreter paths checked together in one run",
+    )
     parser.add_argument(
         "-pr",
         "--pre-releases",
@@ -92,6 +202,209 @@ def _argument_parser():
         default=False,
         help="Show pre-releases",
     )
+    parser.add_argument(
+        "--sorted",
+        nargs="?",
+        const=True,
+        type=_str_to_bool,
+        default=False,
+        help="Print packages in the order of the requirements instead of as soon as they are checked",
+    )
+    parser.add_argument(
+        "--fail-on",
+        choices=updatable_gate.FAIL_ON_LEVELS,
+        default=None,
+        help=(
+            "Gate mode: exit with 1 as soon as a package has an update of at least this level, 0 if there is none and "
+            "3 if lookups timed out"
+        ),
+    )
+    parser.add_argument(
+        "--index-url",
+        default=None,
+        help="Base url of the package index api, e.g. of a mirror",
+    )
+    parser.add_argument(
+        "--index-api",
+        choices=sorted(updatable_index.INDEX_BACKENDS),
+        default="json",
+        help="Package index api: the PyPI JSON API or the JSON simple repository API (PEP 691)",
+    )
+    parser.add_argument(
+        "--json-decoder",
+        choices=sorted(updatable_decode.JSON_DECODERS),
+        default=None,
+        help=(
+            "Decoder of PyPI JSON API documents: orjson (default if installed), json or stream (requires ijson, "
+            "least memory for huge documents)"
+        ),
+    )
+    parser.add_argument(
+        "--max-connections",
+        type=int,
+        default=updatable_client.DEFAULT_MAX_CONNECTIONS,
+        help="Maximum number of pooled connections",
+    )
+    parser.add_argument(
+        "--max-connections-per-host",
+        type=int,
+        default=updatable_client.DEFAULT_MAX_CONNECTIONS_PER_HOST,
+        help="Maximum number of concurrent requests to a single host",
+    )
+    parser.add_argument(
+        "--http2",
+        nargs="?",
+        const=True,
+        type=_str_to_bool,
+        default=False,
+        help="Use HTTP/2 (requires the h2 package)",
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=updatable_client.DEFAULT_TIMEOUT,
+        help="Seconds to wait for a connection and for each read of a response, 0 to wait forever",
+    )
+    parser.add_argument(
+        "--deadline",
+        type=float,
+        default=None,
+        help="Seconds after which unfinished lookups are given up and reported as timed out",
+    )
+    parser.add_argument(
+        "--retries",
+        type=int,
+        default=updatable_retry.DEFAULT_MAX_RETRIES,
+        help="Retries of requests failing with rate limiting, server or connection errors",
+    )
+    parser.add_argument(
+        "--circuit-breaker",
+        type=int,
+        default=updatable_retry.DEFAULT_FAILURE_THRESHOLD,
+        help="Failures in a row that pause the requests to a host, 0 to disable",
+    )
+    parser.add_argument(
+        "--hedge",
+        nargs="?",
+        const=True,
+        type=_str_to_bool,
+        default=False,
+        help="Send a second request for index requests slower than a latency percentile of the run",
+    )
+    parser.add_argument(
+        "--hedge-percentile",
+        type=float,
+        default=updatable_hedge.DEFAULT_HEDGE_PERCENTILE,
+        help="Latency percentile after which a request is hedged",
+    )
+    parser.add_argument(
+        "--hedge-max-percent",
+        type=float,
+        default=updatable_hedge.DEFAULT_HEDGE_MAX_PERCENT,
+        help="Upper bound of the percentage of requests that are hedged",
+    )
+    parser.add_argument(
+        "--hedge-index-url",
+        default=None,
+        help="Base url of a mirror the hedges are sent to, uses the api of --index-api",
+    )
+    parser.add_argument(
+        "--min-concurrency",
+        type=int,
+        default=updatable_concurrency.DEFAULT_MIN_CONCURRENCY,
+        help="Lower bound of concurrent lookups",
+    )
+    parser.add_argument(
+        "--max-concurrency",
+        type=int,
+        default=updatable_concurrency.DEFAULT_MAX_CONCURRENCY,
+        help="Upper bound of concurrent lookups",
+    )
+    parser.add_argument(
+        "--executor",
+        choices=updatable_executor.EXECUTORS,
+        default=updatable_executor.EXECUTOR_AUTO,
+        help=(
+            "Pool categorizing large projects off the event loop: threads on free-threaded builds (auto), none, "
+            "thread or process"
+        ),
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Number of threads or processes of the executor, the number of CPUs by default",
+    )
+    parser.add_argument(
+        "--cache",
+        nargs="?",
+        const=True,
+        type=_str_to_bool,
+        default=True,
+        help="Cache index responses on disk",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        default=None,
+        help="Cache directory",
+    )
+    parser.add_argument(
+        "--cache-ttl",
+        type=float,
+        default=updatable_cache.DEFAULT_TTL,
+        help="Seconds a cached response is used without revalidation",
+    )
+    parser.add_argument(
+        "--cache-max-size",
+        type=int,
+        default=updatable_cache.DEFAULT_MAX_SIZE // (1024 * 1024),
+        help="Maximum cache size in MB",
+    )
+    parser.add_argument(
+        "--incremental",
+        nargs="?",
+        const=True,
+        type=_str_to_bool,
+        default=False,
+        help="Reuse the results of the previous run for projects whose serial did not change",
+    )
+    parser.add_argument(
+        "--stats",
+        nargs="?",
+        const=True,
+        type=_str_to_bool,
+        default=False,
+        help="Print the time spent per phase, the slowest packages and the bytes received",
+    )
+    parser.add_argument(
+        "--stats-top",
+        type=int,
+        default=10,
+        help="Number of slowest packages printed by --stats",
+    )
+
+    commands = parser.add_subparsers(dest="command", metavar="COMMAND")
+    serve_parser = commands.add_parser(
+        "serve",
+        help="Serve the update information over HTTP/JSON, refreshed in the background",
+    )
+    serve_parser.add_argument(
+        "--host",
+        default=updatable_server.DEFAULT_HOST,
+        help="Address to listen on",
+    )
+    serve_parser.add_argument(
+        "--port",
+        type=int,
+        default=updatable_server.DEFAULT_PORT,
+        help="Port to listen on",
+    )
+    serve_parser.add_argument(
+        "--refresh-interval",
+        type=float,
+        default=updatable_server.DEFAULT_REFRESH_INTERVAL,
+        help="Seconds between two refreshes",
+    )
 
     return parser
 
@@ -99,28 +412,372 @@ def _argument_parser():
 async def _updatable():
     """
     Function used to output packages update information in the console
+
+    :return: int, exit code of the gate mode, `None` otherwise
+    """
+    parser = _argument_parser()
+    args = parser.parse_args()
+
+    stats = None
+    if args.stats:
+        stats = updatable_tracing.StatsCollector()
+        updatable_tracing.add_tracer(stats)
+
+    try:
+        exit_code = await _check_updates(parser, args)
+    finally:
+        if stats is not None:
+            updatable_tracing.remove_tracer(stats)
+
+    if stats is not None:
+        _print_stats(stats, args.stats_top)
+
+    return exit_code
+
+
+async def _check_updates(parser, args):
+    """
+    Function used to check the packages selected by the console arguments
+
+    :param parser: argparse.ArgumentParser
+    :param args: argparse.Namespace
+    :return: int, exit code of the gate mode, `None` otherwise
     """
-    args = _argument_parser().parse_args()
+    try:
+        limiter = updatable_concurrency.AdaptiveLimiter(
+            min_limit=args.min_concurrency,
+            max_limit=args.max_concurrency,
+        )
+    except ValueError as e:
+        parser.error(str(e))
+
+    try:
+        retry = updatable_retry.RetryPolicy(
+            max_retries=args.retries,
+            failure_threshold=args.circuit_breaker or None,
+        )
+    except ValueError as e:
+        parser.error(str(e))
+
+    hedge = None
+    if args.hedge:
+        try:
+            hedge = updatable_hedge.HedgePolicy(
+                percentile=args.hedge_percentile,
+                max_ratio=args.hedge_max_percent / 100,
+                mirror_url=args.hedge_index_url,
+            )
+        except ValueError as e:
+            parser.error(str(e))
+
+    if args.workers is not None and args.workers < 1:
+        parser.error("--workers must be at least 1")
+
+    if args.timeout < 0 or (args.deadline is not None and args.deadline <= 0):
+        parser.error("--timeout can not be negative and --deadline has to be positive")
+
+    if args.json_decoder and not updatable_decode.is_decoder_available(args.json_decoder):
+        module = updatable_decode.JSON_DECODERS[args.json_decoder][2]
+        parser.error(f"--json-decoder {args.json_decoder} requires the {module} package")
+
+    if args.command == "serve" and args.fleet:
+        parser.error("--fleet can not be combined with serve")
+
+    if args.command == "serve" and args.fail_on:
+        parser.error("--fail-on can not be combined with serve")
 
     # Get list of packages
-    if args.file:
+    if args.command == "serve":
+        packages = None
+    elif args.fleet:
+        try:
+            fleet_packages = updatable_fleet.get_fleet_packages(
+                updatable_fleet.expand_sources(args.fleet),
+                cache=args.cache,
+                cache_directory=args.cache_dir,
+            )
+        except OSError as e:
+            parser.error(str(e))
+    elif args.file:
         packages = updatable_utils.parse_requirements_list(args.file)
     else:
-        packages = updatable_utils.get_parsed_environment_package_list()
+        packages = updatable_utils.get_parsed_environment_package_list(cache=args.cache, cache_directory=args.cache_dir)
+
+    cache = None
+    if args.cache:
+        cache = updatable_cache.DiskCache(
+            directory=args.cache_dir,
+            ttl=args.cache_ttl,
+            max_size=args.cache_max_size * 1024 * 1024,
+        )
 
-    # Output updates
-    tasks = []
-    for package in packages:
-        tasks.append(
-            asyncio.create_task(_list_package_updates(package["package"], package["version"], args.pre_releases)),
+    snapshots = None
+    if args.incremental:
+        snapshots = updatable_snapshot.SnapshotStore(
+            directory=os.path.join(args.cache_dir, "snapshots") if args.cache_dir else None,
         )
 
-    for task in tasks:
-        await task
+    session = updatable_client.Session(
+        max_connections=args.max_connections,
+        max_keepalive_connections=args.max_connections,
+        max_connections_per_host=args.max_connections_per_host,
+        timeout=args.timeout or None,
+        http2=args.http2,
+        limiter=limiter,
+        retry=retry,
+        hedge=hedge,
+        cache=cache,
+        index=updatable_index.get_index_backend(args.index_api, args.index_url, args.json_decoder),
+        snapshots=snapshots,
+        executor=updatable_executor.create_executor(args.executor, args.workers),
+    )
+
+    try:
+        # Output updates, all lookups share the connections of a single session
+        async with session:
+            if args.command == "serve":
+                await _serve(args, session)
+                return
+
+            if args.fail_on:
+                if args.fleet:
+                    packages = [package for packages in fleet_packages.values() for package in packages]
+                return await _updatable_gate(packages, args, session)
+
+            if args.fleet:
+                return await _updatable_fleet(fleet_packages, args.pre_releases, session, args.deadline)
+
+            results = _iter_package_updates(packages, args.pre_releases, session, args.deadline)
+
+            if args.sorted:
+                results = _in_order(results, packages)
+
+            incomplete = False
+            # Closed explicitly, so the pending lookups are cancelled at once if printing fails
+            async with aclosing(results):
+                async for package, updates in results:
+                    _print_package_updates(package["package"], package["version"], updates, args.pre_releases)
+                    incomplete = incomplete or updates is None or _is_failed(updates)
+
+            # The results of the other packages are complete, the run still has to fail
+            return updatable_gate.EXIT_INCOMPLETE if incomplete else None
+    finally:
+        if session.executor is not None:
+            session.executor.shutdown(cancel_futures=True)
+
+
+def _format_size(size):
+    """
+    Returns a human readable size
+
+    :param size: int, bytes
+    :return: string
+    """
+    for unit in ("B", "KB", "MB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
+
+
+def _print_stats(stats, top=10):
+    """
+    Function used to print the time spent per phase and the slowest packages in console
+
+    :param stats: updatable.tracing.StatsCollector
+    :param top: int, number of slowest packages
+    """
+    print("== Stats ==")
+    print(f"  {'Phase':<12} {'Count':>8} {'Total':>10} {'Max':>10}")
+    for phase, (count, total, slowest) in stats.get_phase_totals().items():
+        print(f"  {phase:<12} {count:>8} {total:>9.2f}s {slowest:>9.2f}s")
+    print(f"  Received: {_format_size(stats.bytes_received)}")
+
+    slowest_packages = stats.get_slowest_packages(top)
+    if slowest_packages:
+        print("  Slowest packages:")
+        for package_name, duration in slowest_packages:
+            print(f"  -- {package_name} in {duration:.2f}s")
+    print("___")
+
+
+async def _in_order(results, packages):
+    """
+    Buffers streamed results, so they are yielded in the order of the packages
+
+    Each result is yielded as soon as the results of all previous packages are available.
+
+    :param results: async iterator of (package, updates)
+    :param packages: dict[]
+    """
+    positions = {id(package): position for position, package in enumerate(packages)}
+    buffered = {}
+    next_position = 0
+
+    async with aclosing(results):
+        async for package, updates in results:
+            buffered[positions[id(package)]] = (package, updates)
+
+            while next_position in buffered:
+                yield buffered.pop(next_position)
+                next_position += 1
+
+
+async def _updatable_fleet(fleet_packages, show_pre_releases=False, session=None, deadline=None):
+    """
+    Function used to output the update information of several sources in the console
+
+    Each project is looked up once for all sources. The updates are printed per source, followed by the versions of
+    outdated projects pinned by the sources.
+
+    :param fleet_packages: dict, {source: packages}
+    :param show_pre_releases: bool
+    :param session: updatable.client.Session
+    :param deadline: float, seconds until unfinished lookups are reported as timed out
+    :return: int, exit code if lookups timed out or failed, `None` otherwise
+    """
+    fleet_updates = await updatable_fleet.get_fleet_updates(fleet_packages, session=session, deadline=deadline)
+
+    for source, packages in fleet_packages.items():
+        print(f"== {source} ==")
+        for package in packages:
+            updates = fleet_updates[(canonicalize_name(package["package"]), package["version"])]
+            _print_package_updates(package["package"], package["version"], updates, show_pre_releases)
+
+    _print_pinned_versions(updatable_fleet.get_pinned_versions(fleet_packages), fleet_updates)
+
+    if any(updates is None or _is_failed(updates) for updates in fleet_updates.values()):
+        return updatable_gate.EXIT_INCOMPLETE
+
+
+async def _updatable_gate(packages, args, session):
+    """
+    Function used to check whether any package has an update of the level given by --fail-on
+
+    Only the first qualifying package is printed, the other lookups are cancelled. Packages that were outdated in
+    previous runs are checked first, the history is kept in the cache directory.
+
+    :param packages: dict[]
+    :param args: argparse.Namespace
+    :param session: updatable.client.Session
+    :return: int, exit code
+    """
+    history = updatable_gate.GateHistory(args.cache_dir) if args.cache else None
+
+    try:
+        found, unfinished = await updatable_gate.find_qualifying_update(
+            packages,
+            args.fail_on,
+            session=session,
+            pre_releases=args.pre_releases,
+            deadline=args.deadline,
+            history=history,
+        )
+    finally:
+        if history is not None:
+            history.save()
+
+    if found is not None:
+        package, updates = found
+        try:
+            await updatable_utils.resolve_current_release(
+                updates, package["package"], package["version"], session=session
+            )
+        except updatable_index.IndexRequestError:
+            # The qualifying update is known, only its license is not
+            updates["current_release"] = updates["current_release_license"] = ""
+        _print_package_updates(package["package"], package["version"], updates, args.pre_releases)
+        return updatable_gate.EXIT_UPDATES
+
+    for package, updates in unfinished:
+        _print_package_updates(package["package"], package["version"], updates)
+
+    return updatable_gate.EXIT_INCOMPLETE if unfinished else updatable_gate.EXIT_OK
+
+
+def _print_pinned_versions(pinned_versions, fleet_updates):
+    """
+    Function used to print which sources pin which version of outdated projects in console
+
+    :param pinned_versions: dict, {canonical name: {version: source[]}}
+    :param fleet_updates: dict, {(canonical name, version): update information, None if it timed out or the
+        IndexRequestError if it failed}
+    """
+    print("== Pinned versions ==")
+
+    for package_name, versions in sorted(pinned_versions.items()):
+        outdated = [
+            version
+            for version in versions
+            if fleet_updates[(package_name, version)] is not None
+            and not _is_failed(fleet_updates[(package_name, version)])
+            and fleet_updates[(package_name, version)]["newer_releases"]
+        ]
+        if not outdated:
+            continue
+
+        latest_release = fleet_updates[(package_name, outdated[0])]["latest_release"]
+        print(f"{package_name} - Latest: {latest_release}")
+        for version, sources in versions.items():
+            state = " (outdated)" if version in outdated else ""
+            print(f"  -- {version}{state}: {', '.join(sources)}")
+        print("___")
+
+
+def _get_package_loader(args):
+    """
+    Returns a function reading the packages of the requirements file or of the environment
+
+    :param args: argparse.Namespace
+    :return: callable returning dict[]
+    """
+    if args.file:
+        path = args.file.name
+        args.file.close()
+
+        def load_packages():
+            with open(path) as f:
+                return updatable_utils.parse_requirements_list(f)
+
+        return load_packages
+
+    return lambda: updatable_utils.get_parsed_environment_package_list(cache=args.cache, cache_directory=args.cache_dir)
+
+
+async def _serve(args, session):
+    """
+    Function used to serve the update information until interrupted
+
+    The packages are read again on every refresh, so changes of the requirements file or the environment are picked
+    up without a restart.
+
+    :param args: argparse.Namespace
+    :param session: updatable.client.Session
+    """
+    service = updatable_server.UpdateService(
+        _get_package_loader(args),
+        session,
+        refresh_interval=args.refresh_interval,
+    )
+    server = updatable_server.UpdateServer(service)
+
+    await server.start(args.host, args.port)
+    print(f"Serving on http://{args.host}:{server.port}", flush=True)
+
+    try:
+        await service.run()
+    finally:
+        await server.aclose()
 
 
 def main():  # pragma: no cover
     t0 = datetime.datetime.now()
-    asyncio.run(_updatable())
+    try:
+        exit_code = asyncio.run(_updatable())
+    except KeyboardInterrupt:
+        return
     dt = datetime.datetime.now() - t0
     print(f"Done in {dt.total_seconds():.2f} sec.")
+
+    if exit_code:
+        sys.exit(exit_code)
@@ -0,0 +1,183 @@
+import json
+from importlib.util import find_spec
+
+__all__ = [
+    "JSON_DECODERS",
+    "is_decoder_available",
+    "get_default_decoder",
+    "decode_project",
+    "decode_release",
+]
+
+
+def _reduce_info(info):
+    """
+    Returns the fields of the info object updatable uses
+
+    :param info: dict
+    :return: dict
+    """
+    return {"version": info.get("version"), "license": info.get("license")}
+
+
+def _reduce_project(document):
+    """
+    Returns a project document reduced to the fields updatable uses
+
+    :param document: dict
+    :return: dict
+    """
+    return {
+        "info": _reduce_info(document.get("info") or {}),
+        "releases": {
+            release: [{"upload_time": files[0].get("upload_time")}] if files else []
+            for release, files in (document.get("releases") or {}).items()
+        },
+        "last_serial": document.get("last_serial"),
+    }
+
+
+def _decode_project_json(content):
+    return _reduce_project(json.loads(content))
+
+
+def _decode_release_json(content):
+    return {"info": _reduce_info(json.loads(content).get("info") or {})}
+
+
+def _decode_project_orjson(content):
+    import orjson
+
+    return _reduce_project(orjson.loads(content))
+
+
+def _decode_release_orjson(content):
+    import orjson
+
+    return {"info": _reduce_info(orjson.loads(content).get("info") or {})}
+
+
+def _decode_project_stream(content):
+    """
+    Extract the fields updatable uses from the events of an incremental parser
+
+    Only the values of these fields are created, the digests, urls and descriptions of the document are skipped.
+
+    :param content: bytes
+    :return: dict
+    """
+    import ijson
+
+    info = {"version": None, "license": None}
+    releases = {}
+    last_serial = None
+    files = None
+    upload_time_prefix = None
+
+    for prefix, event, value in ijson.parse(content):
+        if event == "map_key":
+            if prefix == "releases":
+                files = releases[value] = []
+                upload_time_prefix = f"releases.{value}.item.upload_time"
+            continue
+
+        if prefix == upload_time_prefix:
+            # Only the first file of a release is used
+            if not files:
+                files.append({"upload_time": value})
+        elif prefix == "info.version" or prefix == "info.license":
+            info[prefix[5:]] = value
+        elif prefix == "last_serial" and event == "number":
+            last_serial = int(value)
+
+    return {"info": info, "releases": releases, "last_serial": last_serial}
+
+
+def _decode_release_stream(content):
+    import ijson
+
+    info = {"version": None, "license": None}
+    for prefix, _event, value in ijson.parse(content):
+        if prefix == "info.version" or prefix == "info.license":
+            info[prefix[5:]] = value
+
+    return {"info": info}
+
+
+# name: (project decoder, release decoder, required module)
+JSON_DECODERS = {
+    "json": (_decode_project_json, _decode_release_json, None),
+    "orjson": (_decode_project_orjson, _decode_release_orjson, "orjson"),
+    "stream": (_decode_project_stream, _decode_release_stream, "ijson"),
+}
+
+
+def is_decoder_available(name):
+    """
+    Checks if the module required by a decoder is installed
+
+    :param name: string, one of `JSON_DECODERS`
+    :return: bool
+    """
+    module = JSON_DECODERS[name][2]
+    return module is None or find_spec(module) is not None
+
+
+def get_default_decoder():
+    """
+    Returns the fastest installed decoder, `orjson` if it is installed
+
+    The `stream` decoder is never picked by default, it uses the least memory but is slower than the others.
+
+    :return: string
+    """
+    return "orjson" if is_decoder_available("orjson") else "json"
+
+
+def _get_decoder(name, position):
+    """
+    Returns a decoder function
+
+    :param name: string or None for the default decoder
+    :param position: int, 0 for projects, 1 for releases
+    :return: callable
+    """
+    name = name or get_default_decoder()
+
+    try:
+        decoder = JSON_DECODERS[name]
+    except KeyError:
+        raise ValueError(f"Unknown JSON decoder {name!r}!")
+
+    if not is_decoder_available(name):
+        raise RuntimeError(f"The JSON decoder {name!r} requires the `{decoder[2]}` package!")
+
+    return decoder[position]
+
+
+def decode_project(content, decoder=None):
+    """
+    Returns a project document of the PyPI JSON API reduced to the fields updatable uses
+
+    {info: {version, license}, releases: {version: [{upload_time}]}, last_serial}
+
+    Only the upload time of the first file of every release is kept.
+
+    :param content: bytes
+    :param decoder: string, one of `JSON_DECODERS`, defaults to `get_default_decoder()`
+    :return: dict
+    """
+    return _get_decoder(decoder, 0)(content)
+
+
+def decode_release(content, decoder=None):
+    """
+    Returns a release document of the PyPI JSON API reduced to the fields updatable uses
+
+    {info: {version, license}}
+
+    :param content: bytes
+    :param decoder: string, one of `JSON_DECODERS`, defaults to `get_default_decoder()`
+    :return: dict
+    """
+    return _get_decoder(decoder, 1)(content)
@@ -0,0 +1,156 @@
+import hashlib
+import json
+import os
+import sys
+from importlib.metadata import distributions
+
+from packaging.utils import canonicalize_name
+
+from updatable.cache import default_cache_directory, write_atomic
+
+__all__ = [
+    "scan_environment",
+]
+
+# Bump to invalidate scans stored by previous versions
+SCAN_CACHE_VERSION = 2
+
+
+def _get_skipped_packages():
+    """
+    Returns the packages `pip freeze` does not list by default
+
+    :return: set
+    """
+    skipped = {"pip"}
+
+    # pip stops hiding the build backends with Python 3.12
+    if sys.version_info < (3, 12):
+        skipped.update({"setuptools", "distribute", "wheel"})
+
+    return skipped
+
+
+def _is_direct_url(distribution):
+    """
+    Checks if a distribution was installed from a url (PEP 610), e.g. from VCS, a local wheel or an editable checkout
+
+    `pip freeze` lists those as `-e` or `name @ url` instead of `name==version`, a project of the same name on the
+    package index is not necessarily the same project.
+
+    :param distribution: importlib.metadata.Distribution
+    :return: bool
+    """
+    try:
+        direct_url = distribution.read_text("direct_url.json")
+    except OSError:
+        return False
+
+    if not direct_url:
+        return False
+
+    try:
+        return bool(json.loads(direct_url).get("url"))
+    except (ValueError, AttributeError):
+        return False
+
+
+def _scan_distributions(paths):
+    """
+    Returns `name==version` for all installed distributions found on the paths
+
+    :param paths: string[]
+    :return: string[]
+    """
+    skipped = _get_skipped_packages()
+    seen = set()
+    requirements = []
+
+    for distribution in distributions(path=paths):
+        name = distribution.metadata["Name"]
+        version = distribution.version
+        if not name or not version:
+            continue
+
+        # Like the import system, the first distribution on the path shadows later ones
+        canonical_name = canonicalize_name(name)
+        if canonical_name in seen:
+            continue
+        seen.add(canonical_name)
+
+        if canonical_name in skipped or _is_direct_url(distribution):
+            continue
+
+        requirements.append(f"{name}=={version}")
+
+    return sorted(requirements, key=str.lower)
+
+
+def _get_scan_key(paths):
+    """
+    Returns the modification times of the paths
+
+    Installing or removing a distribution adds or removes its metadata directory, which changes the modification
+    time of the directory it is installed in.
+
+    :param paths: string[]
+    :return: dict
+    """
+    key = {}
+
+    for path in paths:
+        try:
+            key[path] = os.stat(path).st_mtime_ns
+        except OSError:
+            key[path] = None
+
+    return key
+
+
+def _get_scan_cache_path(paths, cache_directory):
+    """
+    Returns the file storing the scan of the paths
+
+    :param paths: string[]
+    :param cache_directory: string
+    :return: string
+    """
+    environment = hashlib.sha256("\0".join([sys.executable, *paths]).encode("utf-8")).hexdigest()
+    return os.path.join(cache_directory, "environments", f"{environment}.json")
+
+
+def scan_environment(paths=None, cache=True, cache_directory=None):
+    """
+    Returns the requirements of all distributions installed in the environment, without running `pip freeze`
+
+    The scan is stored in the cache directory together with the modification times of the scanned paths. As long as
+    they do not change the stored scan is used.
+
+    :param paths: string[], defaults to `sys.path`
+    :param cache: bool, use and store cached scans
+    :param cache_directory: string, defaults to `updatable.cache.default_cache_directory()`
+    :return: string[], `name==version`
+    """
+    if paths is None:
+        paths = sys.path
+    paths = [os.path.abspath(path or os.curdir) for path in paths]
+
+    if not cache:
+        return _scan_distributions(paths)
+
+    cache_path = _get_scan_cache_path(paths, cache_directory or default_cache_directory())
+    key = _get_scan_key(paths)
+
+    try:
+        with open(cache_path, "rb") as f:
+            stored = json.load(f)
+        if stored["version"] == SCAN_CACHE_VERSION and stored["key"] == key:
+            return stored["requirements"]
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+
+    requirements = _scan_distributions(paths)
+    stored = {"version": SCAN_CACHE_VERSION, "key": key, "requirements": requirements}
+    write_atomic(cache_path, json.dumps(stored).encode("utf-8"))
+
+    return requirements
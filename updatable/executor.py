@@ -0,0 +1,74 @@
+import multiprocessing
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+__all__ = [
+    "EXECUTORS",
+    "is_free_threaded",
+    "get_default_workers",
+    "create_executor",
+]
+
+EXECUTOR_AUTO = "auto"
+EXECUTOR_NONE = "none"
+EXECUTOR_THREAD = "thread"
+EXECUTOR_PROCESS = "process"
+
+EXECUTORS = (EXECUTOR_AUTO, EXECUTOR_NONE, EXECUTOR_THREAD, EXECUTOR_PROCESS)
+
+
+def is_free_threaded():
+    """
+    Checks if threads of the interpreter run Python code in parallel, i.e. a free-threaded build without the GIL
+
+    :return: bool
+    """
+    is_gil_enabled = getattr(sys, "_is_gil_enabled", None)
+    return is_gil_enabled is not None and not is_gil_enabled()
+
+
+def get_default_workers():
+    """
+    Returns the number of CPUs the process may use
+
+    :return: int
+    """
+    if hasattr(os, "process_cpu_count"):
+        return os.process_cpu_count() or 1
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0)) or 1
+    return os.cpu_count() or 1
+
+
+def create_executor(kind=EXECUTOR_AUTO, workers=None):
+    """
+    Returns a pool running CPU-bound work, like the categorization of releases, off the event loop
+
+    `auto` picks a thread pool on free-threaded builds, where threads categorize in parallel, and no pool otherwise:
+    with the GIL a thread pool would only interleave categorization with the event loop. A process pool runs in
+    parallel with the GIL as well, but pays for transferring the project documents between processes.
+
+    :param kind: string, one of `EXECUTORS`
+    :param workers: int, defaults to `get_default_workers()`
+    :return: concurrent.futures.Executor or None to run the work on the event loop
+    """
+    if kind not in EXECUTORS:
+        raise ValueError(f"Unknown executor {kind!r}!")
+
+    if kind == EXECUTOR_AUTO:
+        kind = EXECUTOR_THREAD if is_free_threaded() else EXECUTOR_NONE
+
+    if workers is None:
+        workers = get_default_workers()
+    if workers < 1:
+        raise ValueError("The number of workers must be at least 1!")
+
+    if kind == EXECUTOR_THREAD:
+        return ThreadPoolExecutor(max_workers=workers, thread_name_prefix="updatable")
+    if kind == EXECUTOR_PROCESS:
+        # Forking a process that runs threads can deadlock, workers are started from a clean interpreter instead
+        method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+        return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context(method))
+
+    return None
@@ -0,0 +1,150 @@
+import glob
+import json
+import os
+from subprocess import check_output
+
+from packaging.utils import canonicalize_name
+
+from updatable import utils as updatable_utils
+from updatable.client import Session
+from updatable.environment import scan_environment
+from updatable.tracing import PHASE_ENVIRONMENT, trace_phase
+
+__all__ = [
+    "expand_sources",
+    "get_source_packages",
+    "get_fleet_packages",
+    "get_pinned_versions",
+    "get_fleet_updates",
+]
+
+_SYS_PATH_SCRIPT = "import json, sys; print(json.dumps(sys.path))"
+
+
+def _is_interpreter(path):
+    """
+    Checks if a path is a Python interpreter
+
+    :param path: string
+    :return: bool
+    """
+    name = os.path.basename(path).lower()
+    return os.path.isfile(path) and os.access(path, os.X_OK) and name.startswith(("python", "pypy"))
+
+
+def expand_sources(patterns):
+    """
+    Returns the sources matching a list of requirements files, globs or interpreter paths
+
+    Sources are returned in the given order without duplicates, patterns that do not match any file are kept, so
+    reading them reports the missing file.
+
+    :param patterns: string[]
+    :return: string[]
+    """
+    sources = []
+
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern, recursive=True)) if glob.has_magic(pattern) else [pattern]
+        sources.extend(match for match in matches if not os.path.isdir(match))
+
+    return list(dict.fromkeys(sources))
+
+
+def get_interpreter_paths(interpreter):
+    """
+    Returns the module search path of another interpreter
+
+    :param interpreter: string
+    :return: string[]
+    """
+    return json.loads(check_output([interpreter, "-c", _SYS_PATH_SCRIPT]))
+
+
+def get_source_packages(source, cache=True, cache_directory=None):
+    """
+    Returns the pinned packages of a requirements file or of the environment of an interpreter
+
+    :param source: string, requirements file or interpreter path
+    :param cache: bool, use and store cached environment scans
+    :param cache_directory: string
+    :return: dict[], {package, version}
+    """
+    if _is_interpreter(source):
+        with trace_phase(PHASE_ENVIRONMENT):
+            paths = get_interpreter_paths(source)
+            requirements = scan_environment(paths, cache=cache, cache_directory=cache_directory)
+    else:
+        with open(source) as f:
+            requirements = f.readlines()
+
+    return updatable_utils.parse_requirements_list(requirements)
+
+
+def get_fleet_packages(sources, cache=True, cache_directory=None):
+    """
+    Returns the pinned packages of all sources
+
+    :param sources: string[]
+    :param cache: bool, use and store cached environment scans
+    :param cache_directory: string
+    :return: dict, {source: packages}
+    """
+    return {source: get_source_packages(source, cache=cache, cache_directory=cache_directory) for source in sources}
+
+
+def get_pinned_versions(fleet_packages):
+    """
+    Returns which sources pin which version of a project
+
+    :param fleet_packages: dict, {source: packages}
+    :return: dict, {canonical name: {version: source[]}}
+    """
+    pinned_versions = {}
+
+    for source, packages in fleet_packages.items():
+        for package in packages:
+            versions = pinned_versions.setdefault(canonicalize_name(package["package"]), {})
+            sources = versions.setdefault(package["version"], [])
+            if source not in sources:
+                sources.append(source)
+
+    return pinned_versions
+
+
+async def get_fleet_updates(fleet_packages, session=None, lazy=False, deadline=None):
+    """
+    Return update information for all distinct pinned versions of all sources
+
+    Every project is requested once and its releases are parsed and sorted once, then categorized for every distinct
+    pinned version, no matter how many sources pin it. The update information of projects that timed out is `None`,
+    of projects whose requests to the index failed the `updatable.index.IndexRequestError`, see
+    `iter_package_updates`.
+
+    :param fleet_packages: dict, {source: packages}
+    :param session: updatable.client.Session, a one-off session is used if not given
+    :param lazy: bool, defer the requests for the current release documents, see `get_package_update_list`
+    :param deadline: float, seconds from the start until unfinished lookups are given up, no limit if not given
+    :return: dict, {(canonical name, version): update information or None or IndexRequestError}
+    """
+    if session is None:
+        async with Session() as session:
+            return await get_fleet_updates(fleet_packages, session=session, lazy=lazy, deadline=deadline)
+
+    pinned_versions = [
+        (package_name, list(versions)) for package_name, versions in get_pinned_versions(fleet_packages).items()
+    ]
+    lookups = [
+        updatable_utils.get_package_update_lists(package_name, versions, session=session, lazy=lazy)
+        for package_name, versions in pinned_versions
+    ]
+
+    fleet_updates = {}
+    async for position, update_lists in updatable_utils.as_completed_until(lookups, deadline):
+        package_name, versions = pinned_versions[position]
+        for version in versions:
+            fleet_updates[(package_name, version)] = (
+                update_lists[version] if isinstance(update_lists, dict) else update_lists
+            )
+
+    return fleet_updates
@@ -0,0 +1,171 @@
+import json
+import os
+from contextlib import aclosing
+
+from packaging.utils import canonicalize_name
+
+from updatable import utils as updatable_utils
+from updatable.cache import default_cache_directory, write_atomic
+from updatable.client import Session
+from updatable.index import IndexRequestError
+
+__all__ = [
+    "GateHistory",
+    "get_update_level",
+    "is_qualifying_update",
+    "find_qualifying_update",
+]
+
+ANY_UPDATE = "any"
+
+# Levels of --fail-on, from the most to the least severe update
+FAIL_ON_LEVELS = (updatable_utils.MAJOR_UPDATE, updatable_utils.MINOR_UPDATE, updatable_utils.PATCH_UPDATE, ANY_UPDATE)
+
+# Exit codes of the console in gate mode, argparse already exits with 2 on invalid arguments
+EXIT_OK = 0
+EXIT_UPDATES = 1
+EXIT_INCOMPLETE = 3
+
+
+def get_update_level(updates, pre_releases=False):
+    """
+    Returns the most severe update of a package
+
+    :param updates: dict, update information
+    :param pre_releases: bool, a pre-release counts as update of level `any`
+    :return: string, one of `FAIL_ON_LEVELS`, or None if the package is up to date
+    """
+    if updates["major_updates"]:
+        return updatable_utils.MAJOR_UPDATE
+    if updates["minor_updates"]:
+        return updatable_utils.MINOR_UPDATE
+    if updates["patch_updates"]:
+        return updatable_utils.PATCH_UPDATE
+    if pre_releases and updates["pre_releases"]:
+        return ANY_UPDATE
+    return None
+
+
+def is_qualifying_update(level, fail_on):
+    """
+    Checks if an update is at least as severe as the level the gate fails on
+
+    :param level: string or None, see `get_update_level`
+    :param fail_on: string, one of `FAIL_ON_LEVELS`
+    :return: bool
+    """
+    if level is None:
+        return False
+
+    return FAIL_ON_LEVELS.index(level) <= FAIL_ON_LEVELS.index(fail_on)
+
+
+class GateHistory:
+    """
+    Update levels of the packages seen by previous gate runs
+
+    Packages that were outdated before are likely to still be outdated, checking them first usually finds a
+    qualifying update with the first responses.
+    """
+
+    def __init__(self, directory=None):
+        """
+        :param directory: string, defaults to `default_cache_directory()`
+        """
+        self.path = os.path.join(directory or default_cache_directory(), "gate-history.json")
+        self.levels = {}
+
+        try:
+            with open(self.path, "rb") as f:
+                self.levels = dict(json.load(f))
+        except (OSError, ValueError, TypeError):
+            # Missing or corrupted history, it is replaced by the next run
+            pass
+
+    def order(self, packages, fail_on):
+        """
+        Returns the packages with the previously qualifying ones first, otherwise in the given order
+
+        :param packages: dict[], {package, version}
+        :param fail_on: string, one of `FAIL_ON_LEVELS`
+        :return: dict[]
+        """
+        return sorted(
+            packages,
+            key=lambda package: (
+                not is_qualifying_update(self.levels.get(canonicalize_name(package["package"])), fail_on)
+            ),
+        )
+
+    def record(self, package_name, level):
+        """
+        Remember the update level of a package
+
+        :param package_name: string
+        :param level: string or None if it is up to date
+        """
+        package_name = canonicalize_name(package_name)
+
+        if level is None:
+            self.levels.pop(package_name, None)
+        else:
+            self.levels[package_name] = level
+
+    def save(self):
+        """
+        Store the history, a read-only or full disk does not fail the run
+        """
+        write_atomic(self.path, json.dumps(self.levels, sort_keys=True).encode("utf-8"))
+
+
+async def find_qualifying_update(
+    packages,
+    fail_on=ANY_UPDATE,
+    session=None,
+    pre_releases=False,
+    deadline=None,
+    history=None,
+):
+    """
+    Returns the first package with an update at least as severe as `fail_on`
+
+    All packages are looked up concurrently, the remaining lookups and their requests are cancelled as soon as a
+    qualifying update is found, so the session is free for the requests that follow. The current release documents
+    are not requested.
+
+    :param packages: dict[], {package, version} as returned by `parse_requirements_list`
+    :param fail_on: string, one of `FAIL_ON_LEVELS`
+    :param session: updatable.client.Session, a one-off session is used if not given
+    :param pre_releases: bool, pre-releases are updates of level `any`
+    :param deadline: float, seconds from the start until unfinished lookups are given up, no limit if not given
+    :param history: GateHistory, checks previously outdated packages first and records the levels seen
+    :return: ((package, updates) or None, unfinished packages as (package, None if it timed out or the
+        IndexRequestError if it failed))
+    """
+    if fail_on not in FAIL_ON_LEVELS:
+        raise ValueError(f"Unknown update level {fail_on!r}!")
+
+    if session is None:
+        async with Session() as session:
+            return await find_qualifying_update(packages, fail_on, session, pre_releases, deadline, history)
+
+    if history is not None:
+        packages = history.order(packages, fail_on)
+
+    unfinished = []
+    results = updatable_utils.iter_package_updates(packages, session=session, lazy=True, deadline=deadline)
+
+    async with aclosing(results):
+        async for package, updates in results:
+            if updates is None or isinstance(updates, IndexRequestError):
+                unfinished.append((package, updates))
+                continue
+
+            level = get_update_level(updates, pre_releases)
+            if history is not None:
+                history.record(package["package"], level)
+
+            if is_qualifying_update(level, fail_on):
+                return (package, updates), unfinished
+
+    return None, unfinished
@@ -0,0 +1,141 @@
+import asyncio
+import time
+from collections import deque
+
+__all__ = [
+    "HedgePolicy",
+]
+
+DEFAULT_HEDGE_PERCENTILE = 95.0
+DEFAULT_HEDGE_MAX_PERCENT = 5.0
+
+# Recompute the hedge delay after this many new latencies, sorting the window for every request would be wasteful
+RECOMPUTE_INTERVAL = 10
+
+
+class HedgePolicy:
+    """
+    Hedges slow requests with a second request, the first answer is used and the other request is cancelled
+
+    The latencies of the requests of a run are tracked in a sliding window. A request that takes longer than the
+    `percentile` of the window gets a second request, to a mirror if one is configured. Hedges are capped to
+    `max_ratio` of the requests, so a slow index does not receive twice the traffic.
+    """
+
+    def __init__(
+        self,
+        percentile=DEFAULT_HEDGE_PERCENTILE,
+        max_ratio=DEFAULT_HEDGE_MAX_PERCENT / 100,
+        mirror_url=None,
+        min_samples=20,
+        window=1000,
+    ):
+        """
+        :param percentile: float, latency percentile after which a request is hedged
+        :param max_ratio: float, upper bound of the share of requests that are hedged
+        :param mirror_url: string, base url of the index api the hedges are sent to, the same index if not given
+        :param min_samples: int, latencies required before requests are hedged
+        :param window: int, number of recent latencies the percentile is computed of
+        """
+        if not 0 < percentile < 100:
+            raise ValueError("The hedge percentile has to be between 0 and 100!")
+        if not 0 <= max_ratio <= 1:
+            raise ValueError("The share of hedged requests has to be between 0 and 100 percent!")
+
+        self.percentile = percentile
+        self.max_ratio = max_ratio
+        self.mirror_url = mirror_url.rstrip("/") if mirror_url else None
+        self.min_samples = min_samples
+
+        self.requests = 0
+        self.hedges = 0
+        self.wins = 0
+        self._latencies = deque(maxlen=window)
+        self._delay = None
+        self._recorded = 0
+
+    def get_url(self, url, index_url):
+        """
+        Returns the url a hedge of a request is sent to
+
+        :param url: string
+        :param index_url: string, base url of the index api of the request
+        :return: string
+        """
+        if self.mirror_url is None or not url.startswith(index_url):
+            return url
+
+        return self.mirror_url + url[len(index_url) :]
+
+    def record(self, latency):
+        """
+        Add the latency of a request to the window
+
+        :param latency: float, seconds
+        """
+        self._latencies.append(latency)
+        self._recorded += 1
+
+    def get_delay(self):
+        """
+        Returns the seconds after which a request is hedged
+
+        :return: float or None if too few latencies were recorded
+        """
+        if len(self._latencies) < self.min_samples:
+            return None
+
+        if self._delay is None or self._recorded >= RECOMPUTE_INTERVAL:
+            latencies = sorted(self._latencies)
+            self._delay = latencies[min(len(latencies) - 1, int(len(latencies) * self.percentile / 100))]
+            self._recorded = 0
+
+        return self._delay
+
+    def _may_hedge(self):
+        """
+        Checks if another hedge stays within the cap
+
+        :return: bool
+        """
+        return self.hedges < self.max_ratio * self.requests
+
+    async def run(self, primary, secondary):
+        """
+        Run a request, hedged with a second request if it is slow
+
+        A request that fails does not answer the hedge, the other request is awaited instead. If both fail the error
+        of the first request is raised.
+
+        :param primary: callable returning the awaitable request
+        :param secondary: callable returning the awaitable hedge
+        :return: result of the request that answered first
+        """
+        self.requests += 1
+        start = time.monotonic()
+        tasks = [asyncio.ensure_future(primary())]
+
+        try:
+            delay = self.get_delay()
+            if delay is not None:
+                done, _ = await asyncio.wait(tasks, timeout=delay)
+                if not done and self._may_hedge():
+                    self.hedges += 1
+                    tasks.append(asyncio.ensure_future(secondary()))
+
+            pending = set(tasks)
+            while pending:
+                _, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+
+                for task in tasks:
+                    if task.done() and task.exception() is None:
+                        if task is not tasks[0]:
+                            self.wins += 1
+                        self.record(time.monotonic() - start)
+                        return task.result()
+
+            return tasks[0].result()
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
@@ -0,0 +1,469 @@
+from email.parser import HeaderParser
+from urllib.parse import urljoin
+
+import httpx
+from packaging.utils import (
+    InvalidSdistFilename,
+    InvalidWheelFilename,
+    canonicalize_name,
+    parse_sdist_filename,
+    parse_wheel_filename,
+)
+from packaging.version import InvalidVersion, Version
+
+from updatable.decode import decode_project, decode_release, get_default_decoder
+from updatable.retry import CircuitOpenError
+from updatable.tracing import PHASE_DECODE, trace_phase
+
+__all__ = [
+    "IndexRequestError",
+    "IndexBackend",
+    "JSONIndexBackend",
+    "SimpleIndexBackend",
+    "get_index_backend",
+]
+
+DEFAULT_JSON_INDEX_URL = "https://pypi.org/pypi"
+DEFAULT_SIMPLE_INDEX_URL = "https://pypi.org/simple"
+
+SIMPLE_JSON_CONTENT_TYPE = "application/vnd.pypi.simple.v1+json"
+
+# Statuses of documents that do not exist on the index
+NOT_FOUND_STATUS_CODES = (404, 410)
+
+# Increased by PyPI (and mirrors replicating it) on every change of a project
+SERIAL_HEADER = "X-PyPI-Last-Serial"
+
+
+class IndexRequestError(RuntimeError):
+    """
+    A request to the package index failed, e.g. a connection error or an outage that outlasted the retries
+    """
+
+
+def _parse_serial(value):
+    """
+    Returns the serial of a header or document value
+
+    :param value: string, int or None
+    :return: int or None
+    """
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _decode(resp, package_name, decode=None, decoder=None):
+    """
+    Returns the decoded JSON document of a response
+
+    :param resp: httpx.Response or None
+    :param package_name: string
+    :param decode: callable decoding the content with a decoder of `updatable.decode`, `resp.json()` if not given
+    :param decoder: string, one of `updatable.decode.JSON_DECODERS`
+    :return: dict or None
+    """
+    if resp is None:
+        return None
+
+    with trace_phase(PHASE_DECODE, package_name):
+        if decode is None:
+            return resp.json()
+        return decode(resp.content, decoder)
+
+
+class IndexBackend:
+    """
+    Source of project and release information
+
+    Backends return documents in the shape of the PyPI JSON API, reduced to the fields updatable uses:
+
+    project: {info: {version, license}, releases: {version: [{upload_time}]}, last_serial}
+    release: {info: {version, license}}
+
+    `last_serial` is optional, it is `None` or missing if the index does not provide serials.
+    """
+
+    default_index_url = None
+
+    def __init__(self, index_url=None):
+        """
+        :param index_url: string, base url of the index api
+        """
+        self.index_url = (index_url or self.default_index_url).rstrip("/")
+
+    async def _get(self, session, url, immutable=False, headers=None):
+        """
+        Request a document of the index
+
+        :param session: updatable.client.Session
+        :param url: string
+        :param immutable: bool
+        :param headers: dict
+        :return: httpx.Response or None if it is not available
+        """
+        try:
+            resp = await session.get(url, immutable=immutable, headers=headers)
+        except httpx.TimeoutException:
+            raise TimeoutError(f"Request timed out: {url}")
+        except CircuitOpenError as e:
+            raise IndexRequestError(f"Index paused after repeated failures: {url}") from e
+        except httpx.TransportError as e:
+            # Connection failures and resets, the retries of the session are exhausted
+            raise IndexRequestError("Connection error!") from e
+
+        # Not available on the index
+        if resp.status_code in NOT_FOUND_STATUS_CODES:
+            return None
+
+        # Any other error, e.g. a rate limit or an outage that outlasted the retries
+        if resp.is_error:
+            raise IndexRequestError(f"Index error {resp.status_code}: {url}")
+
+        return resp
+
+    async def _head_serial(self, session, url, headers=None):
+        """
+        Request the serial of a document without downloading it
+
+        :param session: updatable.client.Session
+        :param url: string
+        :param headers: dict
+        :return: int or None if it is not available
+        """
+        try:
+            resp = await session.head(url, headers=headers)
+        except httpx.TimeoutException:
+            raise TimeoutError(f"Request timed out: {url}")
+        except CircuitOpenError as e:
+            raise IndexRequestError(f"Index paused after repeated failures: {url}") from e
+        except httpx.TransportError as e:
+            raise IndexRequestError("Connection error!") from e
+
+        if resp.is_error:
+            return None
+
+        return _parse_serial(resp.headers.get(SERIAL_HEADER))
+
+    async def get_project_data(self, session, package_name):
+        """
+        Returns the document of a project
+
+        The name is normalized (PEP 503), concurrent lookups of the same project share one request and document.
+
+        :param session: updatable.client.Session
+        :param package_name: string
+        :return: dict or None
+        """
+        package_name = canonicalize_name(package_name)
+
+        return await session.coalesce(
+            (self.index_url, "project", package_name),
+            lambda: self._fetch_project_data(session, package_name),
+        )
+
+    async def get_release_data(self, session, package_name, version):
+        """
+        Returns the document of a release
+
+        The name is normalized (PEP 503), concurrent lookups of the same release share one request and document.
+
+        :param session: updatable.client.Session
+        :param package_name: string
+        :param version: string
+        :return: dict or None
+        """
+        package_name = canonicalize_name(package_name)
+
+        return await session.coalesce(
+            (self.index_url, "release", package_name, version),
+            lambda: self._fetch_release_data(session, package_name, version),
+        )
+
+    async def get_project_serial(self, session, package_name):
+        """
+        Returns the serial of a project, it changes whenever the project document changes
+
+        The name is normalized (PEP 503), concurrent lookups of the same project share one request.
+
+        :param session: updatable.client.Session
+        :param package_name: string
+        :return: int or None if the index does not provide serials
+        """
+        package_name = canonicalize_name(package_name)
+
+        return await session.coalesce(
+            (self.index_url, "serial", package_name),
+            lambda: self._fetch_project_serial(session, package_name),
+        )
+
+    async def _fetch_project_data(self, session, package_name):
+        """
+        Request the document of a project
+
+        :param session: updatable.client.Session
+        :param package_name: string, normalized
+        :return: dict or None
+        """
+        raise NotImplementedError
+
+    async def _fetch_release_data(self, session, package_name, version):
+        """
+        Request the document of a release
+
+        :param session: updatable.client.Session
+        :param package_name: string, normalized
+        :param version: string
+        :return: dict or None
+        """
+        raise NotImplementedError
+
+    async def _fetch_project_serial(self, session, package_name):
+        """
+        Request the serial of a project
+
+        :param session: updatable.client.Session
+        :param package_name: string, normalized
+        :return: int or None
+        """
+        return None
+
+
+class JSONIndexBackend(IndexBackend):
+    """
+    PyPI JSON API
+
+    https://docs.pypi.org/api/json/
+    """
+
+    default_index_url = DEFAULT_JSON_INDEX_URL
+
+    def __init__(self, index_url=None, json_decoder=None):
+        """
+        :param index_url: string, base url of the index api
+        :param json_decoder: string, one of `updatable.decode.JSON_DECODERS`, defaults to the fastest installed one
+        """
+        super().__init__(index_url)
+        self.json_decoder = json_decoder or get_default_decoder()
+
+    async def _fetch_project_data(self, session, package_name):
+        resp = await self._get(session, f"{self.index_url}/{package_name}/json")
+        return _decode(resp, package_name, decode_project, self.json_decoder)
+
+    async def _fetch_release_data(self, session, package_name, version):
+        # The document of a specific release does not change once it is published
+        resp = await self._get(session, f"{self.index_url}/{package_name}/{version}/json", immutable=True)
+        return _decode(resp, package_name, decode_release, self.json_decoder)
+
+    async def _fetch_project_serial(self, session, package_name):
+        return await self._head_serial(session, f"{self.index_url}/{package_name}/json")
+
+
+def _parse_version(version):
+    """
+    Returns the PEP 440 version of a version string
+
+    :param version: string
+    :return: packaging.version.Version or None
+    """
+    try:
+        return Version(version)
+    except InvalidVersion:
+        return None
+
+
+def _get_file_version(filename):
+    """
+    Returns the version of a distribution file
+
+    :param filename: string
+    :return: packaging.version.Version or None
+    """
+    try:
+        if filename.endswith(".whl"):
+            return parse_wheel_filename(filename)[1]
+        return parse_sdist_filename(filename)[1]
+    except (InvalidWheelFilename, InvalidSdistFilename, InvalidVersion):
+        return None
+
+
+def _get_latest_version(versions):
+    """
+    Returns the latest version, pre-releases are only considered if there is no final release
+
+    :param versions: string[]
+    :return: string
+    """
+    parsed = [(_parse_version(version), version) for version in versions]
+    parsed = [item for item in parsed if item[0] is not None]
+
+    if not parsed:
+        return ""
+
+    final = [item for item in parsed if not item[0].is_prerelease]
+    return max(final or parsed)[1]
+
+
+class SimpleIndexBackend(IndexBackend):
+    """
+    Simple repository API in its JSON form (PEP 691), with versions and upload times (PEP 700)
+
+    The documents only list the distribution files of a project, which makes them much smaller than the documents
+    of the JSON API. They are supported by PyPI and most mirrors. The license of a release is read from the core
+    metadata of one of its files (PEP 658), projects do not have a license.
+    """
+
+    default_index_url = DEFAULT_SIMPLE_INDEX_URL
+
+    async def _get_simple_project(self, session, package_name):
+        """
+        Returns the simple project document with absolute file urls
+
+        :param session: updatable.client.Session
+        :param package_name: string, normalized
+        :return: dict or None
+        """
+        return await session.coalesce(
+            (self.index_url, "simple", package_name),
+            lambda: self._fetch_simple_project(session, package_name),
+        )
+
+    async def _fetch_simple_project(self, session, package_name):
+        """
+        Request the simple project document
+
+        :param session: updatable.client.Session
+        :param package_name: string, normalized
+        :return: dict or None
+        """
+        resp = await self._get(
+            session, f"{self.index_url}/{package_name}/", headers={"Accept": SIMPLE_JSON_CONTENT_TYPE}
+        )
+
+        if resp is None:
+            return None
+
+        if not resp.headers.get("Content-Type", "").startswith(SIMPLE_JSON_CONTENT_TYPE):
+            raise RuntimeError(f"The index {self.index_url} does not support the JSON simple API!")
+
+        project = _decode(resp, package_name)
+        for file in project["files"]:
+            file["url"] = urljoin(str(resp.url), file["url"])
+
+        project["last_serial"] = _parse_serial(
+            resp.headers.get(SERIAL_HEADER, project.get("meta", {}).get("_last-serial")),
+        )
+
+        return project
+
+    def _get_release_files(self, project):
+        """
+        Group the files of a project by release
+
+        :param project: dict
+        :return: dict, {version: file[]}
+        """
+        releases = {version: [] for version in project.get("versions", [])}
+        versions = {_parse_version(version): version for version in releases}
+
+        for file in project["files"]:
+            file_version = _get_file_version(file["filename"])
+            if file_version is None:
+                continue
+
+            version = versions.setdefault(file_version, str(file_version))
+            releases.setdefault(version, []).append(file)
+
+        return releases
+
+    async def _fetch_project_data(self, session, package_name):
+        project = await self._get_simple_project(session, package_name)
+        if project is None:
+            return None
+
+        releases = {}
+        for version, files in self._get_release_files(project).items():
+            upload_times = sorted(file["upload-time"][:19] for file in files if file.get("upload-time"))
+            releases[version] = [{"upload_time": upload_time} for upload_time in upload_times]
+
+        return {
+            "info": {
+                "version": _get_latest_version(releases),
+                "license": None,
+            },
+            "releases": releases,
+            "last_serial": project["last_serial"],
+        }
+
+    async def _fetch_release_data(self, session, package_name, version):
+        project = await self._get_simple_project(session, package_name)
+        if project is None:
+            return None
+
+        requested = _parse_version(version)
+
+        for release, files in self._get_release_files(project).items():
+            if release != version and (requested is None or _parse_version(release) != requested):
+                continue
+
+            return {
+                "info": {
+                    "version": release,
+                    "license": await self._get_license(session, files),
+                },
+            }
+
+        return None
+
+    async def _fetch_project_serial(self, session, package_name):
+        return await self._head_serial(
+            session, f"{self.index_url}/{package_name}/", headers={"Accept": SIMPLE_JSON_CONTENT_TYPE}
+        )
+
+    async def _get_license(self, session, files):
+        """
+        Returns the license from the core metadata of the first file that provides it
+
+        :param session: updatable.client.Session
+        :param files: dict[]
+        :return: string
+        """
+        for file in files:
+            if not (file.get("core-metadata") or file.get("data-dist-info-metadata")):
+                continue
+
+            resp = await self._get(session, f"{file['url']}.metadata", immutable=True)
+            if resp is None:
+                continue
+
+            metadata = HeaderParser().parsestr(resp.text)
+            return metadata.get("License-Expression") or metadata.get("License") or ""
+
+        return ""
+
+
+INDEX_BACKENDS = {
+    "json": JSONIndexBackend,
+    "simple": SimpleIndexBackend,
+}
+
+
+def get_index_backend(api="json", index_url=None, json_decoder=None):
+    """
+    Returns the backend of an index api
+
+    :param api: string, one of `INDEX_BACKENDS`
+    :param index_url: string, base url of the index api, defaults to PyPI
+    :param json_decoder: string, decoder of PyPI JSON API documents, one of `updatable.decode.JSON_DECODERS`
+    :return: IndexBackend
+    """
+    try:
+        backend = INDEX_BACKENDS[api]
+    except KeyError:
+        raise ValueError(f"Unknown index api {api!r}!")
+
+    if backend is JSONIndexBackend:
+        return backend(index_url, json_decoder=json_decoder)
+
+    return backend(index_url)
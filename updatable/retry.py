@@ -0,0 +1,294 @@
+import asyncio
+import random
+import time
+from email.utils import parsedate_to_datetime
+
+import httpx
+
+__all__ = [
+    "RetryPolicy",
+    "CircuitBreaker",
+    "CircuitOpenError",
+]
+
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_FAILURE_THRESHOLD = 5
+
+# Statuses of overloaded, rate limiting or temporarily unavailable servers
+RETRY_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+
+# Transport errors after which the request did not reach the server or the response was cut off. Read and write
+# timeouts are not retried, they already waited for the whole timeout.
+RETRY_ERRORS = (
+    httpx.ConnectError,
+    httpx.ConnectTimeout,
+    httpx.ReadError,
+    httpx.WriteError,
+    httpx.RemoteProtocolError,
+)
+
+
+def parse_retry_after(value):
+    """
+    Returns the seconds of a Retry-After header, given as seconds or as HTTP date
+
+    :param value: string or None
+    :return: float or None
+    """
+    if not value:
+        return None
+
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class CircuitOpenError(httpx.TransportError):
+    """
+    A request was not sent, the circuit breaker of its host stays open longer than the request may wait
+    """
+
+
+class CircuitBreaker:
+    """
+    Pauses the requests to a host after repeated failures
+
+    After `failure_threshold` failures in a row the breaker opens: requests wait instead of being sent, for
+    `reset_timeout` seconds or longer if the server asked for it with Retry-After. Then a single probe request is let
+    through. If it succeeds the breaker closes and all waiting requests continue, otherwise it opens again for twice
+    as long, up to `max_reset_timeout`. A request that may not wait that long fails with `CircuitOpenError` at once.
+    """
+
+    def __init__(self, failure_threshold=DEFAULT_FAILURE_THRESHOLD, reset_timeout=5.0, max_reset_timeout=60.0):
+        """
+        :param failure_threshold: int, failures in a row that open the breaker
+        :param reset_timeout: float, seconds the breaker stays open the first time
+        :param max_reset_timeout: float, upper bound of the seconds the breaker stays open
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.max_reset_timeout = max_reset_timeout
+
+        self.failures = 0
+        self.open_until = None
+        self._open_timeout = reset_timeout
+        self._probing = False
+        self._changed = asyncio.Event()
+
+    @property
+    def is_open(self):
+        """
+        Checks if requests are paused
+
+        :return: bool
+        """
+        return self.open_until is not None
+
+    async def wait(self, max_wait=None):
+        """
+        Wait until a request may be sent
+
+        :param max_wait: float, seconds the request may wait for the breaker to close, `None` to wait as long as it is
+            open. Waiting for the response of the probe is not limited, it is limited by the timeout of the request.
+        :return: bool, the request is the probe of an open breaker
+        :raises CircuitOpenError: if the breaker stays open longer than the request may wait
+        """
+        deadline = time.monotonic() + max_wait if max_wait is not None else None
+
+        while self.open_until is not None:
+            if deadline is not None and self.open_until > deadline:
+                raise CircuitOpenError("Circuit breaker open!")
+
+            if self._probing:
+                await self._changed.wait()
+                continue
+
+            delay = self.open_until - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+                continue
+
+            self._probing = True
+            return True
+
+        return False
+
+    def record_success(self, probe=False):
+        """
+        Close the breaker after a successful response
+
+        :param probe: bool, the response answered the probe request
+        """
+        self.failures = 0
+        if probe or self.open_until is not None:
+            self.open_until = None
+            self._open_timeout = self.reset_timeout
+            self._notify(probe)
+
+    def record_failure(self, retry_after=None, probe=False):
+        """
+        Count a failed request, the breaker opens once the threshold is reached
+
+        :param retry_after: float, seconds the server asked to wait
+        :param probe: bool, the failure answered the probe request
+        """
+        self.failures += 1
+
+        if probe:
+            self._open_timeout = min(self.max_reset_timeout, self._open_timeout * 2)
+        elif self.open_until is not None or self.failures < self.failure_threshold:
+            return
+
+        self.open_until = time.monotonic() + max(self._open_timeout, retry_after or 0.0)
+        self._notify(probe)
+
+    def abandon_probe(self):
+        """
+        Let another request probe, the probe request was cancelled before its response arrived
+        """
+        self._notify(True)
+
+    def _notify(self, probe):
+        """
+        Wake the requests waiting for the probe
+
+        :param probe: bool
+        """
+        if probe:
+            self._probing = False
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+
+class RetryPolicy:
+    """
+    Retries requests that failed with a transient error, using jittered exponential backoff
+
+    Responses with a status of `RETRY_STATUS_CODES` and transport errors of `RETRY_ERRORS` are retried. The delay
+    before a retry is drawn uniformly between zero and an exponentially growing bound (full jitter), a Retry-After
+    header replaces it. Retries are limited by a budget: every request adds `budget_ratio` tokens, every retry takes
+    one, so retries never exceed that share of the traffic once the initial tokens are used up. Each host gets a
+    `CircuitBreaker`, a request waits for it at most `max_delay` seconds before its first attempt and a retry at most
+    its delay, so an unreachable host fails the requests instead of pausing them for minutes.
+    """
+
+    def __init__(
+        self,
+        max_retries=DEFAULT_MAX_RETRIES,
+        base_delay=0.5,
+        max_delay=30.0,
+        max_retry_after=120.0,
+        budget_ratio=0.2,
+        min_budget=10,
+        failure_threshold=DEFAULT_FAILURE_THRESHOLD,
+        reset_timeout=5.0,
+        seed=None,
+    ):
+        """
+        :param max_retries: int, retries of a request after the first attempt
+        :param base_delay: float, upper bound of the delay before the first retry
+        :param max_delay: float, upper bound of the delay before any retry
+        :param max_retry_after: float, a request is not retried if the server asks to wait longer
+        :param budget_ratio: float, retry tokens added by every request
+        :param min_budget: int, retry tokens available from the start, also the size of the budget
+        :param failure_threshold: int, failures in a row that open the circuit breaker of a host, `None` to disable it
+        :param reset_timeout: float, seconds the circuit breaker of a host stays open the first time
+        :param seed: int, seed of the jitter
+        """
+        if max_retries < 0:
+            raise ValueError("The number of retries can not be negative!")
+        if failure_threshold is not None and failure_threshold < 1:
+            raise ValueError("The failure threshold of the circuit breaker must be at least 1!")
+
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_retry_after = max_retry_after
+        self.budget_ratio = budget_ratio
+        self.min_budget = min_budget
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+
+        self.retries = 0
+        self._tokens = float(min_budget)
+        self._rng = random.Random(seed)
+        self._breakers = {}
+
+    def get_breaker(self, host):
+        """
+        Returns the circuit breaker of a host
+
+        :param host: string
+        :return: CircuitBreaker or None if it is disabled
+        """
+        if self.failure_threshold is None:
+            return None
+
+        if host not in self._breakers:
+            self._breakers[host] = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+
+        return self._breakers[host]
+
+    def record_request(self):
+        """
+        Add the retry tokens of a request to the budget
+        """
+        self._tokens = min(self._tokens + self.budget_ratio, max(self.min_budget, 1))
+
+    @staticmethod
+    def is_retryable(resp=None, error=None):
+        """
+        Checks if a response or transport error is transient
+
+        :param resp: httpx.Response
+        :param error: Exception
+        :return: bool
+        """
+        if error is not None:
+            return isinstance(error, RETRY_ERRORS)
+
+        return resp.status_code in RETRY_STATUS_CODES
+
+    def get_delay(self, attempt, retry_after=None, paused=0.0):
+        """
+        Returns the seconds to wait before retrying a request, and takes a token of the budget
+
+        :param attempt: int, number of attempts so far
+        :param retry_after: float, seconds the server asked to wait
+        :param paused: float, seconds the circuit breaker of the host stays open, the request is not retried if it
+            would have to wait longer than its delay
+        :return: float or None if the request is not retried
+        """
+        if attempt > self.max_retries or self._tokens < 1:
+            return None
+        if retry_after is not None and retry_after > self.max_retry_after:
+            return None
+
+        if retry_after is not None:
+            delay = retry_after
+        else:
+            delay = self._rng.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+        if delay < paused:
+            return None
+
+        self._tokens -= 1
+        self.retries += 1
+
+        return delay
+
+    def get_breaker_wait(self, attempt):
+        """
+        Returns the seconds a request may wait for the circuit breaker of its host before an attempt
+
+        :param attempt: int, number of attempts so far
+        :return: float
+        """
+        # A retry already waited for its delay, it is only sent if the breaker closed in the meantime
+        return self.max_delay if attempt == 0 else 0.0
@@ -0,0 +1,294 @@
+import asyncio
+import json
+import time
+from datetime import datetime, timezone
+from http import HTTPStatus
+from urllib.parse import parse_qs, unquote, urlsplit
+
+import httpx
+from packaging.utils import canonicalize_name
+
+from updatable import utils as updatable_utils
+from updatable.index import IndexRequestError
+
+__all__ = [
+    "UpdateService",
+    "UpdateServer",
+]
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8000
+DEFAULT_REFRESH_INTERVAL = 900
+
+# Requests are small GET requests, anything larger is rejected
+_MAX_HEADER_LINES = 100
+_MAX_LINE_LENGTH = 8192
+
+
+def _json_default(value):
+    """
+    Serializes the values of update information the json module does not handle
+
+    :param value: object
+    :return: string
+    """
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, updatable_utils.Release):
+        return dict(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class UpdateService:
+    """
+    Update information of a set of packages, kept in memory and refreshed in the background
+
+    Queries are answered from the results of the last refresh, so they never wait for the package index. A refresh
+    builds a complete new set of results before it replaces the previous one, queries see either of them.
+    """
+
+    def __init__(self, load_packages, session, refresh_interval=DEFAULT_REFRESH_INTERVAL):
+        """
+        :param load_packages: callable returning dict[], {package, version}, called on every refresh
+        :param session: updatable.client.Session, shared by all refreshes
+        :param refresh_interval: float, seconds between the start of two refreshes
+        """
+        self.load_packages = load_packages
+        self.session = session
+        self.refresh_interval = refresh_interval
+
+        self.results = None
+        self.refreshed_at = None
+        self.refresh_duration = None
+        self.last_error = None
+
+    @property
+    def is_ready(self):
+        """
+        Checks if the first refresh finished
+
+        :return: bool
+        """
+        return self.results is not None
+
+    async def refresh(self):
+        """
+        Look up the update information of all packages and replace the results
+        """
+        start = time.monotonic()
+
+        try:
+            packages = await asyncio.to_thread(self.load_packages)
+            results = {}
+            async for package, updates in updatable_utils.iter_package_updates(packages, session=self.session):
+                failed = isinstance(updates, IndexRequestError)
+                results[canonicalize_name(package["package"])] = {
+                    "package": package["package"],
+                    "version": package["version"],
+                    "timed_out": updates is None,
+                    "error": str(updates) if failed else None,
+                    "updates": None if failed else updates,
+                }
+        except (OSError, RuntimeError, ValueError, httpx.HTTPError) as e:
+            # The previous results are kept until a refresh succeeds, a failing refresh must not stop the service
+            self.last_error = str(e)
+            return
+
+        self.results = dict(sorted(results.items()))
+        self.refreshed_at = datetime.now(timezone.utc)
+        self.refresh_duration = time.monotonic() - start
+        self.last_error = None
+
+    async def run(self):
+        """
+        Refresh the results on schedule until cancelled
+        """
+        while True:
+            start = time.monotonic()
+            await self.refresh()
+            await asyncio.sleep(max(0.0, self.refresh_interval - (time.monotonic() - start)))
+
+    def get_status(self):
+        """
+        Returns the state of the service
+
+        :return: dict
+        """
+        return {
+            "ready": self.is_ready,
+            "packages": len(self.results) if self.is_ready else 0,
+            "refreshed_at": self.refreshed_at,
+            "refresh_duration": self.refresh_duration,
+            "refresh_interval": self.refresh_interval,
+            "last_error": self.last_error,
+        }
+
+    def get_packages(self, outdated=False):
+        """
+        Returns the update information of all packages
+
+        :param outdated: bool, only return packages with newer releases
+        :return: dict[] or None if the first refresh did not finish
+        """
+        if not self.is_ready:
+            return None
+
+        return [
+            result
+            for result in self.results.values()
+            if not outdated or (result["updates"] is not None and result["updates"]["newer_releases"])
+        ]
+
+    def get_package(self, package_name):
+        """
+        Returns the update information of a package
+
+        :param package_name: string
+        :return: dict or None
+        """
+        if not self.is_ready:
+            return None
+
+        return self.results.get(canonicalize_name(package_name))
+
+
+class UpdateServer:
+    """
+    Minimal HTTP/JSON interface of an `UpdateService`
+
+    GET /health                 state of the service
+    GET /packages[?outdated=1]  update information of all packages
+    GET /packages/<name>        update information of a package
+    """
+
+    def __init__(self, service):
+        """
+        :param service: UpdateService
+        """
+        self.service = service
+        self._server = None
+
+    async def start(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        """
+        Start listening for requests
+
+        :param host: string
+        :param port: int, 0 to pick a free port
+        :return: asyncio.Server
+        """
+        self._server = await asyncio.start_server(self._handle, host, port, limit=_MAX_LINE_LENGTH)
+        return self._server
+
+    @property
+    def port(self):
+        """
+        Returns the port the server listens on
+
+        :return: int
+        """
+        return self._server.sockets[0].getsockname()[1]
+
+    async def aclose(self):
+        """
+        Stop listening for requests
+        """
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _read_request(self, reader):
+        """
+        Read the request line and headers of a request
+
+        :param reader: asyncio.StreamReader
+        :return: tuple (method, target) or None if the request is malformed
+        """
+        try:
+            request_line = (await reader.readline()).decode("latin-1").split()
+
+            for _ in range(_MAX_HEADER_LINES):
+                if (await reader.readline()).strip() == b"":
+                    break
+            else:
+                return None
+        except (ValueError, ConnectionError):
+            return None
+
+        if len(request_line) != 3 or not request_line[2].startswith("HTTP/"):
+            return None
+
+        return request_line[0], request_line[1]
+
+    def _route(self, method, target):
+        """
+        Returns the response to a request
+
+        :param method: string
+        :param target: string
+        :return: tuple (HTTPStatus, dict or list)
+        """
+        if method not in ("GET", "HEAD"):
+            return HTTPStatus.METHOD_NOT_ALLOWED, {"error": "Method not allowed"}
+
+        url = urlsplit(target)
+        path = unquote(url.path).rstrip("/")
+        query = parse_qs(url.query)
+
+        if path == "/health":
+            return HTTPStatus.OK, self.service.get_status()
+
+        if not path.startswith("/packages"):
+            return HTTPStatus.NOT_FOUND, {"error": "Not found"}
+
+        if not self.service.is_ready:
+            return HTTPStatus.SERVICE_UNAVAILABLE, {"error": "The first refresh did not finish yet"}
+
+        if path == "/packages":
+            outdated = query.get("outdated", ["0"])[-1].lower() in ("yes", "true", "t", "y", "1")
+            return HTTPStatus.OK, self.service.get_packages(outdated=outdated)
+
+        package = self.service.get_package(path[len("/packages/") :]) if path.startswith("/packages/") else None
+        if package is None:
+            return HTTPStatus.NOT_FOUND, {"error": "Not found"}
+
+        return HTTPStatus.OK, package
+
+    async def _handle(self, reader, writer):
+        """
+        Answer a single request, the connection is closed afterwards
+
+        :param reader: asyncio.StreamReader
+        :param writer: asyncio.StreamWriter
+        """
+        try:
+            request = await self._read_request(reader)
+
+            if request is None:
+                method = "GET"
+                status, data = HTTPStatus.BAD_REQUEST, {"error": "Bad request"}
+            else:
+                method = request[0]
+                status, data = self._route(*request)
+
+            body = json.dumps(data, default=_json_default).encode("utf-8")
+            head = (
+                f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+                "Content-Type: application/json\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                "Connection: close\r\n"
+                "\r\n"
+            )
+
+            writer.write(head.encode("latin-1"))
+            if method != "HEAD":
+                writer.write(body)
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
@@ -0,0 +1,146 @@
+import hashlib
+import json
+import os
+
+from updatable.cache import default_cache_directory, write_atomic
+from updatable.utils import Release
+
+__all__ = [
+    "Snapshot",
+    "SnapshotStore",
+]
+
+# Bump to invalidate snapshots stored by previous versions
+SNAPSHOT_VERSION = 2
+
+# Update categories holding releases with an `upload_time`
+_RELEASE_LISTS = ("major_updates", "minor_updates", "patch_updates", "pre_release_updates", "non_semantic_versions")
+
+
+def _encode_update_list(updates):
+    """
+    Returns the JSON serializable form of update information
+
+    :param updates: dict
+    :return: dict
+    """
+    encoded = dict(updates)
+
+    for key in _RELEASE_LISTS:
+        encoded[key] = [
+            {**release, "upload_time": release["upload_time"] and release["upload_time"].isoformat()}
+            for release in updates[key]
+        ]
+
+    return encoded
+
+
+def _decode_update_list(encoded):
+    """
+    Returns update information from its JSON serializable form
+
+    :param encoded: dict
+    :return: dict
+    """
+    updates = dict(encoded)
+
+    for key in _RELEASE_LISTS:
+        updates[key] = [Release(release["version"], release["upload_time"]) for release in encoded[key]]
+
+    return updates
+
+
+class Snapshot:
+    """
+    Categorized update information of a project at a serial of the index
+    """
+
+    __slots__ = ("serial", "update_lists")
+
+    def __init__(self, serial, update_lists):
+        """
+        :param serial: int, `X-PyPI-Last-Serial` of the project document the update information was computed from
+        :param update_lists: dict, {version: update information}
+        """
+        self.serial = serial
+        self.update_lists = update_lists
+
+    def covers(self, versions):
+        """
+        Checks if the snapshot holds the update information of all versions
+
+        :param versions: string[]
+        :return: bool
+        """
+        return all(version in self.update_lists for version in versions)
+
+
+class SnapshotStore:
+    """
+    Persistent snapshots of projects, used to skip projects that did not change since a previous run
+
+    The serial of a project is increased by the index on every change of the project. As long as it did not move, the
+    stored update information is still valid, so neither the project document has to be downloaded nor its releases
+    categorized again. Snapshots are stored as one small JSON file per project and index.
+    """
+
+    def __init__(self, directory=None):
+        """
+        :param directory: string, defaults to the `snapshots` directory of `default_cache_directory()`
+        """
+        self.directory = directory or os.path.join(default_cache_directory(), "snapshots")
+
+    def _path(self, index_url, package_name):
+        """
+        Returns the file of the snapshot of a project
+
+        :param index_url: string
+        :param package_name: string, normalized
+        :return: string
+        """
+        key = hashlib.sha256(f"{index_url}\0{package_name}".encode()).hexdigest()
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def load(self, index_url, package_name):
+        """
+        Returns the snapshot of a project
+
+        :param index_url: string
+        :param package_name: string, normalized
+        :return: Snapshot or None
+        """
+        try:
+            with open(self._path(index_url, package_name), "rb") as f:
+                stored = json.load(f)
+            if stored["version"] != SNAPSHOT_VERSION or stored["project"] != [index_url, package_name]:
+                return None
+            update_lists = {version: _decode_update_list(updates) for version, updates in stored["updates"].items()}
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError, TypeError, AttributeError):
+            # Corrupted snapshot, it is replaced by the next lookup
+            return None
+
+        return Snapshot(stored["serial"], update_lists)
+
+    def store(self, index_url, package_name, serial, update_lists):
+        """
+        Store the update information of a project computed at a serial
+
+        :param index_url: string
+        :param package_name: string, normalized
+        :param serial: int
+        :param update_lists: dict, {version: update information}
+        :return: Snapshot
+        """
+        stored = {
+            "version": SNAPSHOT_VERSION,
+            "project": [index_url, package_name],
+            "serial": serial,
+            "updates": {version: _encode_update_list(updates) for version, updates in update_lists.items()},
+        }
+
+        # Snapshots are an optimization only, a read-only or full disk must not fail the lookup
+        write_atomic(self._path(index_url, package_name), json.dumps(stored).encode("utf-8"))
+
+        return Snapshot(serial, update_lists)
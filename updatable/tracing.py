@@ -0,0 +1,227 @@
+import threading
+import time
+from collections import namedtuple
+
+__all__ = [
+    "TraceEvent",
+    "StatsCollector",
+    "add_tracer",
+    "remove_tracer",
+    "is_tracing",
+    "trace_phase",
+    "get_connection_trace",
+]
+
+# Reading the installed distributions of the environment
+PHASE_ENVIRONMENT = "environment"
+# Looking up a package, from the first request until its update information is complete
+PHASE_LOOKUP = "lookup"
+# Getting a document of the package index, including waiting for a free connection and the cache
+PHASE_FETCH = "fetch"
+# A single HTTP exchange with the package index, the size is the number of bytes received
+PHASE_REQUEST = "request"
+# Opening a connection to the package index, including the DNS lookup
+PHASE_CONNECT = "connect"
+# TLS handshake of a new connection
+PHASE_TLS = "tls"
+# Decoding a JSON document
+PHASE_DECODE = "decode"
+# Parsing and categorizing the releases of a project
+PHASE_CATEGORIZE = "categorize"
+# Printing the update information of a package
+PHASE_RENDER = "render"
+
+PHASES = (
+    PHASE_ENVIRONMENT,
+    PHASE_LOOKUP,
+    PHASE_FETCH,
+    PHASE_REQUEST,
+    PHASE_CONNECT,
+    PHASE_TLS,
+    PHASE_DECODE,
+    PHASE_CATEGORIZE,
+    PHASE_RENDER,
+)
+
+TraceEvent = namedtuple("TraceEvent", ["phase", "package", "start", "duration", "size"])
+
+_tracers = []
+
+
+def add_tracer(tracer):
+    """
+    Register a tracer, it is called with a `TraceEvent` whenever a phase ends
+
+    Tracers are called synchronously, from the event loop or from the thread that ran the phase, so they should only
+    record the event.
+
+    :param tracer: callable
+    """
+    _tracers.append(tracer)
+
+
+def remove_tracer(tracer):
+    """
+    Unregister a tracer
+
+    :param tracer: callable
+    """
+    try:
+        _tracers.remove(tracer)
+    except ValueError:
+        pass
+
+
+def is_tracing():
+    """
+    Checks if any tracer is registered
+
+    :return: bool
+    """
+    return bool(_tracers)
+
+
+def _emit(event):
+    """
+    Pass an event to all tracers
+
+    :param event: TraceEvent
+    """
+    for tracer in list(_tracers):
+        tracer(event)
+
+
+class _Span:
+    """
+    Measures a phase, the size can be set while the phase runs
+    """
+
+    __slots__ = ("phase", "package", "size", "_start")
+
+    def __init__(self, phase, package=None):
+        self.phase = phase
+        self.package = package
+        self.size = None
+        self._start = None
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        _emit(TraceEvent(self.phase, self.package, self._start, time.perf_counter() - self._start, self.size))
+
+
+class _NullSpan:
+    """
+    Span used while nothing is traced, it measures nothing
+    """
+
+    __slots__ = ()
+
+    @property
+    def size(self):
+        return None
+
+    @size.setter
+    def size(self, value):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def trace_phase(phase, package=None):
+    """
+    Returns a context manager measuring a phase
+
+    Without registered tracers a shared no-op span is returned, so instrumented code paths do not pay for timing.
+
+    :param phase: string, one of `PHASES` or a custom phase
+    :param package: string, the package the phase belongs to
+    :return: context manager yielding a span with a writable `size`
+    """
+    if not _tracers:
+        return _NULL_SPAN
+
+    return _Span(phase, package)
+
+
+def get_connection_trace():
+    """
+    Returns an httpcore trace callback emitting the connect and TLS phases of new connections
+
+    :return: async callable or None while nothing is traced
+    """
+    if not _tracers:
+        return None
+
+    phases = {"connection.connect_tcp": PHASE_CONNECT, "connection.start_tls": PHASE_TLS}
+    started = {}
+
+    async def trace(event_name, info):
+        name, _, state = event_name.rpartition(".")
+        if name not in phases:
+            return
+
+        if state == "started":
+            started[name] = time.perf_counter()
+        elif name in started:
+            start = started.pop(name)
+            _emit(TraceEvent(phases[name], None, start, time.perf_counter() - start, None))
+
+    return trace
+
+
+class StatsCollector:
+    """
+    Tracer aggregating the durations of the phases and the lookups of packages
+
+    Durations of concurrent phases are summed up, so the total of a phase can exceed the duration of the run.
+    """
+
+    def __init__(self):
+        self.phases = {}
+        self.lookups = {}
+        self.bytes_received = 0
+
+        self._lock = threading.Lock()
+
+    def __call__(self, event):
+        """
+        Record an event
+
+        :param event: TraceEvent
+        """
+        with self._lock:
+            count, total, slowest = self.phases.get(event.phase, (0, 0.0, 0.0))
+            self.phases[event.phase] = (count + 1, total + event.duration, max(slowest, event.duration))
+
+            if event.phase == PHASE_LOOKUP and event.package is not None:
+                self.lookups[event.package] = self.lookups.get(event.package, 0.0) + event.duration
+            if event.phase == PHASE_REQUEST and event.size:
+                self.bytes_received += event.size
+
+    def get_phase_totals(self):
+        """
+        Returns the number, total and maximum duration of every phase, in the order of `PHASES`
+
+        :return: dict, {phase: (count, total seconds, maximum seconds)}
+        """
+        order = {phase: position for position, phase in enumerate(PHASES)}
+        return dict(sorted(self.phases.items(), key=lambda item: (order.get(item[0], len(order)), item[0])))
+
+    def get_slowest_packages(self, count=10):
+        """
+        Returns the packages with the slowest lookups
+
+        :param count: int
+        :return: (string, float)[], package and seconds
+        """
+        return sorted(self.lookups.items(), key=lambda item: item[1], reverse=True)[:count]
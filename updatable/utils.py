@@ -1,26 +1,270 @@
+import asyncio
 import re
-import sys
+from collections import namedtuple
+from collections.abc import Mapping
+from contextlib import aclosing
 from datetime import datetime
-from subprocess import check_output
+from functools import lru_cache
+from operator import itemgetter
 
-import httpx
 import semantic_version
-from packaging.version import parse
+from packaging.utils import canonicalize_name
+from packaging.version import InvalidVersion, parse
+
+from updatable.client import Session
+from updatable.environment import scan_environment
+from updatable.index import IndexRequestError
+from updatable.tracing import PHASE_CATEGORIZE, PHASE_ENVIRONMENT, PHASE_FETCH, PHASE_LOOKUP, trace_phase
 
 __all__ = [
+    "Release",
+    "UpdateBoundaries",
+    "get_update_boundaries",
+    "parse_release",
+    "get_parse_cache_info",
+    "clear_parse_cache",
     "is_major_update",
     "is_minor_update",
     "is_patch_update",
     "sorted_versions",
+    "SortedReleases",
     "get_categorized_package_data",
+    "get_categorized_package_lists",
     "get_parsed_environment_package_list",
     "get_environment_requirements_list",
     "parse_requirements_list",
     "get_pypi_package_data",
+    "get_update_list",
+    "get_update_lists",
     "get_package_update_list",
+    "get_package_update_lists",
+    "resolve_current_release",
+    "as_completed_until",
+    "iter_package_updates",
 ]
 
 
+PARSE_CACHE_SIZE = 65536
+
+# Projects with fewer releases are categorized on the event loop, handing them to the executor costs more
+EXECUTOR_MIN_RELEASES = 200
+
+# Final releases with up to three components and a semantic version, e.g. 1, 1.2 or 1.2.3
+_FINAL_RELEASE_RE = re.compile(r"(?:0|[1-9][0-9]*)(?:\.(?:0|[1-9][0-9]*)){0,2}")
+
+MAJOR_UPDATE = "major"
+MINOR_UPDATE = "minor"
+PATCH_UPDATE = "patch"
+
+
+ParsedRelease = namedtuple("ParsedRelease", ["version", "semantic_version"])
+
+
+class Release(Mapping):
+    """
+    Release of an update list, a read-only mapping with the keys `version` and `upload_time`
+
+    It compares equal to a dict with the same items. The upload time is kept as the ISO string of the package index
+    until it is read the first time.
+    """
+
+    __slots__ = ("version", "_upload_time")
+
+    _keys = ("version", "upload_time")
+
+    def __init__(self, version, upload_time=None):
+        """
+        :param version: string
+        :param upload_time: datetime, ISO string ("2020-01-01T10:00:00") or None
+        """
+        self.version = version
+        self._upload_time = upload_time
+
+    @property
+    def upload_time(self):
+        """
+        :return: datetime or None
+        """
+        upload_time = self._upload_time
+        if upload_time.__class__ is str:
+            upload_time = self._upload_time = datetime.fromisoformat(upload_time)
+        return upload_time
+
+    def __getitem__(self, key):
+        if key == "version":
+            return self.version
+        if key == "upload_time":
+            return self.upload_time
+        raise KeyError(key)
+
+    def __iter__(self):
+        return iter(self._keys)
+
+    def __len__(self):
+        return 2
+
+    def __reduce__(self):
+        # Keeps an unparsed upload time unparsed when the release is sent to a worker process
+        return Release, (self.version, self._upload_time)
+
+    def __repr__(self):
+        return f"Release(version={self.version!r}, upload_time={self.upload_time!r})"
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def parse_release(release):
+    """
+    Returns the PEP 440 and the semantic version of a release string
+
+    Results are kept in a process wide cache, so a release string is only parsed once even if it is shared by many
+    packages or environments. A form that could not be parsed is `None`.
+
+    :param release: string
+    :return: ParsedRelease(packaging.version.Version, semantic_version.Version)
+    """
+    try:
+        version = parse(release)
+    except InvalidVersion:
+        version = None
+
+    try:
+        release_version = semantic_version.Version.coerce(release)
+    except ValueError:
+        release_version = None
+
+    return ParsedRelease(version, release_version)
+
+
+def get_parse_cache_info():
+    """
+    Returns the hits, misses and size of the release parse cache
+
+    :return: functools._CacheInfo
+    """
+    return parse_release.cache_info()
+
+
+def clear_parse_cache():
+    """
+    Empty the release parse cache and reset its statistics
+    """
+    parse_release.cache_clear()
+
+
+def _coerce_version(release):
+    """
+    Returns the semantic version of a release string
+
+    :param release: string
+    :return: semantic_version.Version
+    """
+    release_version = parse_release(release).semantic_version
+
+    if release_version is None:
+        raise ValueError(f"Invalid version string: {release!r}")
+
+    return release_version
+
+
+def _release_triple(version):
+    """
+    Returns the (major, minor, patch) part of a version
+
+    :param version: semantic_version.Version
+    :return: (int, int, int)
+    """
+    return version.major, version.minor, version.patch
+
+
+class UpdateBoundaries:
+    """
+    Boundaries of the major, minor and patch updates of a package version
+
+    The boundaries are computed once, a release is classified by comparing it against them. Lower boundaries include
+    all releases greater or equal to the next version, upper boundaries exclude the next version including its
+    pre-releases, which matches `semantic_version.SimpleSpec(">=next,<upper")`.
+    """
+
+    __slots__ = ("next_major", "next_minor", "next_patch", "_major", "_minor", "_patch")
+
+    def __init__(self, package_version):
+        """
+        :param package_version: semantic_version.Version
+        """
+        self.next_major = package_version.next_major()
+        self.next_minor = package_version.next_minor()
+        self.next_patch = package_version.next_patch()
+
+        self._major = _release_triple(self.next_major)
+        self._minor = _release_triple(self.next_minor)
+        self._patch = _release_triple(self.next_patch)
+
+    @staticmethod
+    def _is_at_least(release, release_triple, boundary):
+        """
+        Checks if the release is greater or equal to a boundary without pre-release
+
+        :param release: semantic_version.Version
+        :param release_triple: (int, int, int)
+        :param boundary: (int, int, int)
+        :return: bool
+        """
+        return release_triple > boundary or (release_triple == boundary and not release.prerelease)
+
+    def is_major(self, release):
+        """
+        :param release: semantic_version.Version
+        :return: bool
+        """
+        return self._is_at_least(release, _release_triple(release), self._major)
+
+    def is_minor(self, release):
+        """
+        :param release: semantic_version.Version
+        :return: bool
+        """
+        release_triple = _release_triple(release)
+        return release_triple < self._major and self._is_at_least(release, release_triple, self._minor)
+
+    def is_patch(self, release):
+        """
+        :param release: semantic_version.Version
+        :return: bool
+        """
+        release_triple = _release_triple(release)
+        return release_triple < self._minor and self._is_at_least(release, release_triple, self._patch)
+
+    def classify(self, release):
+        """
+        Returns the update type of a release
+
+        :param release: semantic_version.Version
+        :return: MAJOR_UPDATE, MINOR_UPDATE, PATCH_UPDATE or None
+        """
+        release_triple = _release_triple(release)
+
+        if not self._is_at_least(release, release_triple, self._patch):
+            return None
+        if self._is_at_least(release, release_triple, self._major):
+            return MAJOR_UPDATE
+        if release_triple < self._major and self._is_at_least(release, release_triple, self._minor):
+            return MINOR_UPDATE
+        if release_triple < self._minor:
+            return PATCH_UPDATE
+        return None
+
+
+@lru_cache(maxsize=1024)
+def get_update_boundaries(package_version):
+    """
+    Returns the update boundaries of a package version
+
+    :param package_version: semantic_version.Version
+    :return: UpdateBoundaries
+    """
+    return UpdateBoundaries(package_version)
+
+
 def is_major_update(release, package):
     """
     Checks if the release is a major update compared to the package
@@ -29,7 +273,7 @@ def is_major_update(release, package):
     :param package: semantic_version.Version
     :return: bool
     """
-    return release in semantic_version.SimpleSpec(f">={package.next_major()}")
+    return get_update_boundaries(package).is_major(release)
 
 
 def is_minor_update(release, package):
@@ -40,7 +284,7 @@ def is_minor_update(release, package):
     :param package: semantic_version.Version
     :return: bool
     """
-    return release in semantic_version.SimpleSpec(f">={package.next_minor()},<{package.next_major()}")
+    return get_update_boundaries(package).is_minor(release)
 
 
 def is_patch_update(release, package):
@@ -51,7 +295,7 @@ def is_patch_update(release, package):
     :param package: semantic_version.Version
     :return: bool
     """
-    return release in semantic_version.SimpleSpec(f">={package.next_patch()},<{package.next_minor()}")
+    return get_update_boundaries(package).is_patch(release)
 
 
 def sorted_versions(versions):
@@ -63,102 +307,237 @@ def sorted_versions(versions):
     """
     return sorted(
         versions,
-        key=lambda x: semantic_version.Version.coerce(x["version"]),
+        key=lambda x: _coerce_version(x["version"]),
         reverse=True,
     )
 
 
+def _count_not_older(releases, boundary):
+    """
+    Returns the number of releases greater or equal to the boundary
+
+    :param releases: (semantic_version.Version, string, string)[], sorted descending by version
+    :param boundary: semantic_version.Version
+    :return: int
+    """
+    low, high = 0, len(releases)
+
+    while low < high:
+        middle = (low + high) // 2
+        if releases[middle][0] >= boundary:
+            low = middle + 1
+        else:
+            high = middle
+
+    return low
+
+
+class SortedReleases:
+    """
+    Releases of a project document, parsed and sorted once to be categorized against any number of versions
+
+    Each categorization only visits the releases newer than the next patch version, found by a binary search. The
+    records of listed releases are created once and shared by all categorizations.
+    """
+
+    __slots__ = ("releases", "pre_release_updates", "non_semantic_versions", "_records")
+
+    def __init__(self, package_data):
+        """
+        :param package_data: dict
+        """
+        releases = []
+        pre_releases = []
+        non_semantic_versions = []
+
+        for release, files in package_data["releases"].items():
+            # Parsed once the upload time is read, most releases are never printed
+            upload_time = files[0]["upload_time"] if files else None
+
+            # Get PEP 440 and semantic version of package
+            parsed_release, release_version = parse_release(release)
+
+            if parsed_release is None or release_version is None:
+                # Keep track of versions that could not be recognized as semantic
+                non_semantic_versions.append(Release(release, upload_time))
+                continue
+
+            if parsed_release.is_prerelease:
+                pre_releases.append((release_version, release, upload_time))
+            else:
+                releases.append((release_version, release, upload_time))
+
+        # Sorting is stable, so releases with the same semantic version keep the order of the package data
+        releases.sort(key=itemgetter(0), reverse=True)
+        pre_releases.sort(key=itemgetter(0), reverse=True)
+
+        #: (semantic_version.Version, string, string)[], final releases sorted descending by version
+        self.releases = releases
+        self.pre_release_updates = [
+            Release(release, upload_time) for _release_version, release, upload_time in pre_releases
+        ]
+        self.non_semantic_versions = non_semantic_versions
+        self._records = [None] * len(releases)
+
+    def _record(self, position):
+        """
+        Returns the record of a final release
+
+        :param position: int, position in `releases`
+        :return: Release
+        """
+        record = self._records[position]
+
+        if record is None:
+            _release_version, release, upload_time = self.releases[position]
+            record = self._records[position] = Release(release, upload_time)
+
+        return record
+
+    def categorize(self, package_version):
+        """
+        Returns the releases grouped by type compared to a package version
+
+        :param package_version: semantic_version.Version
+        :return: dict, see `get_categorized_package_data`
+        """
+        boundaries = get_update_boundaries(package_version)
+
+        # Place package in the appropriate semantic visioning list, releases older than the next patch are skipped
+        updates = {MAJOR_UPDATE: [], MINOR_UPDATE: [], PATCH_UPDATE: []}
+        for position in range(_count_not_older(self.releases, boundaries.next_patch)):
+            update_type = boundaries.classify(self.releases[position][0])
+            if update_type:
+                updates[update_type].append(self._record(position))
+
+        return {
+            "major_updates": updates[MAJOR_UPDATE],
+            "minor_updates": updates[MINOR_UPDATE],
+            "patch_updates": updates[PATCH_UPDATE],
+            "pre_release_updates": list(self.pre_release_updates),
+            "non_semantic_versions": list(self.non_semantic_versions),
+        }
+
+
 def get_categorized_package_data(package_data, package_version):
     """
     Returns all Versions grouped by type compared to the current package version
 
+    Releases are sorted once, releases older than the next patch version are skipped without being classified.
+
     :param package_data: dict
     :param package_version: semantic_version.Version
     :return: {
-        major_updates: semantic_version.Version[]
-        minor_updates: semantic_version.Version[]
-        patch_updates: semantic_version.Version[]
-        pre_release_updates: semantic_version.Version[]
-        non_semantic_versions: semantic_version.Version[]
+        major_updates: Release[]
+        minor_updates: Release[]
+        patch_updates: Release[]
+        pre_release_updates: Release[]
+        non_semantic_versions: Release[]
     }
     """
-    major_updates = []
-    minor_updates = []
-    patch_updates = []
-    pre_release_updates = []
+    return SortedReleases(package_data).categorize(package_version)
+
+
+def get_categorized_package_lists(package_data, package_versions):
+    """
+    Returns all Versions grouped by type compared to each of several package versions
+
+    The releases are parsed and sorted once for all package versions, see `SortedReleases`.
+
+    :param package_data: dict
+    :param package_versions: semantic_version.Version[]
+    :return: dict, {package version: categorized releases, see `get_categorized_package_data`}
+    """
+    sorted_releases = SortedReleases(package_data)
+    return {package_version: sorted_releases.categorize(package_version) for package_version in package_versions}
+
+
+def _get_up_to_date_package_data(package_data, package_version):
+    """
+    Returns the categorized releases of a project without major, minor or patch updates of the package version
+
+    Only the pre-releases and the releases without a semantic version are collected, with the same result as
+    `get_categorized_package_data`. A final release is an update if it is not older than the next patch version, like
+    in the categorization, so the PEP 440 order of the latest release only selects this path. Release strings of plain
+    final releases are compared as integers without being parsed.
+
+    :param package_data: dict
+    :param package_version: semantic_version.Version
+    :return: dict, see `get_categorized_package_data`, or None if a final release is an update of the package version
+    """
+    boundaries = get_update_boundaries(package_version)
+    next_patch = _release_triple(boundaries.next_patch)
+    pre_releases = []
     non_semantic_versions = []
 
-    for release, info in package_data["releases"].items():
-        upload_time = None
-        if info:
-            upload_time = datetime.strptime(info[0]["upload_time"], "%Y-%m-%dT%H:%M:%S")
+    for release, files in package_data["releases"].items():
+        if _FINAL_RELEASE_RE.fullmatch(release):
+            # The semantic version of a plain final release is its components padded with zeros
+            release_triple = tuple(map(int, release.split("."))) + (0, 0)
+            if release_triple[:3] >= next_patch:
+                return None
+            continue
+
+        upload_time = files[0]["upload_time"] if files else None
+        parsed_release, release_version = parse_release(release)
+
+        if parsed_release is None or release_version is None:
+            non_semantic_versions.append(Release(release, upload_time))
+        elif parsed_release.is_prerelease:
+            pre_releases.append((release_version, release, upload_time))
+        elif boundaries.classify(release_version):
+            return None
 
-        try:
-            parsed_release = parse(release)
-
-            # Get semantic version of package
-            release_version = semantic_version.Version.coerce(release)
-
-            if not parsed_release.is_prerelease:
-                # Place package in the appropriate semantic visioning list
-                if is_major_update(release_version, package_version):
-                    major_updates.append(
-                        {
-                            "version": release,
-                            "upload_time": upload_time,
-                        },
-                    )
-                elif is_minor_update(release_version, package_version):
-                    minor_updates.append(
-                        {
-                            "version": release,
-                            "upload_time": upload_time,
-                        },
-                    )
-                elif is_patch_update(release_version, package_version):
-                    patch_updates.append(
-                        {
-                            "version": release,
-                            "upload_time": upload_time,
-                        },
-                    )
-            else:
-                pre_release_updates.append({"version": release, "upload_time": upload_time})
-        except ValueError:
-            # Keep track of versions that could not be recognized as semantic
-            non_semantic_versions.append({"version": release, "upload_time": upload_time})
+    pre_releases.sort(key=itemgetter(0), reverse=True)
 
     return {
-        "major_updates": sorted_versions(major_updates),
-        "minor_updates": sorted_versions(minor_updates),
-        "patch_updates": sorted_versions(patch_updates),
-        "pre_release_updates": sorted_versions(pre_release_updates),
+        "major_updates": [],
+        "minor_updates": [],
+        "patch_updates": [],
+        "pre_release_updates": [
+            Release(release, upload_time) for _release_version, release, upload_time in pre_releases
+        ],
         "non_semantic_versions": non_semantic_versions,
     }
 
 
-def get_parsed_environment_package_list():
+def _is_up_to_date(package_data, version):
+    """
+    Checks if the latest release of the project document is not newer than a version
+
+    :param package_data: dict
+    :param version: string
+    :return: bool, False if either version is not a PEP 440 version
+    """
+    latest_release = parse_release(package_data["info"]["version"] or "").version
+    package_version = parse_release(version).version
+
+    return latest_release is not None and package_version is not None and package_version >= latest_release
+
+
+def get_parsed_environment_package_list(cache=True, cache_directory=None):
     """
     Get a parsed list of packages in the current environment
 
+    :param cache: bool, use and store cached environment scans
+    :param cache_directory: string
     :return:
     """
-    return parse_requirements_list(get_environment_requirements_list())
+    return parse_requirements_list(get_environment_requirements_list(cache=cache, cache_directory=cache_directory))
 
 
-def get_environment_requirements_list():
+def get_environment_requirements_list(cache=True, cache_directory=None):
     """
     Take the requirements list from the current running environment
 
+    The installed distributions are read in-process, the list matches the output of `pip freeze`.
+
+    :param cache: bool, use and store cached environment scans
+    :param cache_directory: string
     :return: string
     """
-    requirement_list = []
-    requirements = check_output([sys.executable, "-m", "pip", "freeze"])
-
-    for requirement in requirements.split():
-        requirement_list.append(requirement.decode("utf-8"))
-
-    return requirement_list
+    with trace_phase(PHASE_ENVIRONMENT):
+        return scan_environment(cache=cache, cache_directory=cache_directory)
 
 
 def parse_requirements_list(requirements_list):
@@ -189,92 +568,363 @@ def parse_requirements_list(requirements_list):
     return req_list
 
 
-async def get_pypi_package_data(package_name, version=None):
+async def get_pypi_package_data(package_name, version=None, session=None):
     """
-    Get package data from pypi by the package name
+    Get package data from the package index by the package name
+
+    The index backend of the session is used, the PyPI JSON API by default.
 
     https://wiki.python.org/moin/PyPIJSON
 
     :param package_name: string
     :param version: string
+    :param session: updatable.client.Session, a one-off session is used if not given
     :return: dict
     """
-    pypi_url = "https://pypi.org/pypi"
+    if session is None:
+        async with Session() as session:
+            return await get_pypi_package_data(package_name, version, session=session)
 
-    if version:
-        package_url = f"{pypi_url}/{package_name}/{version}/json"
-    else:
-        package_url = f"{pypi_url}/{package_name}/json"
+    with trace_phase(PHASE_FETCH, package_name):
+        if version:
+            return await session.index.get_release_data(session, package_name, version)
 
-    async with httpx.AsyncClient() as client:
-        try:
-            resp = await client.get(package_url, follow_redirects=True, timeout=None)
-        except httpx.ConnectError:
-            raise RuntimeError("Connection error!")
+        return await session.index.get_project_data(session, package_name)
 
-        # Package not available on pypi
-        if resp.is_error:
-            return None
 
-        return resp.json()
+def _get_release_info(release_data):
+    """
+    Returns the version and license of a release document
+
+    :param release_data: dict
+    :return: (string, string)
+    """
+    info = release_data["info"]
+    return info["version"], info["license"] if info["license"] else ""
+
+
+def _is_same_version(release, version):
+    """
+    Checks if two version strings describe the same release
+
+    :param release: string
+    :param version: string
+    :return: bool
+    """
+    parsed_release = parse_release(release).version
+    parsed_version = parse_release(version).version
+
+    if parsed_release is None or parsed_version is None:
+        return release == version
+
+    return parsed_release == parsed_version
+
+
+def get_update_list(package_data, version):
+    """
+    Return update information of a version from the project document
+
+    The information about the current release is only known if the version is the latest one, otherwise
+    `current_release` and `current_release_license` are `None` until `resolve_current_release` is awaited.
+
+    :param package_data: dict or None, the project document
+    :param version: string
+    :return: dict
+    """
+    return get_update_lists(package_data, [version])[version]
+
+
+def get_update_lists(package_data, versions):
+    """
+    Return update information of several versions from the project document
 
+    The releases are parsed and sorted at most once for all versions, see `get_update_list`.
 
-async def get_package_update_list(package_name, version):
+    :param package_data: dict or None, the project document
+    :param versions: string[]
+    :return: dict, {version: update information}
+    """
+    sorted_releases = None
+    update_lists = {}
+
+    for version in versions:
+        package_version = _coerce_version(version)
+
+        # Current release specific information, `None` until it is resolved
+        current_release = None
+        current_release_license = None
+
+        # Latest release specific information
+        latest_release = ""
+        latest_release_license = ""
+
+        # Information about packages
+        newer_releases = 0
+        pre_releases = 0
+        categorized_package_data = {
+            "major_updates": [],
+            "minor_updates": [],
+            "patch_updates": [],
+            "pre_release_updates": [],
+            "non_semantic_versions": [],
+        }
+
+        if package_data:
+            latest_release, latest_release_license = _get_release_info(package_data)
+
+            # Most packages are up to date, their final releases are not categorized. The latest release of the
+            # document is only trusted to select this path, a newer final release still falls back to the
+            # categorization.
+            categorized_package_data = None
+            if _is_up_to_date(package_data, version):
+                categorized_package_data = _get_up_to_date_package_data(package_data, package_version)
+            if categorized_package_data is None:
+                if sorted_releases is None:
+                    sorted_releases = SortedReleases(package_data)
+                categorized_package_data = sorted_releases.categorize(package_version)
+
+            # Get number of newer releases available for the given package, excluding pre_releases and non semantic
+            # versions
+            newer_releases = len(
+                categorized_package_data["major_updates"]
+                + categorized_package_data["minor_updates"]
+                + categorized_package_data["patch_updates"],
+            )
+            pre_releases = len(categorized_package_data["pre_release_updates"])
+
+            # The current release is the latest one, no need to fetch its document unless the project document has no
+            # license, e.g. the simple API only provides it in the core metadata of the release
+            if _is_same_version(latest_release, version) and package_data["info"]["license"] is not None:
+                current_release = latest_release
+                current_release_license = latest_release_license
+        else:
+            # Package not available on pypi, neither is the release
+            current_release = ""
+            current_release_license = ""
+
+        update_lists[version] = {
+            "current_release": current_release,
+            "current_release_license": current_release_license,
+            "latest_release": latest_release,
+            "latest_release_license": latest_release_license,
+            "newer_releases": newer_releases,
+            "pre_releases": pre_releases,
+            **categorized_package_data,
+        }
+
+    return update_lists
+
+
+async def _get_update_lists(package_name, versions, session):
+    """
+    Return update information of a package for several versions from its project document
+
+    If the session has a snapshot store, the update information of a previous run is reused as long as the serial of
+    the project did not move, otherwise the project document is requested and categorized again. Large projects are
+    categorized in the executor of the session, so the event loop keeps reading responses meanwhile.
+
+    :param package_name: string
+    :param versions: string[]
+    :param session: updatable.client.Session
+    :return: dict, {version: update information}
+    """
+    snapshots = session.snapshots
+    snapshot = None
+
+    if snapshots is not None:
+        index_url = session.index.index_url
+        project_name = canonicalize_name(package_name)
+        snapshot = await asyncio.to_thread(snapshots.load, index_url, project_name)
+
+        # Checking the serial is only worth a request if the snapshot can answer the lookup
+        if snapshot is not None and snapshot.covers(versions):
+            serial = await session.index.get_project_serial(session, project_name)
+            if serial is not None and serial == snapshot.serial:
+                return {version: snapshot.update_lists[version] for version in versions}
+
+    # Get package data from pypi
+    package_data = await get_pypi_package_data(package_name, session=session)
+    with trace_phase(PHASE_CATEGORIZE, package_name):
+        if (
+            package_data
+            and len(package_data["releases"]) >= EXECUTOR_MIN_RELEASES
+            and not all(_is_up_to_date(package_data, version) for version in versions)
+        ):
+            update_lists = await session.run_in_executor(get_update_lists, package_data, versions)
+        else:
+            update_lists = get_update_lists(package_data, versions)
+
+    serial = package_data.get("last_serial") if package_data else None
+    if snapshots is not None and serial is not None:
+        # Keep the versions looked up by previous runs as long as they are still valid
+        stored = dict(snapshot.update_lists) if snapshot is not None and snapshot.serial == serial else {}
+        stored.update(update_lists)
+        await asyncio.to_thread(snapshots.store, index_url, project_name, serial, stored)
+
+    return update_lists
+
+
+async def get_package_update_list(package_name, version, session=None, lazy=False):
     """
     Return update information of a package from a given version
 
+    The information about the current release is taken from the project document if the package is up to date.
+    Otherwise it requires a request for the document of the current release, which is deferred when `lazy` is set:
+    `current_release` and `current_release_license` are `None` until `resolve_current_release` is awaited.
+
     :param package_name: string
     :param version: string
+    :param session: updatable.client.Session, a one-off session is used if not given
+    :param lazy: bool, defer the request for the current release document
     :return: dict
     """
-    package_version = semantic_version.Version.coerce(version)
+    if session is None:
+        async with Session() as session:
+            return await get_package_update_list(package_name, version, session=session, lazy=lazy)
 
-    # Get package and version data from pypi
-    package_data = await get_pypi_package_data(package_name)
-    version_data = await get_pypi_package_data(package_name, version)
+    _coerce_version(version)
 
-    # Current release specific information
-    current_release = ""
-    current_release_license = ""
+    with trace_phase(PHASE_LOOKUP, package_name):
+        updates = (await _get_update_lists(package_name, [version], session))[version]
 
-    # Latest release specific information
-    latest_release = ""
-    latest_release_license = ""
+        if not lazy:
+            await resolve_current_release(updates, package_name, version, session=session)
 
-    # Information about packages
-    newer_releases = 0
-    pre_releases = 0
-    categorized_package_data = {
-        "major_updates": [],
-        "minor_updates": [],
-        "patch_updates": [],
-        "pre_release_updates": [],
-        "non_semantic_versions": [],
-    }
+    return updates
 
-    if package_data:
-        latest_release = package_data["info"]["version"]
-        latest_release_license = package_data["info"]["license"] if package_data["info"]["license"] else ""
-        categorized_package_data = get_categorized_package_data(package_data, package_version)
 
-        # Get number of newer releases available for the given package, excluding pre_releases and non semantic versions
-        newer_releases = len(
-            categorized_package_data["major_updates"]
-            + categorized_package_data["minor_updates"]
-            + categorized_package_data["patch_updates"],
-        )
-        pre_releases = len(categorized_package_data["pre_release_updates"])
+async def get_package_update_lists(package_name, versions, session=None, lazy=False):
+    """
+    Return update information of a package for several versions
+
+    The project document is requested once and categorized once per distinct version.
+
+    :param package_name: string
+    :param versions: string[]
+    :param session: updatable.client.Session, a one-off session is used if not given
+    :param lazy: bool, defer the requests for the current release documents, see `get_package_update_list`
+    :return: dict, {version: update information}
+    """
+    if session is None:
+        async with Session() as session:
+            return await get_package_update_lists(package_name, versions, session=session, lazy=lazy)
+
+    versions = list(dict.fromkeys(versions))
+    for version in versions:
+        _coerce_version(version)
+
+    with trace_phase(PHASE_LOOKUP, package_name):
+        update_lists = await _get_update_lists(package_name, versions, session)
+
+        if not lazy:
+            await asyncio.gather(
+                *[
+                    resolve_current_release(updates, package_name, version, session=session)
+                    for version, updates in update_lists.items()
+                ],
+            )
+
+    return update_lists
+
+
+async def resolve_current_release(updates, package_name, version, session=None):
+    """
+    Fetch the current release information of an update list created with `lazy`
+
+    :param updates: dict, update information returned by `get_package_update_list`
+    :param package_name: string
+    :param version: string
+    :param session: updatable.client.Session, a one-off session is used if not given
+    :return: dict, the completed update information
+    """
+    if updates["current_release_license"] is not None:
+        return updates
+
+    version_data = await get_pypi_package_data(package_name, version, session=session)
 
     if version_data:
-        current_release = version_data["info"]["version"]
-        current_release_license = version_data["info"]["license"] if version_data["info"]["license"] else ""
+        updates["current_release"], updates["current_release_license"] = _get_release_info(version_data)
+    else:
+        updates["current_release"] = ""
+        updates["current_release_license"] = ""
 
-    return {
-        "current_release": current_release,
-        "current_release_license": current_release_license,
-        "latest_release": latest_release,
-        "latest_release_license": latest_release_license,
-        "newer_releases": newer_releases,
-        "pre_releases": pre_releases,
-        **categorized_package_data,
-    }
+    return updates
+
+
+async def as_completed_until(lookups, deadline=None):
+    """
+    Yields the results of lookups as soon as they are available
+
+    Lookups run concurrently. A lookup whose request timed out, or that did not finish before the deadline, yields
+    `None`. A lookup whose requests to the index failed yields the `IndexRequestError`, so one unavailable project does
+    not fail the others. Lookups still running at the deadline are cancelled. If a lookup fails otherwise, or the
+    iteration is stopped early, the other lookups are cancelled and awaited before the iteration ends.
+
+    :param lookups: awaitable[]
+    :param deadline: float, seconds from the start until unfinished lookups are given up, no limit if not given
+    :return: async iterator of (position of the lookup, result or None or IndexRequestError)
+    """
+
+    async def run(position, lookup):
+        try:
+            return position, await lookup
+        except TimeoutError:
+            return position, None
+        except IndexRequestError as e:
+            return position, e
+
+    tasks = [asyncio.ensure_future(run(position, lookup)) for position, lookup in enumerate(lookups)]
+    unreported = set(range(len(tasks)))
+
+    try:
+        try:
+            for task in asyncio.as_completed(tasks, timeout=deadline):
+                position, result = await task
+                unreported.discard(position)
+                yield position, result
+        except asyncio.TimeoutError:
+            # The deadline expired, results that arrived meanwhile are still reported
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+            for position in sorted(unreported):
+                yield (position, None) if tasks[position].cancelled() else tasks[position].result()
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def iter_package_updates(packages, session=None, lazy=False, deadline=None):
+    """
+    Yields the update information of packages as soon as it is available
+
+    All packages are looked up concurrently, so a slow lookup does not delay the results of the others. Pending
+    lookups are cancelled if the iteration is stopped early or a lookup fails.
+
+    The update information is `None` for packages that timed out: a request exceeded the timeout of the session or
+    the lookup did not finish before the deadline. They are yielded at the deadline, after all finished packages.
+    Packages whose requests to the index failed yield the `updatable.index.IndexRequestError` instead.
+
+    :param packages: dict[], {package, version} as returned by `parse_requirements_list`
+    :param session: updatable.client.Session, a one-off session is used if not given
+    :param lazy: bool, defer the request for the current release document, see `get_package_update_list`
+    :param deadline: float, seconds from the start until unfinished lookups are given up, no limit if not given
+    :return: async iterator of (package, updates or None or IndexRequestError)
+    """
+    if session is None:
+        async with Session() as session:
+            async for result in iter_package_updates(packages, session=session, lazy=lazy, deadline=deadline):
+                yield result
+        return
+
+    lookups = [
+        get_package_update_list(package["package"], package["version"], session=session, lazy=lazy)
+        for package in packages
+    ]
+
+    # Closed explicitly, so the pending lookups are cancelled as soon as the iteration is stopped
+    async with aclosing(as_completed_until(lookups, deadline)) as results:
+        async for position, updates in results:
+            yield packages[position], updates